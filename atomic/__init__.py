@@ -1,10 +1,14 @@
 import os, sys
 sys.path.append(os.path.join(os.path.dirname(__file__)))
-from .atomic_data import AtomicData
+from .atomic_data import AtomicData, load_elements
 from .collisional_radiative import CollRadEquilibrium
 from .time_dependent_rates import RateEquations, RateEquationsWithDiffusion
 from .radiation import Radiation
 from .electron_cooling import ElectronCooling
+from .chunked import ChunkedEquilibrium
+from .equilibrium_table import EquilibriumTable
+from .element_registry import registry
+from .plasma_state import PlasmaState
 
 element = AtomicData.from_element
 
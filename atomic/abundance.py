@@ -1,5 +1,7 @@
 import numpy as np
 
+from .plasma_state import PlasmaState
+
 
 class FractionalAbundance(object):
     """An array of ionisation stage fractions over density and/or temperature.
@@ -7,34 +9,49 @@ class FractionalAbundance(object):
     Attributes:
         atomic_data (AtomicData): used by Radiation class
             to get various coefficients.
-        y (np.array, 2D): stores the fractional abundance of each
+        y (np.array): stores the fractional abundance of each
             ionisation stage, k=0 to Z, for each point
             of the given temperatures and densities.
-            Shape is (Z+1,x)
-        temperature (array_like): list of temperatures [eV]
-        density (array_like): list of densities [m^-3]
+            Shape is (Z+1,) + the broadcast shape of temperature and
+            density, e.g. (Z+1,x) or (Z+1,nR,nZ) for a 2D grid.
+        temperature (array_like): temperatures [eV]
+        density (array_like): densities [m^-3], which broadcast against
+            temperature; e.g. one density for all temperatures.
+        plasma_state (PlasmaState): of temperature and density, to evaluate
+            more coefficients at the same points.
+        dy_dTe (np.array): None, or the derivative of y with respect to
+            temperature at fixed density [1/eV], of the same shape as y.
     """
-    def __init__(self, atomic_data, y, temperature, density):
+    def __init__(self, atomic_data, y, temperature, density,
+            plasma_state=None, dy_dTe=None):
         self.atomic_data = atomic_data
         self.y = y # fractional abundances of each charge state
+        self.dy_dTe = dy_dTe
         self.temperature = temperature
         self.density = density
+        self._plasma_state = plasma_state
+
+    @property
+    def plasma_state(self):
+        if self._plasma_state is None:
+            self._plasma_state = PlasmaState(self.temperature, self.density)
+        return self._plasma_state
 
     def mean_charge(self):
         """
         Compute the mean charge:
             <Z> = sum_k ( y_k * k )
 
-        Assumes that y is a 2D array with shape
-        (nuclear_charge+1,# of temperatures)
+        y has shape (nuclear_charge+1,) + the shape of the points, e.g.
+        (nuclear_charge+1, # of temperatures).
 
         Returns:
             An np.array of mean charge.
         """
 
-        # make a 2D array [[0],[1],[2],...]
+        # make an array [[0],[1],[2],...] that broadcasts against y
         k = np.arange(self.y.shape[0])
-        k = k[:,np.newaxis]
+        k = k.reshape((-1,) + (1,) * (self.y.ndim - 1))
 
         z_mean = np.sum(self.y * k, axis=0)
         return z_mean
@@ -52,7 +69,7 @@ class FractionalAbundance(object):
         Assumes the main ion has charge +1.
 
         Returns:
-            An np.array of Zeff
+            An np.array of Zeff, of the shape of the points.
         """
         if ion_density is None:
             ion_density = self.density
@@ -64,6 +81,12 @@ class FractionalAbundance(object):
 
         return zeff
 
+    def mean_square_charge(self):
+        """<Z**2> = sum_k ( y_k * k**2 )"""
+        k = np.arange(self.y.shape[0])
+        k = k.reshape((-1,) + (1,) * (self.y.ndim - 1))
+        return np.sum(self.y * k**2, axis=0)
+
     def plot_vs_temperature(self, **kwargs):
         """Use Matplotlib to plot the abundance of each stage at each point.
 
@@ -122,3 +145,51 @@ class FractionalAbundance(object):
             mask = imax == i
             lines.append(ax.plot(x[mask], y[mask], color=line_ref.get_color()))
 
+
+class ReducedAbundance(object):
+    """The moments of fractional abundances and the radiated power, from
+    CollRadEquilibrium.reduced, which never stores the abundances.
+
+    Attributes:
+        atomic_data (AtomicData): the element.
+        temperature (np.array): temperatures [eV].
+        density (np.array): densities [m^-3], of the same shape.
+        power (dict): 'line_power', 'continuum_power', 'cx_power' and
+            'total' as Radiation.power [W/m3].
+        plasma_state (PlasmaState): of temperature and density.
+    """
+    def __init__(self, atomic_data, mean_charge, mean_square_charge, power,
+            temperature, density, plasma_state=None):
+        self.atomic_data = atomic_data
+        self._mean_charge = mean_charge
+        self._mean_square_charge = mean_square_charge
+        self.power = power
+        self.temperature = temperature
+        self.density = density
+        self._plasma_state = plasma_state
+
+    @property
+    def plasma_state(self):
+        if self._plasma_state is None:
+            self._plasma_state = PlasmaState(self.temperature, self.density)
+        return self._plasma_state
+
+    def mean_charge(self):
+        """<Z> = sum_k ( y_k * k ), as FractionalAbundance.mean_charge."""
+        return self._mean_charge
+
+    def mean_square_charge(self):
+        """<Z**2> = sum_k ( y_k * k**2 )"""
+        return self._mean_square_charge
+
+    def effective_charge(self, impurity_fraction, ion_density=None):
+        """Zeff as FractionalAbundance.effective_charge, with the
+        approximation <Z**2> = <Z>**2.  Replacing the square of
+        mean_charge() by mean_square_charge() gives it without.
+        """
+        if ion_density is None:
+            ion_density = self.density
+
+        impurity_density = impurity_fraction * self.density
+        return (ion_density + impurity_density * self._mean_charge**2
+                ) / self.density
@@ -5,14 +5,16 @@ detailed description of the possible subclasses.
 
 [1] http://www.adas.ac.uk/man/appxa-11.pdf
 [2] http://www.adas.ac.uk/man/chap4-04.pdf
+
+The files are parsed directly with numpy, so no compiled extension is needed
+and several files can be read at the same time from different threads.
 """
 import os
+import re
 import numpy as np
 
-import _xxdata_11
-
 
-# Supported adf11 data classes.  See src/xxdata_11/xxdata_11.for for all the
+# Supported adf11 data classes.  See xxdata_11.for from OPEN-ADAS for all the
 # twelve classes.
 adf11_classes = {
     'acd' : 1, # recombination coefficients
@@ -25,17 +27,14 @@ adf11_classes = {
 }
 
 
-# Some hard coded parameters to run xxdata_11.for routine.  The values have
-# been take from src/xxdata_11/test.for, and should be OK for all files.
-parameters = {
-    'isdimd' : 200,
-    'iddimd' : 40,
-    'itdimd' : 50,
-    'ndptnl' : 4,
-    'ndptn' : 128,
-    'ndptnc' : 256,
-    'ndcnct' : 100
-}
+# A number in an adf11 file, written with a Fortran F10.5 format.  Adjacent
+# fields are not always separated by blanks (e.g. '-10.12345-11.12345'), so
+# numbers are found by pattern rather than by splitting on whitespace.
+_number = re.compile(r'[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eEdD][-+]?\d+)?')
+
+# The separator line in front of each block of coefficients, like
+# '---------/ IPRT= 1  / IGRD= 1  /--------/ Z1= 1   / DATE= 18/06/96'
+_block_separator = re.compile(r'Z1\s*=\s*(\d+)')
 
 
 class Adf11(object):
@@ -45,7 +44,8 @@ class Adf11(object):
         name (string): a filename
         class_ (string): 'acd' or 'scd', ...
         element (string): short element name like 'c' or 'ar'
-        _raw_return_value (tuple): the output of the filereading code.
+        _raw_return_value (tuple): the output of the filereading code,
+            (iz0, ddens, dtev, drcof).
 
     """
     def __init__(self, name):
@@ -57,36 +57,40 @@ class Adf11(object):
     def read(self, class_=None):
         if class_ == None:
             self._sniff_class()
-        self._read_xxdata_11()
+        self._read_adf11()
         return self._convert_to_dictionary()
 
-    def _read_xxdata_11(self):
-        null_fds = os.open(os.devnull, os.O_RDWR)
-        save = os.dup(1)
-        os.dup2(null_fds, 1)
+    def read_header(self):
+        """Read only the header line of the file.
 
-        iclass = adf11_classes[self.class_]
-        iunit = _xxdata_11.helper_open_file(self.name)
-        ret =  _xxdata_11.xxdata_11(iunit, iclass, **parameters)
-        _xxdata_11.helper_close_file(iunit)
+        This is much cheaper than read(), and is enough to check which
+        element a file belongs to.
 
-        self._raw_return_value = ret
+        Returns:
+            a dictionary with keys 'charge', 'class', 'element' and 'name'.
+        """
+        self._sniff_class()
+        with open(self.name) as f:
+            iz0, idmax, itmax = _parse_header(f.readline())
 
-        os.dup2(save, 1) # restore stdout
-        os.close(null_fds) # close the temporary fds
+        return {'charge' : iz0, 'class' : self.class_,
+                'element' : self.element, 'name' : self.name}
+
+    def _read_adf11(self):
+        with open(self.name) as f:
+            lines = f.readlines()
+
+        self._raw_return_value = parse_adf11(lines)
 
     def _convert_to_dictionary(self):
-        ret = self._raw_return_value
-        iz0, is1min, is1max, nptnl, nptn, nptnc, iptnla, iptna, iptnca, ncnct,\
-        icnctv, iblmx, ismax, dnr_ele, dnr_ams, isppr, ispbr, isstgr, idmax,\
-        itmax, ddens, dtev, drcof, lres, lstan, lptn = ret
+        iz0, ddens, dtev, drcof = self._raw_return_value
 
         d = {}
         d['charge'] = iz0
-        d['log_density'] = ddens[:idmax]
-        d['log_temperature'] = dtev[:itmax]
-        d['number_of_charge_states'] = ismax
-        d['log_coeff'] = drcof[:ismax, :itmax, :idmax]
+        d['log_density'] = ddens
+        d['log_temperature'] = dtev
+        d['number_of_charge_states'] = drcof.shape[0]
+        d['log_coeff'] = drcof
 
         d['class'] = self.class_
         d['element'] = self.element
@@ -111,6 +115,68 @@ class Adf11(object):
         self.element = s.element
 
 
+def parse_adf11(lines):
+    """Parse the lines of an unresolved adf11 file.
+
+    The file starts with a header line 'IZ0 IDMAX ITMAX IZ1MIN IZ1MAX /...',
+    followed by the log10 densities and log10 temperatures, and then one
+    block of ITMAX x IDMAX coefficients per charge state, each introduced by
+    a separator line containing 'Z1='.  Within a block the density index
+    runs fastest.
+
+    Args:
+        lines (list of str): the contents of the file.
+
+    Returns:
+        (iz0, ddens, dtev, drcof): the nuclear charge, the log10 densities
+        [cm^-3], the log10 temperatures [eV] and the coefficients as a 3D
+        np.array with shape (number of blocks, ITMAX, IDMAX).
+    """
+    iz0, idmax, itmax = _parse_header(lines[0])
+
+    axes = []
+    blocks = []
+    current = axes
+    for line in lines[1:]:
+        if line.startswith('C'):
+            break # the trailing comment section
+        if _block_separator.search(line):
+            current = []
+            blocks.append(current)
+        elif not line.strip().startswith('--'):
+            current.extend(_number.findall(line))
+
+    if len(axes) < idmax + itmax:
+        raise ValueError('truncated adf11 file: expected %d density and '
+                '%d temperature values.' % (idmax, itmax))
+    # some classes (e.g. ecd) have extra values in front of the axes
+    axes = _to_floats(axes[len(axes) - idmax - itmax:])
+    ddens = axes[:idmax]
+    dtev = axes[idmax:]
+
+    size = itmax * idmax
+    for i, b in enumerate(blocks):
+        if len(b) != size:
+            raise ValueError('block %d has %d values, expected %d.' %
+                    (i + 1, len(b), size))
+    drcof = _to_floats([v for b in blocks for v in b])
+    drcof = drcof.reshape(len(blocks), itmax, idmax)
+
+    return iz0, ddens, dtev, drcof
+
+
+def _parse_header(line):
+    """'IZ0 IDMAX ITMAX IZ1MIN IZ1MAX /...' -> (IZ0, IDMAX, ITMAX)"""
+    header = line.split('/')[0].split()
+    return tuple(int(i) for i in header[:3])
+
+
+def _to_floats(tokens):
+    """Convert Fortran number strings (possibly with 'D' exponents)."""
+    text = ' '.join(tokens).replace('D', 'E').replace('d', 'e')
+    return np.array(text.split(), dtype=float)
+
+
 class Sniffer(object):
     """Inspector for a filename.
 
@@ -124,18 +190,25 @@ class Sniffer(object):
         class_ (str): file type 'scd'
         extension (str): should always be 'dat'
         resolved (bool): true for this example, but should always be False.
+
+    Pass check=False to also accept metastable resolved files.  A name that
+    is not of the form above raises ValueError.
     """
-    def __init__(self, file_):
+    def __init__(self, file_, check=True):
         self.file_ = file_
         self.name = os.path.basename(file_)
 
         self._sniff_name()
-        self._check()
+        if check:
+            self._check()
 
     def _sniff_name(self):
-        name, extension = self.name.split(os.path.extsep)
+        try:
+            name, extension = self.name.split(os.path.extsep)
+            type_, element = name.split('_')
+        except ValueError:
+            raise ValueError('not an adf11 file name: %s' % self.name)
 
-        type_, element = name.split('_')
         class_ = type_[:3]
         year = type_[3:]
         resolved = year.endswith('r')
@@ -6,7 +6,14 @@ file.
 [1] http://www.adas.ac.uk/man/appxa-15.pdf
 """
 import os
-import _xxdata_15
+import threading
+
+try:
+    import _xxdata_15
+except ImportError:
+    # without the extension, adf15 data can still come from a packed
+    # database (see database.py).
+    _xxdata_15 = None
 
 # Some hard coded parameters to run src/xxdata_15/xxdata_15.for routine.  The
 # values have been take from src/xxdata_15/test.for, and should be OK for
@@ -23,6 +30,10 @@ parameters = {
     'ndcmt' : 2000,
 }
 
+# The Fortran reader always uses unit 10 and we silence it by swapping the
+# process-wide stdout, so only one file may be read at a time.
+_xxdata_15_lock = threading.Lock()
+
 class Adf15(object):
     def __init__(self, name):
         if not os.path.isfile(name):
@@ -35,6 +46,13 @@ class Adf15(object):
         return self._convert_to_dictionary()
 
     def _read_xxdata_15(self):
+        if _xxdata_15 is None:
+            raise ImportError('reading adf15 files needs the _xxdata_15 '
+                    'extension, see README.md.')
+        with _xxdata_15_lock:
+            self._read_xxdata_15_unlocked()
+
+    def _read_xxdata_15_unlocked(self):
         null_fds = os.open(os.devnull, os.O_RDWR)
         save = os.dup(1)
         os.dup2(null_fds, 1)
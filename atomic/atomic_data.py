@@ -1,9 +1,19 @@
 import os
+import threading
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 import numpy as np
 from scipy.interpolate import RectBivariateSpline
 
 from .adf11 import Adf11
+from . import bspline
+from . import cache
+from . import manifest
+from . import patches
+from . import chebyshev
+from .memo import EvaluationCache
+from .plasma_state import PlasmaState, as_plasma_state
 
 datatype_abbrevs = {
         'ionisation' : 'scd',
@@ -15,44 +25,8 @@ datatype_abbrevs = {
         'cx_cross_coupling' : 'ccd'
 }
 
-# The system of registering element names, symbols, years,
-# and what datatypes they have could certainly be improved. However it works at the moment.
-# maybe with a pandas DataFrame?
-
-hydrogen_year = 96
-hydrogen_symbol = 'h'
-
-lithium_year = 96
-lithium_symbol = 'li'
-#it might be nice to get a prc data! doesn't seem to be available
-
-argon_year = 89
-argon_symbol = 'ar'
-argon_has_cx_power = True
-
-carbon_year = 96
-carbon_symbol = 'c'
-carbon_has_cx_power = True
-
-nitrogen_year = 96
-nitrogen_symbol = 'n'
-
-neon_year = 96
-neon_symbol = 'ne'
-
-beryllium_year = 96
-beryllium_symbol = 'be'
-
-boron_year = 89
-boron_symbol = 'b'
-boron_has_cx_power = True
-
-tungsten_year = 50 
-tungsten_symbol = 'w'
-
-# imaginary element, for testing purposes
-imaginarium_year = 0
-imaginarium_data = {}
+# The elements, years and datatypes that are available are found by
+# scanning adas_data, see manifest.py.
 
 def _make_filename(el_symbol, el_year, datatype):
     """_make_filename('ne', 96, 'scd') -> 'scd96_ne.dat' """
@@ -69,21 +43,21 @@ def _element_data_dict(el_symbol, el_year, has_cx_power=False):
         data_dict.pop('cx_power', None)
     return data_dict
 
-hydrogen_data = _element_data_dict(hydrogen_symbol,  hydrogen_year)
-lithium_data  = _element_data_dict(lithium_symbol,  lithium_year)
-argon_data    = _element_data_dict(argon_symbol,    argon_year,  argon_has_cx_power)
-carbon_data   = _element_data_dict(carbon_symbol,   carbon_year, carbon_has_cx_power)
-nitrogen_data = _element_data_dict(nitrogen_symbol, nitrogen_year)
-neon_data     = _element_data_dict(neon_symbol,     neon_year)
-beryllium_data= _element_data_dict(beryllium_symbol,beryllium_year)
-boron_data    = _element_data_dict(boron_symbol,    boron_year)
-tungsten_data = _element_data_dict(tungsten_symbol, tungsten_year)
-
-def _element_data(element):
+_index = None
+
+def _element_index():
+    """The ElementIndex of adas_data, rebuilt when files are added."""
+    global _index
+    if _index is None or not _index.is_current():
+        _index = manifest.ElementIndex.from_directory(_full_path(''))
+    return _index
+
+def _element_data(element, year=None):
     """Give a dictionary of ADF11 file names available for the given element.
 
     Args:
         element: a string like 'Li' or 'lithium'
+        year: the year of the data, like 96. Default is the latest available.
     Returns:
         a dictionary of file names.
 
@@ -91,30 +65,21 @@ def _element_data(element):
     'recombination' : 'acd96_li.dat',
     ...
     }
+    """
+    files = _element_index().files(element, year)
+    return _by_datatype(files)
+
+
+def _by_datatype(files):
+    """{'scd' : 'scd96_li.dat', ...} -> {'ionisation' : 'scd96_li.dat', ...}
 
-    This could presumably be made more general, especially with automated lookup of files.
+    Classes that are not in datatype_abbrevs are left out.
     """
-    e = element.lower()
-    if e in ['h', 'hydrogen']:
-        return hydrogen_data
-    elif e in ['li', 'lithium']:
-        return lithium_data
-    elif e in ['c', 'carbon']:
-        return carbon_data
-    elif e in ['ar', 'argon']:
-        return argon_data
-    elif e in ['ne', 'neon']:
-        return neon_data
-    elif e in ['n', 'nitrogen']:
-        return nitrogen_data
-    elif e in ['be', 'beryllium']:
-        return beryllium_data
-    elif e in ['b', 'boron']:
-        return boron_data
-    elif e in ['w', 'tungsten']:
-        return tungsten_data
-    else:
-        raise NotImplementedError('unknown element: %s' % element)
+    data = {}
+    for key, value in datatype_abbrevs.items():
+        if value in files:
+            data[key] = files[value]
+    return data
 
 
 def _full_path(file_):
@@ -127,12 +92,196 @@ def _full_path(file_):
     return os.path.realpath(os.path.join(module_path, '..', 'adas_data', file_))
 
 
+def _element_files(element, year=None):
+    """Give a dictionary of the full paths of the ADF11 files for
+    the given element, with keys like 'ionisation'.
+    """
+    files = {}
+    for key, value in _element_data(element, year).items():
+        files[key] = _full_path(value)
+    return files
+
+
+_executors = {
+    'thread' : ThreadPoolExecutor,
+    'process' : ProcessPoolExecutor,
+}
+
+def load_elements(elements, workers=None, executor='thread'):
+    """Load the AtomicData of several elements at once.
+
+    Every ADF11 file of every element is read (or fetched from the cache) as
+    a separate task in a pool, and the results are then put together into
+    one AtomicData per element.
+
+    Args:
+        elements (list): element names like ['c', 'ne', 'ar', 'w'].
+        workers (int): number of workers in the pool. The default is that of
+            concurrent.futures.
+        executor (str): 'thread' or 'process'. Reading from a warm cache is
+            mostly I/O, for which threads are enough; for a cold start with
+            many elements a process pool also parallelises the parsing.
+
+    Returns:
+        A list of AtomicData objects, in the order of elements.
+    """
+    if executor not in _executors:
+        raise ValueError('invalid executor: %s.' % executor)
+
+    element_files = [_element_files(e) for e in elements]
+    with _executors[executor](max_workers=workers) as pool:
+        futures = [{key : pool.submit(RateCoefficient.from_adf11, f)
+            for key, f in files.items()} for files in element_files]
+
+        atomic_data = []
+        for f in futures:
+            coefficients = {key : value.result() for key, value in f.items()}
+            atomic_data.append(AtomicData(coefficients))
+
+    return atomic_data
+
+
+class _Adf11Files(object):
+    """The default source of LazyCoefficients: adf11 files on disk."""
+    def rate_coefficient(self, name):
+        return RateCoefficient.from_adf11(name)
+
+    def header(self, name):
+        header = Adf11(name).read_header()
+        return header['charge'], header['element']
+
+
+class LazyCoefficients(MutableMapping):
+    """A dictionary of RateCoefficient objects that are read on first use.
+
+    It is made from a dictionary of adf11 filenames, with keys like
+    'ionisation'.  A file is only read (and its splines fitted) when its key is
+    looked up, so an AtomicData used only for CollRadEquilibrium never reads
+    the radiation files.
+
+    The files are read by source.rate_coefficient(name), and
+    source.header(name) gives their (nuclear_charge, element).  The default
+    source reads adf11 files from disk; a database.Database is another one.
+    The RateCoefficients are given the interpolation and the memo, see
+    RateCoefficient.  With copy_on_load they are copied as they are read, so
+    that their arrays are private and writeable whatever the source gives
+    (e.g. memory maps); copy() sets it for the files it leaves unread.
+
+    Items can be set and deleted like in a normal dict, unless the mapping
+    has been frozen (see freeze()).
+    """
+    def __init__(self, files, source=None, interpolation='spline'):
+        self._files = dict(files)
+        self._coeffs = {}
+        self._lock = threading.Lock()
+        self.source = source or _Adf11Files()
+        self.interpolation = interpolation
+        self.memo = None
+        self.read_only = False
+        self.copy_on_load = False
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key):
+        try:
+            return self._coeffs[key]
+        except KeyError:
+            filename = self._files[key]
+
+        with self._lock:
+            if key not in self._coeffs:
+                rc = self.source.rate_coefficient(filename)
+                if self.copy_on_load:
+                    rc = rc.copy()
+                rc.interpolation = self.interpolation
+                rc.memo = self.memo
+                if self.read_only:
+                    _set_read_only(rc)
+                self._coeffs[key] = rc
+            return self._coeffs[key]
+
+    def __setitem__(self, key, value):
+        self._check_writeable()
+        self._coeffs[key] = value
+        self._files.pop(key, None)
+
+    def __delitem__(self, key):
+        self._check_writeable()
+        if key not in self:
+            raise KeyError(key)
+        self._coeffs.pop(key, None)
+        self._files.pop(key, None)
+
+    def __iter__(self):
+        keys = list(self._files)
+        keys += [k for k in self._coeffs if k not in self._files]
+        return iter(keys)
+
+    def __len__(self):
+        return len(set(self._files) | set(self._coeffs))
+
+    def __repr__(self):
+        return '<%s loaded=%s not loaded=%s>' % (self.__class__.__name__,
+                sorted(self.loaded()),
+                sorted(set(self._files) - set(self._coeffs)))
+
+    def loaded(self):
+        """The keys of the RateCoefficients that have been read."""
+        return list(self._coeffs)
+
+    def header(self, key):
+        """Get (nuclear_charge, element) of one datatype without reading
+        the whole file.
+        """
+        if key in self._coeffs:
+            rc = self._coeffs[key]
+            return rc.nuclear_charge, rc.element
+        return self.source.header(self._files[key])
+
+    def copy(self):
+        """Copy the RateCoefficients read so far; the rest stay unread, and
+        are copied when they are read.  The copy shares the memo.
+        """
+        new = self.__class__({k : v for k, v in self._files.items()
+            if k not in self._coeffs}, self.source, self.interpolation)
+        new.memo = self.memo
+        new.copy_on_load = True
+        for key, value in self._coeffs.items():
+            new._coeffs[key] = value.copy()
+        return new
+
+    def freeze(self):
+        """Make the mapping and its RateCoefficients read-only."""
+        with self._lock:
+            self.read_only = True
+            for rc in self._coeffs.values():
+                _set_read_only(rc)
+
+    def _check_writeable(self):
+        if self.read_only:
+            raise TypeError('%s is read-only.' % self.__class__.__name__)
+
+
+def _set_read_only(rate_coefficient):
+    rc = rate_coefficient
+    for a in (rc.log_temperature, rc.log_density, rc.log_coeff):
+        a.flags.writeable = False
+
+
 class AtomicData(object):
     """
     Attributes:
         element (string): the element symbol, like 'Li' or 'C'
         coeffs (dict): a dictionary of RateCoefficient objects
-            with keys like 'ionisation'
+            with keys like 'ionisation'. For from_element this is a
+            LazyCoefficients, which reads each file on first use.
         nuclear_charge (int) : the element's Z
 
     """
@@ -152,6 +301,9 @@ class AtomicData(object):
 
         This is used in pec.py's TransitionPool.
         """
+        if isinstance(self.coeffs, LazyCoefficients):
+            return self.__class__(self.coeffs.copy())
+
         new_coeffs = {}
         #iteritems() is a method on dicts that gives an iterator
         for key, value in self.coeffs.items():
@@ -159,6 +311,38 @@ class AtomicData(object):
 
         return self.__class__(new_coeffs)
 
+    def memoize(self, max_bytes=2**27):
+        """Give all the RateCoefficients, including those not read yet, one
+        memo.EvaluationCache of max_bytes, and return it.
+        """
+        memo = EvaluationCache(max_bytes)
+        if isinstance(self.coeffs, LazyCoefficients):
+            self.coeffs.memo = memo
+            coeffs = [self.coeffs[key] for key in self.coeffs.loaded()]
+        else:
+            coeffs = self.coeffs.values()
+        for rc in coeffs:
+            rc.memo = memo
+        return memo
+
+    def share(self):
+        """Put the tables and splines into shared memory, for use by other
+        processes with AtomicData.attach. See shared.py.
+
+        Returns:
+            a picklable SharedAtomicData handle.
+        """
+        from .shared import share
+        return share(self)
+
+    @classmethod
+    def attach(cls, handle):
+        """Make an AtomicData from the shared memory of AtomicData.share,
+        without copying or refitting anything.
+        """
+        from .shared import attach
+        return attach(handle, cls)
+
     def _check_consistency(self):
         """Add the nuclear_charge and element attributes.
 
@@ -166,13 +350,21 @@ class AtomicData(object):
         nuclear_charge, say 3 for Li. Because a set() can only contain one copy
         of the number 3, testing for len == 1 ensures that all the files
         correspond to the same nucleus.
+
+        For LazyCoefficients only the header lines of the files are read.
         """
         nuclear_charge = set()
         element = set()
-        #coeff are the RateCoefficient objects
-        for coeff in list(self.coeffs.values()):
-            nuclear_charge.add(coeff.nuclear_charge)
-            element.add(coeff.element.lower())
+        if isinstance(self.coeffs, LazyCoefficients):
+            headers = [self.coeffs.header(key) for key in self.coeffs]
+        else:
+            #coeff are the RateCoefficient objects
+            headers = [(coeff.nuclear_charge, coeff.element)
+                    for coeff in self.coeffs.values()]
+
+        for charge, name in headers:
+            nuclear_charge.add(charge)
+            element.add(name.lower())
 
         assert len(nuclear_charge) == 1, 'inconsistent nuclear charge.'
         assert len(element) == 1, 'inconsistent element name.'
@@ -181,27 +373,54 @@ class AtomicData(object):
         self.element = element.pop()
 
     @classmethod
-    def from_element(cls, element):
+    def from_element(cls, element, datatypes=None, year=None,
+            interpolation='spline'):
         """This is a variant constructor.
         It returns an instance of the class for a given element,
         looking up data values automatically. This is in contrast to the regular constructor,
         which requires you to already have the coeffiecients.
 
+        The files are not read here: coeffs is a LazyCoefficients, which
+        reads each datatype when it is first used.
+
         Args:
             element: a string like 'Li' or 'lithium'
+            datatypes: optional list of datatypes to load, like
+                ['ionisation', 'recombination']. Default is all available.
+            year: the year of the data, like 96. Default is the latest
+                available in adas_data.
+            interpolation: how the RateCoefficients interpolate their
+                tables, see RateCoefficient.
         Returns:
             An AtomicData class
         """
-        # gets a list of filenames for 'ionisation', 'recombination', etc.
-        element_data = _element_data(element)
+        # gets a dict of filenames for 'ionisation', 'recombination', etc.
+        element_files = _element_files(element, year)
+        if datatypes is not None:
+            element_files = {k : v for k, v in element_files.items()
+                    if k in datatypes}
+
+        return cls(LazyCoefficients(element_files,
+            interpolation=interpolation))
 
-        coefficients = {}
-        for key, value in element_data.items():
-            fullfilename = _full_path(value)
-            if os.path.isfile(fullfilename):
-                coefficients[key] = RateCoefficient.from_adf11(fullfilename)
+    @classmethod
+    def from_database(cls, database, element, datatypes=None, year=None,
+            interpolation='spline'):
+        """Like from_element, but takes the data from a packed database.
+
+        Args:
+            database: a database.Database.
+            element: a string like 'Li' or 'lithium'
+            datatypes: optional list of datatypes to load.
+            year: the year of the data. Default is the latest in database.
+            interpolation: as for from_element.
+        """
+        element_files = _by_datatype(database.index.files(element, year))
+        if datatypes is not None:
+            element_files = {k : v for k, v in element_files.items()
+                    if k in datatypes}
 
-        return cls(coefficients)
+        return cls(LazyCoefficients(element_files, database, interpolation))
 
     def _make_element_initial_uppercase(self):
         e = self.element
@@ -222,31 +441,72 @@ class RateCoefficient(object):
         log_coeff: a 3D np.array with shape (Z, temp, dens)
         splines: list of scipy.interpolate.fitpack2.RectBivariateSpline
             The list has length Z and is interpolations of log_coeff.
+            If not given to the constructor this is a SplineList, which
+            fits the spline of a charge state the first time it is used.
+        interpolation (str): how points between the grid are evaluated.
+            'spline' (the default) uses the splines,
+            'patches' the same splines converted once into a table of
+            bicubic patches (see patches.py), which are faster to evaluate
+            and can be saved and memory mapped.  They agree to about 1e-12
+            in log10 of the coefficients.  'linear' interpolates log_coeff
+            bilinearly in log_temperature and log_density, which is faster
+            still, monotone and without overshoot, but less accurate.
+            'chebyshev' uses a chebyshev.ChebyshevSurrogate of the splines,
+            which is small and fast, with an error that is recorded in it.
+        memo (memo.EvaluationCache): None, or where the results of log10
+            and log10_all (and so __call__ and evaluate_all) are kept, to
+            be copied out when asked for at the same points again.  See
+            memoize().
 
     NOTE: With the addition of ionisation_potentials, the RateCoefficient 
     object is also storing tables of the ionisation potentials, even though
     it is not at all the same thing as a rate coefficient. This is a kludge
     for now.
     """
+    _interpolations = ('spline', 'patches', 'linear', 'chebyshev')
+    memo = None
+
     def __init__(self, nuclear_charge, element, log_temperature, log_density,
-            log_coeff, name=None):
+            log_coeff, name=None, splines=None, interpolation='spline'):
         self.nuclear_charge = nuclear_charge
         self.element = element
         self.adf11_file = name
+        self.interpolation = interpolation
 
         self.log_temperature = log_temperature
         self.log_density = log_density
         self.log_coeff = log_coeff
 
-        self._compute_interpolating_splines()
+        if splines is None:
+            self._compute_interpolating_splines()
+        else:
+            self.splines = splines
+
+    @property
+    def interpolation(self):
+        return self._interpolation
+
+    @interpolation.setter
+    def interpolation(self, value):
+        if value not in self._interpolations:
+            raise ValueError('unknown interpolation: %s.' % value)
+        self._interpolation = value
 
     @classmethod
     def from_adf11(cls, name):
         """Instantiate a RateCoefficient by reading in an adf11 file.
 
+        The parsed tables and fitted splines are kept in the on-disk cache
+        (see cache.py), so only the first call for a given file reads and
+        fits it.
+
         Args:
             name: The /full/name/of/an/adf11 file.
         """
+        cached = cache.load(name)
+        if cached is not None:
+            return cls._from_cache(name, cached)
+
         adf11_data = Adf11(name).read()
         nuclear_charge = adf11_data['charge']
         element = adf11_data['element']
@@ -258,45 +518,109 @@ class RateCoefficient(object):
         log_density = adf11_data['log_density']
         log_coeff = adf11_data['log_coeff']
 
-        return cls(nuclear_charge, element, log_temperature, log_density,
+        rc = cls(nuclear_charge, element, log_temperature, log_density,
                 log_coeff, name=filename)
+        cache.store(name, rc)
+        return rc
+
+    @classmethod
+    def _from_cache(cls, name, cached):
+        tck = (cached['knots_temperature'], cached['knots_density'],
+                cached['spline_coeffs'])
+        splines = SplineList(cached['charge'], cached['log_temperature'],
+                cached['log_density'], cached['log_coeff'], tck=tck)
+
+        return cls(cached['charge'], cached['element'],
+                cached['log_temperature'], cached['log_density'],
+                cached['log_coeff'], name=name, splines=splines)
+
+    @classmethod
+    def from_database(cls, database, name):
+        """Instantiate a RateCoefficient from a packed database.
+
+        Args:
+            database: a database.Database.
+            name: the name of an adf11 file in it, like 'scd96_li.dat'.
+        """
+        return cls._from_cache(name, database.adf11(name))
+
+    def spline_arrays(self):
+        """The knots and coefficients of all the splines, as a dict with keys
+        'knots_temperature', 'knots_density' and 'spline_coeffs'.
+
+        This is the form in which they are stored by cache.py and
+        database.py.
+        """
+        tx, ty, coeffs = self._all_tck()
+        return {'knots_temperature' : tx, 'knots_density' : ty,
+                'spline_coeffs' : coeffs}
+
+    def _all_tck(self):
+        """(knots_temperature, knots_density, coeffs), where coeffs[k] are
+        the spline coefficients of charge state k.
+        """
+        if isinstance(self.splines, SplineList):
+            return self.splines.all_tck()
+        tx, ty = self.splines[0].tck[:2]
+        return tx, ty, np.array([s.tck[2] for s in self.splines])
 
     def copy(self):
         log_temperature = self.log_temperature.copy()
         log_density = self.log_density.copy()
         log_coeff = self.log_coeff.copy()
+
+        # the splines built so far are valid for the copied tables too.
+        splines = None
+        if isinstance(self.splines, SplineList):
+            splines = self.splines.copy(log_temperature, log_density,
+                    log_coeff)
+
         cls = self.__class__(self.nuclear_charge, self.element, log_temperature,
-                log_density, log_coeff, self.adf11_file)
+                log_density, log_coeff, self.adf11_file, splines=splines,
+                interpolation=self.interpolation)
+        cls.memo = self.memo
+        # the patches are never written to, so they can be shared.
+        if hasattr(self, '_patch_tables'):
+            cls._patch_tables = dict(self._patch_tables)
+        if hasattr(self, '_surrogate'):
+            cls._surrogate = self._surrogate
         return cls
 
     def _compute_interpolating_splines(self):
-        self.splines = []
         # if we want to implement metastables there are more sets of coefficients
         # than just for nuclear charge. This should be TODO'd.
         # Also for stuff like ecd: ionisation potentials there is nuclear_charge + 1
-        for k in range(self.nuclear_charge):
-            x = self.log_temperature
-            y = self.log_density
-            z = self.log_coeff[k]
-            self.splines.append(RectBivariateSpline(x, y, z))
+        self.splines = SplineList(self.nuclear_charge, self.log_temperature,
+                self.log_density, self.log_coeff)
 
-    def __call__(self, k, Te, ne):
+    def built_stages(self):
+        """List the charge states k whose spline has been built so far."""
+        if isinstance(self.splines, SplineList):
+            return self.splines.built()
+        return list(range(len(self.splines)))
+
+    def __call__(self, k, Te, ne=None, out=None, workspace=None, grid=False):
         """Evaulate the ionisation/recombination coefficients of
         k'th atomic state at a given temperature and density.
 
         Args:
             k (int): Ionising or recombined ion stage,
                 between 0 and k=Z-1, where Z is atomic number.
-            Te (array_like): Temperature in [eV].
-            ne (array_like): Density in [m-3].
+            Te (array_like or PlasmaState): Temperature in [eV].
+            ne (array_like): Density in [m-3]; None with a PlasmaState.
+            out (np.array): optional array for the result.
+            workspace (Workspace): optional scratch arrays. With a
+                PlasmaState, out and workspace nothing is allocated.
+            grid (bool): evaluate on the grid of all Te with all ne, for
+                1D arrays Te and ne.  See evaluate_all.
 
         Returns:
             c (array_like): Rate coefficent in [m3/s].
         """
-        c = self.log10(k, Te, ne)
-        return np.power(10, c)
+        c = self.log10(k, Te, ne, out=out, workspace=workspace, grid=grid)
+        return np.power(10, c, out=out)
 
-    def log10(self, k, Te, ne):
+    def log10(self, k, Te, ne=None, out=None, workspace=None, grid=False):
         """Evaulate the logarithm of ionisation/recombination coefficients of
         k'th atomic state at a given temperature and density.
 
@@ -310,20 +634,292 @@ class RateCoefficient(object):
         Args:
             k (int): Ionising or recombined ion stage.
                 Between 0 and k=Z-1, where Z is atomic number.
-            Te (array_like): Temperature in [eV].
-            ne (array_like): Density in [m-3].
+            Te (array_like or PlasmaState): Temperature in [eV].
+            ne (array_like): Density in [m-3]; None with a PlasmaState.
+            out (np.array): optional array for the result.
+            workspace (Workspace): optional scratch arrays.
+            grid (bool): evaluate on the grid of all Te with all ne, for
+                1D arrays Te and ne.  See evaluate_all.
 
         Returns:
             c (array_like): log10(rate coefficent in [m3/s])
         """
+        if grid:
+            k = range(len(self.splines))[k]
+            if out is not None:
+                out = out[np.newaxis]
+            return self._log10_grid(Te, ne, slice(k, k + 1), out)[0]
+        if self.memo is not None:
+            k = range(len(self.splines))[k]
+            return self._memoized(k, Te, ne, out, lambda Te, ne:
+                    self._log10(k, Te, ne, workspace=workspace))
+        return self._log10(k, Te, ne, out, workspace)
+
+    def _log10(self, k, Te, ne=None, out=None, workspace=None):
+        if isinstance(Te, PlasmaState) or self.interpolation != 'spline':
+            interpolant = self.interpolant()
+            k = range(len(interpolant))[k]
+            weights = as_plasma_state(Te, ne).weights(interpolant)
+            if out is not None:
+                out = out[np.newaxis]
+            return interpolant.evaluate(weights, slice(k, k + 1), out=out,
+                    workspace=workspace)[0]
 
         Te, ne = np.broadcast_arrays(Te, ne)
         log_temperature = np.log10(Te)
         log_density = np.log10(ne)
 
         c = self.splines[k](log_temperature, log_density, grid=False)
+        if out is not None:
+            out[...] = c
+            return out
+        return c
+
+    def evaluate_all(self, Te, ne=None, out=None, workspace=None,
+            grid=False):
+        """Evaluate the coefficients of all charge states at once.
+
+        This is the same as np.array([self(k, Te, ne) for k in range(Z)]),
+        but the logarithms of Te and ne and the spline basis at the points
+        are only computed once, since all charge states share a grid.
+        With a PlasmaState, they are computed once for all coefficients
+        on the same grid.
+
+        Args:
+            Te (array_like or PlasmaState): Temperature in [eV].
+            ne (array_like): Density in [m-3]; None with a PlasmaState.
+            out (np.array): optional array for the result.
+            workspace (Workspace): optional scratch arrays. With a
+                PlasmaState, out and workspace nothing is allocated.
+            grid (bool): evaluate on the grid of all Te with all ne, for
+                1D arrays Te and ne, like a table for plots.  The
+                coefficients are then separable products of a basis of Te,
+                one of ne and the interpolant's coefficients, which is much
+                cheaper than evaluating len(Te) * len(ne) points.  These
+                results are not memoized.
+
+        Returns:
+            c (np.array): Rate coefficients in [m3/s], of shape
+                (nuclear_charge,) + the broadcast shape of Te and ne, or
+                (nuclear_charge, len(Te), len(ne)) with grid.
+        """
+        c = self.log10_all(Te, ne, out=out, workspace=workspace, grid=grid)
+        return np.power(10, c, out=c)
+
+    def log10_all(self, Te, ne=None, out=None, workspace=None, grid=False):
+        """Like evaluate_all, but the logarithm of the coefficients."""
+        if grid:
+            return self._log10_grid(Te, ne, slice(None), out)
+        if self.memo is not None:
+            return self._memoized('all', Te, ne, out, lambda Te, ne:
+                    self._log10_all(Te, ne, workspace=workspace))
+        return self._log10_all(Te, ne, out, workspace)
+
+    def _log10_all(self, Te, ne=None, out=None, workspace=None):
+        interpolant = self.interpolant()
+        weights = as_plasma_state(Te, ne).weights(interpolant)
+        return interpolant.evaluate(weights, out=out, workspace=workspace)
+
+    def _log10_grid(self, Te, ne, stages, out):
+        if ne is None or isinstance(Te, PlasmaState):
+            raise TypeError('grid=True needs temperature and density axes.')
+        Te, ne = np.asarray(Te, dtype=np.float64), np.asarray(ne,
+                dtype=np.float64)
+        if Te.ndim != 1 or ne.ndim != 1:
+            raise ValueError('grid=True needs 1D temperature and density.')
+        interpolant = self.interpolant()
+        weights = interpolant.grid_weights(np.log10(Te), np.log10(ne))
+        return interpolant.evaluate_grid(weights, stages, out=out)
+
+    def derivative(self, k, Te, ne=None, dTe=1, dne=0):
+        """The derivative of the coefficient of charge state k with respect
+        to temperature and/or density.
+
+        It is the analytic derivative of the interpolant of log10 of the
+        coefficients, in log10 Te and log10 ne, converted to linear units;
+        e.g. dc/dTe = c d(log10 c)/d(log10 Te) / Te.  Outside the grid, where
+        the coefficients are held at their edge values, it is zero.
+
+        Args:
+            k (int): the charge state.
+            Te (array_like or PlasmaState): Temperature in [eV].
+            ne (array_like): Density in [m-3]; None with a PlasmaState.
+            dTe, dne (int): the order, 0 or 1, of the derivative with
+                respect to Te and ne.
+
+        Returns:
+            np.array: e.g. dc/dTe in [m3/s/eV], or d2c/dTe dne.
+        """
+        k = range(len(self.splines))[k]
+        return self._derivative(as_plasma_state(Te, ne), slice(k, k + 1),
+                dTe, dne)[0]
+
+    def derivative_all(self, Te, ne=None, dTe=1, dne=0):
+        """Like derivative, for all charge states at once, as evaluate_all.
+        """
+        return self._derivative(as_plasma_state(Te, ne), slice(None), dTe,
+                dne)
+
+    def log10_derivative_all(self, Te, ne=None, dTe=1, dne=0):
+        """The derivatives of log10 of the coefficients of all charge states
+        with respect to log10(Te) and/or log10(ne), of shape
+        (nuclear_charge,) + the shape of the points.
+        """
+        _check_derivative(dTe, dne)
+        interpolant = self.interpolant()
+        weights = as_plasma_state(Te, ne).weights(interpolant, (dTe, dne))
+        return interpolant.evaluate(weights)
+
+    def _derivative(self, state, stages, dTe, dne):
+        _check_derivative(dTe, dne)
+        interpolant = self.interpolant()
+
+        def log10(derivative):
+            weights = state.weights(interpolant, derivative)
+            return interpolant.evaluate(weights, stages)
+
+        c = np.power(10, log10((0, 0)))
+        if dTe and dne:
+            fx, fy, fxy = log10((1, 0)), log10((0, 1)), log10((1, 1))
+            c *= (fx * fy + fxy / np.log(10)) / (state.temperature
+                    * state.density)
+        elif dTe:
+            c *= log10((1, 0)) / state.temperature
+        elif dne:
+            c *= log10((0, 1)) / state.density
         return c
 
+    def memoize(self, memo=None, max_bytes=2**27):
+        """Keep the results of evaluations in a memo, a
+        memo.EvaluationCache, or a new one of max_bytes.  Returns it.
+
+        rc.memo = None switches it off again.
+        """
+        if memo is None:
+            memo = EvaluationCache(max_bytes)
+        self.memo = memo
+        return memo
+
+    def _memoized(self, what, Te, ne, out, compute):
+        """The result of compute(Te, ne) from the memo, or computed and put
+        there, copied into out.
+        """
+        state = as_plasma_state(Te, ne)
+        token = self.__dict__.get('_memo_token')
+        if token is None:
+            # tells this RateCoefficient apart from others sharing the memo
+            token = self._memo_token = object()
+        key = token, self.interpolation, what, state.fingerprint
+
+        c = self.memo.get(key)
+        if c is None:
+            # with 'spline' the arrays are evaluated as without a memo.
+            if self.interpolation != 'spline':
+                Te, ne = state, None
+            c = compute(Te, ne)
+            self.memo.put(key, c)
+        if out is None:
+            return c.copy()
+        out[...] = c
+        return out
+
+    def _forget_memo(self):
+        """Stop finding the results of the old interpolant in the memo."""
+        self.__dict__.pop('_memo_token', None)
+
+    def interpolant(self):
+        """The interpolant of all charge states for self.interpolation:
+        a bspline.Splines, a patches.PatchTable or a
+        chebyshev.ChebyshevSurrogate.
+        """
+        if self.interpolation == 'spline':
+            return bspline.Splines(*self._all_tck())
+        if self.interpolation == 'chebyshev':
+            return self.surrogate()
+        return self.patch_table(self.interpolation)
+
+    def patch_table(self, interpolation='patches'):
+        """The coefficients as a patches.PatchTable: the bicubic patches of
+        the splines for 'patches', bilinear ones for 'linear'.
+
+        It is made on the first call, and then kept.
+        """
+        if not hasattr(self, '_patch_tables'):
+            self._patch_tables = {}
+        table = self._patch_tables.get(interpolation)
+        if table is None:
+            x, y = self.log_temperature, self.log_density
+            if interpolation == 'linear':
+                z = self.log_coeff[:len(self.splines)]
+                table = patches.PatchTable(x, y, patches.bilinear_table(z))
+            else:
+                table = patches.PatchTable.from_splines(x, y,
+                        *self._all_tck())
+            self._patch_tables[interpolation] = table
+        return table
+
+    def use_patch_table(self, table):
+        """Evaluate with a PatchTable made before, e.g. one memory mapped
+        with PatchTable.load, instead of computing it.  Its interpolation
+        is 'patches' or 'linear', after its degree.
+        """
+        if not (np.array_equal(table.log_temperature, self.log_temperature)
+                and np.array_equal(table.log_density, self.log_density)
+                and len(table.table) == len(self.splines)):
+            raise ValueError('the patch table is not for this grid.')
+        interpolation = 'linear' if table.degree == 1 else 'patches'
+        if not hasattr(self, '_patch_tables'):
+            self._patch_tables = {}
+        self._patch_tables[interpolation] = table
+        self.interpolation = interpolation
+        self._forget_memo()
+
+    def surrogate(self):
+        """The chebyshev.ChebyshevSurrogate used for 'chebyshev'.
+
+        Unless one was given to use_surrogate, it is fitted with the
+        defaults of chebyshev.fit on the first call, and then kept.
+        """
+        surrogate = getattr(self, '_surrogate', None)
+        if surrogate is None:
+            surrogate = chebyshev.fit(self)
+            self._surrogate = surrogate
+        return surrogate
+
+    def use_surrogate(self, surrogate):
+        """Evaluate with a ChebyshevSurrogate, e.g. one fitted with other
+        settings than the defaults, or loaded from a file.
+        """
+        x, y = self.log_temperature, self.log_density
+        if not (np.array_equal(surrogate.log_temperature_range,
+                    [x[0], x[-1]])
+                and np.array_equal(surrogate.log_density_range, [y[0], y[-1]])
+                and len(surrogate) == len(self.splines)):
+            raise ValueError('the surrogate is not for this grid.')
+        self._surrogate = surrogate
+        self.interpolation = 'chebyshev'
+        self._forget_memo()
+
+    def scalar_evaluator(self):
+        """A patches.ScalarEvaluator of the coefficients, which is much
+        faster than __call__ for one point at a time.  It evaluates the
+        bilinear patches for interpolation='linear' and the bicubic ones,
+        which agree with the splines, otherwise.
+
+        It is made on the first call, and then kept for its patch table.
+        """
+        if self.interpolation == 'chebyshev':
+            raise ValueError('no scalar evaluator for chebyshev '
+                    'interpolation.')
+        table = self.patch_table('linear' if self.interpolation == 'linear'
+                else 'patches')
+        kept = getattr(self, '_scalar_evaluator', None)
+        if kept is None or kept[0] is not table:
+            kept = table, patches.ScalarEvaluator(self.log_temperature,
+                    self.log_density, table.table)
+            self._scalar_evaluator = kept
+        return kept[1]
+
     @property
     def temperature_grid(self):
         """Get a np.array of temperatures in [eV]."""
@@ -334,15 +930,128 @@ class RateCoefficient(object):
         """Get an np.array of densities in [m^3]."""
         return 10**(self.log_density)
 
+def _check_derivative(dTe, dne):
+    if dTe not in (0, 1) or dne not in (0, 1):
+        raise ValueError('only first derivatives in Te and ne are known.')
+
+
+class SplineList(object):
+    """The splines of a RateCoefficient, built the first time each is used.
+
+    It behaves like a list of RectBivariateSpline of length nuclear_charge,
+    but splines[k] is only fitted (or, with tck given, rebuilt from stored
+    knots and coefficients) when it is first looked up, and then kept.
+    For a heavy element usually only a few charge states are ever needed.
+
+    Attributes:
+        tck: None, or (knots_temperature, knots_density, coeffs) where
+            coeffs[k] are the spline coefficients of charge state k.
+    """
+    def __init__(self, nuclear_charge, log_temperature, log_density,
+            log_coeff, tck=None):
+        self.log_temperature = log_temperature
+        self.log_density = log_density
+        self.log_coeff = log_coeff
+        self.tck = tck
+        self._splines = [None] * nuclear_charge
+
+    def __getitem__(self, k):
+        k = range(len(self._splines))[k] # handles negative k, IndexError
+        spline = self._splines[k]
+        if spline is None:
+            spline = self._build(k)
+            self._splines[k] = spline
+        return spline
+
+    def __len__(self):
+        return len(self._splines)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def all_tck(self):
+        """The knots and the coefficients of all charge states, as in tck.
+
+        If they are not known yet, the splines of all charge states are
+        fitted at once (see bspline.fit), and kept in tck.
+        """
+        if self.tck is None:
+            self.tck = bspline.fit(self.log_temperature, self.log_density,
+                    self.log_coeff[:len(self)])
+        return self.tck
+
+    def built(self):
+        """List the charge states whose spline has been built."""
+        return [k for k, s in enumerate(self._splines) if s is not None]
+
+    def copy(self, log_temperature, log_density, log_coeff):
+        """A new SplineList for copies of the tables, that keeps the splines
+        built so far.
+        """
+        new = self.__class__(len(self), log_temperature, log_density,
+                log_coeff, self.tck)
+        new._splines = list(self._splines)
+        return new
+
+    def _build(self, k):
+        if self.tck is not None:
+            tx, ty, coeffs = self.tck
+            return _spline_from_tck(tx, ty, coeffs[k])
+
+        x = self.log_temperature
+        y = self.log_density
+        z = self.log_coeff[k]
+        return RectBivariateSpline(x, y, z)
+
+
+def _spline_from_tck(tx, ty, c, kx=3, ky=3):
+    """Rebuild a RectBivariateSpline from its knots and coefficients.
+
+    This skips the fit done by RectBivariateSpline's constructor.
+    """
+    spline = RectBivariateSpline.__new__(RectBivariateSpline)
+    spline.tck = tx, ty, c
+    spline.degrees = kx, ky
+    spline.fp = 0.
+    return spline
+
+
 from sys import float_info
 class ZeroCoefficient(RateCoefficient):
     """A subclass of RateCoefficient"""
-    def __init__(self):
-        pass
+    def __init__(self, nuclear_charge=None):
+        self.nuclear_charge = nuclear_charge
 
-    def __call__(self, k, Te, ne):
-        Te, ne = np.broadcast_arrays(Te, ne)
-        return np.full_like(Te, float_info.min, dtype=np.double)
+    def __call__(self, k, Te, ne=None, out=None, workspace=None, grid=False):
+        return self._fill(self._shape(Te, ne, grid), out)
+
+    def evaluate_all(self, Te, ne=None, out=None, workspace=None,
+            grid=False):
+        shape = (self.nuclear_charge,) + self._shape(Te, ne, grid)
+        return self._fill(shape, out)
+
+    def log10_all(self, Te, ne=None, out=None, workspace=None, grid=False):
+        out = self.evaluate_all(Te, ne, out, grid=grid)
+        out.fill(np.log10(float_info.min))
+        return out
+
+    def _shape(self, Te, ne, grid):
+        if grid:
+            return len(Te), len(ne)
+        return as_plasma_state(Te, ne).shape
+
+    def derivative(self, k, Te, ne=None, dTe=1, dne=0):
+        return np.zeros(as_plasma_state(Te, ne).shape)
+
+    def derivative_all(self, Te, ne=None, dTe=1, dne=0):
+        return np.zeros((self.nuclear_charge,) + as_plasma_state(Te, ne).shape)
+
+    def _fill(self, shape, out):
+        if out is None:
+            out = np.empty(shape)
+        out.fill(float_info.min)
+        return out
 
 
 if __name__ == '__main__':
@@ -0,0 +1,286 @@
+"""
+Bicubic B-splines on the knots that RectBivariateSpline uses.
+
+All charge states of a RateCoefficient are tabulated on the same
+(log_temperature, log_density) grid, so their interpolating splines share
+their knots and differ only in their coefficients.  Here the B-spline basis
+is evaluated once for a set of points and contracted with the coefficients
+of every charge state at once, and the coefficients of all charge states are
+fitted with two small linear solves instead of one FITPACK call per state.
+
+The coefficients of a spline are stored the way FITPACK stores them: for
+knots tx, ty the coefficient of B_i(x) B_j(y) is c[i * (len(ty) - 4) + j].
+As in FITPACK, points outside the knots are moved onto the boundary.
+
+Splines bundles the knots and coefficients with weights() for use as the
+interpolant of a RateCoefficient; patches.PatchTable is the other one.
+
+On a grid of points, all temperatures x[i] with all densities y[j], the
+tensor product structure makes the splines a product of three matrices,
+    z[i, j] = sum(Bx[i, a] C[a, b] By[j, b])
+with the basis matrices Bx and By of the two axes (which have four non-zero
+entries per row) and C = c.reshape(len(tx) - 4, len(ty) - 4); see
+grid_weights() and contract_grid().
+"""
+import numpy as np
+
+from .workspace import scratch
+
+degree = 3
+
+
+def knots(x):
+    """The knots of the cubic spline interpolating data given at x.
+
+    These are the knots RectBivariateSpline picks for s=0: x[0] and x[-1]
+    four times each and x[2:-2] in between.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    return np.concatenate([[x[0]] * (degree + 1), x[2:-2],
+        [x[-1]] * (degree + 1)])
+
+
+def locate(t, x):
+    """Find the knot interval t[l] <= x < t[l+1] of every x.
+
+    Returns:
+        (x, l): x moved inside [t[3], t[-4]], and the intervals l.
+    """
+    n = len(t)
+    x = np.clip(x, t[degree], t[n - degree - 1])
+    l = np.searchsorted(t, x, side='right') - 1
+    l = np.clip(l, degree, n - degree - 2)
+    return x, l
+
+
+def basis(t, x, l, derivative=0):
+    """The B-splines of degree 3 that are non-zero at x, or their first
+    derivatives.
+
+    Args:
+        t (np.array): the knots.
+        x (np.array): points, inside [t[3], t[-4]].
+        l (np.array): their knot intervals, from locate().
+        derivative (int): 0 or 1.
+
+    Returns:
+        b (np.array): shape (4,) + x.shape, b[r] is B_{l-3+r}(x), or its
+            derivative.
+    """
+    if derivative == 0:
+        return _basis(t, x, l, degree)
+
+    # B'_{i,3} = 3 (B_{i,2} / (t[i+3] - t[i]) - B_{i+1,2} / (t[i+4] - t[i+1]))
+    b2 = _basis(t, x, l, degree - 1)
+    d = np.zeros((degree + 1,) + np.shape(x))
+    for r in range(degree + 1):
+        if r > 0:
+            d[r] += degree * b2[r - 1] / (t[l + r] - t[l - degree + r])
+        if r < degree:
+            d[r] -= degree * b2[r] / (t[l + 1 + r] - t[l - degree + 1 + r])
+    return d
+
+
+def _basis(t, x, l, p):
+    """The p + 1 B-splines of degree p that are non-zero at x."""
+    b = np.zeros((p + 1,) + np.shape(x))
+    b[0] = 1.
+    left = [None] + [x - t[l + 1 - j] for j in range(1, p + 1)]
+    right = [None] + [t[l + j] - x for j in range(1, p + 1)]
+    for j in range(1, p + 1):
+        saved = 0.
+        for r in range(j):
+            temp = b[r] / (right[r + 1] + left[j - r])
+            b[r] = saved + right[r + 1] * temp
+            saved = left[j - r] * temp
+        b[j] = saved
+    return b
+
+
+def collocation_matrix(t, x):
+    """The matrix A with A[i, j] = B_j(x[i])."""
+    x, l = locate(t, np.asarray(x, dtype=np.float64))
+    b = basis(t, x, l)
+    A = np.zeros((len(x), len(t) - degree - 1))
+    for r in range(degree + 1):
+        A[np.arange(len(x)), l - degree + r] = b[r]
+    return A
+
+
+def fit(x, y, z):
+    """Interpolate a stack of tables, all given on the grid (x, y).
+
+    Args:
+        x (np.array): shape (nx,), increasing.
+        y (np.array): shape (ny,), increasing.
+        z (np.array): shape (nz, nx, ny).
+
+    Returns:
+        (tx, ty, c): the knots and, with shape (nz, nx * ny), the spline
+            coefficients of every table.  The splines are the same as
+            those of RectBivariateSpline(x, y, z[i]).
+    """
+    tx, ty = knots(x), knots(y)
+    z = np.asarray(z, dtype=np.float64)
+    c = np.linalg.solve(collocation_matrix(tx, x), z)
+    c = np.linalg.solve(collocation_matrix(ty, y), c.transpose(0, 2, 1))
+    c = c.transpose(0, 2, 1)
+    return tx, ty, c.reshape(len(z), -1)
+
+
+def weights(tx, ty, x, y, derivative=(0, 0)):
+    """The tensor product basis at the points (x, y).
+
+    Args:
+        tx, ty (np.array): the knots.
+        x, y (np.array): the points, of the same shape.
+        derivative (tuple): the orders (0 or 1) of the derivative in x and
+            y.  Outside the knots, where the splines are constant, the
+            derivatives are zero.
+
+    Returns:
+        (index, w): each of shape (16,) + x.shape.  The value of a spline
+            with coefficients c at the points is sum(w * c[index], axis=0).
+    """
+    xc, lx = locate(tx, x)
+    yc, ly = locate(ty, y)
+    bx = basis(tx, xc, lx, derivative[0])
+    by = basis(ty, yc, ly, derivative[1])
+    if derivative[0]:
+        bx *= (xc == x)
+    if derivative[1]:
+        by *= (yc == y)
+
+    ny = len(ty) - degree - 1
+    index = np.empty((16,) + np.shape(xc), dtype=np.intp)
+    w = np.empty((16,) + np.shape(xc))
+    for i in range(degree + 1):
+        for j in range(degree + 1):
+            index[4 * i + j] = (lx - degree + i) * ny + (ly - degree + j)
+            w[4 * i + j] = bx[i] * by[j]
+    return index, w
+
+
+def contract(c, index, w, out=None, work=None):
+    """Evaluate the splines with coefficients c, at the points of weights().
+
+    Args:
+        c (np.array): shape (nz, ncoeffs), coefficients of nz splines.
+        index, w: from weights().
+        out (np.array): optional array for the result.
+        work (np.array): optional scratch array of the same shape.
+
+    Returns:
+        np.array of shape (nz,) + the shape of the points.
+    """
+    shape = (len(c),) + index.shape[1:]
+    if out is None:
+        out = np.empty(shape)
+    if work is None:
+        work = np.empty(shape)
+
+    np.take(c, index[0], axis=1, out=out, mode='clip')
+    out *= w[0]
+    for index_j, w_j in zip(index[1:], w[1:]):
+        np.take(c, index_j, axis=1, out=work, mode='clip')
+        work *= w_j
+        out += work
+    return out
+
+
+def grid_weights(tx, ty, x, y):
+    """The basis matrices (Bx, By) of the axes x and y of a grid.
+
+    Bx has shape (len(x), len(tx) - 4), and Bx[i, a] is B_a(x[i]); By
+    likewise.
+    """
+    xc, lx = locate(tx, np.asarray(x, dtype=np.float64))
+    yc, ly = locate(ty, np.asarray(y, dtype=np.float64))
+    return (dense(lx - degree, basis(tx, xc, lx), len(tx) - degree - 1),
+            dense(ly - degree, basis(ty, yc, ly), len(ty) - degree - 1))
+
+
+def dense(first, b, n):
+    """The matrix B of shape (len(first), n) with B[i, first[i] + r] = b[r, i]
+    and zeros elsewhere.
+    """
+    B = np.zeros((len(first), n))
+    rows = np.arange(len(first))
+    for r in range(len(b)):
+        B[rows, first + r] = b[r]
+    return B
+
+
+def contract_grid(C, Bx, By, out=None):
+    """sum(Bx[i, a] C[z, a, b] By[j, b]) over a and b, of shape
+    (len(C), len(Bx), len(By)).
+    """
+    return np.matmul(np.matmul(Bx, C), By.T, out=out)
+
+
+class Splines(object):
+    """The splines of all charge states, as an interpolant.
+
+    An interpolant has a key that is the same for interpolants on the same
+    grid, weights(x, y, derivative) that computes what it needs to know
+    about the points (x, y) to evaluate it, or its derivative of the given
+    orders in x and y, and evaluate() that evaluates it at them.
+    PlasmaState keeps the weights per key and derivative.  On a grid,
+    grid_weights(x, y) of the two axes and evaluate_grid() do the same.
+
+    Args:
+        tx, ty, c: the knots and coefficients, like from fit().
+    """
+    def __init__(self, tx, ty, c):
+        self.knots_temperature = tx
+        self.knots_density = ty
+        self.coeffs = c
+
+    def __len__(self):
+        return len(self.coeffs)
+
+    @property
+    def key(self):
+        return ('bspline', self.knots_temperature.tobytes(),
+                self.knots_density.tobytes())
+
+    def weights(self, x, y, derivative=(0, 0)):
+        return weights(self.knots_temperature, self.knots_density, x, y,
+                derivative)
+
+    def evaluate(self, weights, stages=slice(None), out=None,
+            workspace=None):
+        """The splines of the charge states in stages at the points.
+
+        Args:
+            weights: from self.weights().
+            stages (slice): the charge states.
+            out (np.array): optional array for the result.
+            workspace (Workspace): optional scratch arrays.
+
+        Returns:
+            np.array of shape (number of stages,) + the shape of the points.
+        """
+        index, w = weights
+        c = self.coeffs[stages]
+        work = scratch(workspace, 'Splines.evaluate',
+                (len(c),) + index.shape[1:])
+        return contract(c, index, w, out=out, work=work)
+
+    def grid_weights(self, x, y):
+        return grid_weights(self.knots_temperature, self.knots_density, x, y)
+
+    def evaluate_grid(self, weights, stages=slice(None), out=None):
+        """The splines of the charge states in stages on a grid.
+
+        Args:
+            weights: from self.grid_weights(x, y).
+            stages (slice): the charge states.
+            out (np.array): optional array for the result.
+
+        Returns:
+            np.array of shape (number of stages, len(x), len(y)).
+        """
+        Bx, By = weights
+        C = self.coeffs[stages].reshape(-1, Bx.shape[1], By.shape[1])
+        return contract_grid(C, Bx, By, out=out)
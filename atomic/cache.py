@@ -0,0 +1,156 @@
+"""
+Persistent cache of parsed adf11 files and their fitted splines.
+
+The same directory also holds the index of the data directory written by
+manifest.py.
+
+Reading an adf11 file and fitting a RectBivariateSpline for every charge state
+is the main cost of AtomicData.from_element.  The result is stored in
+`directory` (by default adas_cache, next to adas_data) in the format of
+atomic/storage.py, so a later run can memory map the tables and the spline
+knots and coefficients instead of parsing and fitting again.  The maps are
+copy-on-write, so the arrays can be changed like those of a parsed file
+without changing the cache.
+
+Each entry records the size, modification time and sha1 hash of the source
+file.  The entry is used if the size and modification time are unchanged;
+otherwise the file is hashed, and unless the hash is unchanged too the
+entry is ignored and rewritten.  If only the modification time has changed
+(e.g. by a checkout or a copy), the new time is recorded in the entry, so
+that the file is hashed only once.
+
+Set the environment variable ATOMIC_CACHE_DIR to move the cache, or to an
+empty string to switch it off.  Setting `directory = None` at runtime does the
+same.
+"""
+import hashlib
+import os
+
+from . import storage
+
+# bump this when the layout of a cache entry changes.
+_version = 1
+
+
+def _default_directory():
+    module_path = os.path.dirname(os.path.realpath(__file__))
+    return os.path.realpath(os.path.join(module_path, '..', 'adas_cache'))
+
+directory = os.environ.get('ATOMIC_CACHE_DIR', _default_directory()) or None
+
+
+def fingerprint(name):
+    """Size, modification time and sha1 hash of a file."""
+    st = os.stat(name)
+    return {'size' : st.st_size, 'mtime_ns' : st.st_mtime_ns,
+            'sha1' : _sha1(name)}
+
+
+def _sha1(name):
+    with open(name, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _unchanged(recorded, name):
+    """Whether the file name matches the fingerprint recorded, hashing it
+    only if its size is the same but its modification time is not.
+    """
+    if not isinstance(recorded, dict):
+        return False
+    st = os.stat(name)
+    if recorded.get('size') != st.st_size:
+        return False
+    if recorded.get('mtime_ns') == st.st_mtime_ns:
+        return True
+    return recorded.get('sha1') == _sha1(name)
+
+
+def entry_name(name):
+    """The cache file for the source file name.
+
+    The path is hashed in, so equally named files from different directories
+    do not collide.
+    """
+    path = os.path.realpath(name)
+    key = hashlib.sha1(path.encode()).hexdigest()[:12]
+    return os.path.join(directory, '%s-%s.bin' % (os.path.basename(path), key))
+
+
+def load(name):
+    """Look up the cached contents of an adf11 file.
+
+    Returns:
+        None if there is no valid entry, otherwise a dict with keys
+        'charge', 'element', 'log_temperature', 'log_density', 'log_coeff',
+        'knots_temperature', 'knots_density' and 'spline_coeffs'.
+        The arrays are copy-on-write memory maps.
+    """
+    if directory is None:
+        return None
+
+    filename = entry_name(name)
+    try:
+        header, arrays = storage.load(filename, writeable=True)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if header.get('version') != _version:
+        return None
+    recorded = header.get('fingerprint')
+    if not _unchanged(recorded, name):
+        return None
+    mtime_ns = os.stat(name).st_mtime_ns
+    if recorded['mtime_ns'] != mtime_ns:
+        # touched but the same: record the new time, so that the next load
+        # need not hash the file again
+        recorded['mtime_ns'] = mtime_ns
+        _save(filename, arrays, header)
+
+    d = dict(arrays)
+    d['charge'] = header['charge']
+    d['element'] = header['element']
+    return d
+
+
+def store(name, rate_coefficient):
+    """Save a RateCoefficient read from the adf11 file name.
+
+    Failing to write (e.g. a read-only directory) is not an error; the cache
+    is then simply not used.
+    """
+    if directory is None:
+        return
+
+    rc = rate_coefficient
+    arrays = {
+        'log_temperature' : rc.log_temperature,
+        'log_density' : rc.log_density,
+        'log_coeff' : rc.log_coeff,
+    }
+    arrays.update(rc.spline_arrays())
+    header = {
+        'version' : _version,
+        'fingerprint' : fingerprint(name),
+        'charge' : int(rc.nuclear_charge),
+        'element' : rc.element,
+    }
+
+    _save(entry_name(name), arrays, header)
+
+
+def _save(filename, arrays, header):
+    """Write an entry, unless the directory cannot be written."""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        storage.save(filename, arrays, header)
+    except (IOError, OSError):
+        pass
+
+
+def clear():
+    """Remove every entry from the cache directory."""
+    if directory is None or not os.path.isdir(directory):
+        return
+    for f in os.listdir(directory):
+        if f.endswith('.bin'):
+            os.remove(os.path.join(directory, f))
@@ -0,0 +1,323 @@
+"""
+Chebyshev surrogates of the rate coefficients.
+
+ADF11 tables are smooth in (log_temperature, log_density) except at low
+temperature, where ionisation and radiation fall steeply and end on the
+tables' floor.  A surrogate cuts the range of log_temperature into a few
+pieces of equal width, and on each piece log10 of the coefficients of all
+charge states is a tensor product Chebyshev series in log_temperature and
+log_density.  It takes several times less memory than the patches (five
+times for the ionisation of tungsten, with errors below 1%), and far less
+for smooth coefficients like recombination, which need a single piece.
+Evaluating it needs no search: the piece of a point follows from its
+temperature by arithmetic alone.  The points are sorted by piece once, with
+their weights, and each piece is then one matrix product of its
+coefficients with the Chebyshev products at all its points.
+
+fit() samples the splines at the Chebyshev points of each piece and then
+checks the series against the splines at points between all the grid
+points, recording the largest relative error of the coefficient of each
+charge state.  It doubles the number of pieces until that error is below a
+tolerance:
+
+    >>> surrogate = chebyshev.fit(rc, tolerance=1e-2)        # doctest: +SKIP
+    >>> surrogate.error.max()                                # doctest: +SKIP
+    >>> rc.use_surrogate(surrogate)                          # doctest: +SKIP
+
+On a grid of points the series are, like the splines, a product of basis
+matrices of the two axes and a matrix of coefficients, see
+bspline.contract_grid.
+
+RateCoefficient(interpolation='chebyshev') does this with the defaults.
+The error is that seen at the check points, which lie three to a grid cell
+in each direction; it is not a bound between them.
+"""
+import numpy as np
+
+from . import bspline, storage
+from .plasma_state import PlasmaState
+from .workspace import scratch
+
+
+def nodes(n):
+    """The n Chebyshev points of the first kind in [-1, 1], increasing."""
+    return -np.cos(np.pi * (np.arange(n) + 0.5) / n)
+
+
+def chebyshev(t, degree, derivative=0):
+    """T_0(t), ..., T_degree(t), stacked along a new first axis, or with
+    derivative=1 their derivatives.
+    """
+    T = np.empty((degree + 1,) + np.shape(t))
+    if derivative:
+        # T_n' = n U_{n-1}, with the polynomials U of the second kind
+        T[0] = 0.
+        U0, U1 = np.ones_like(t), 2 * t
+        for n in range(1, degree + 1):
+            T[n] = n * U0
+            U0, U1 = U1, 2 * t * U1 - U0
+        return T
+
+    T[0] = 1.
+    if degree > 0:
+        T[1] = t
+    for n in range(2, degree + 1):
+        T[n] = 2 * t * T[n - 1] - T[n - 2]
+    return T
+
+
+def locate(lo, hi, pieces, X):
+    """Find the piece of [lo, hi] of every X, and its position across it.
+
+    Points outside [lo, hi] are moved onto its edge.
+
+    Returns:
+        (q, t): the pieces, and -1 <= t <= 1 across them.
+    """
+    width = (hi - lo) / pieces
+    X = np.clip(X, lo, hi)
+    q = np.clip(np.floor((X - lo) / width).astype(np.intp), 0, pieces - 1)
+    t = np.clip(2 * (X - lo - q * width) / width - 1, -1., 1.)
+    return q, t
+
+
+def weights(x_range, y_range, pieces, degree, X, Y, derivative=(0, 0)):
+    """The Chebyshev products of the points (X, Y), sorted by piece.
+
+    With derivative, the orders (0 or 1) of the derivative in X and Y,
+    those are differentiated; they are zero outside the domain.
+
+    Returns:
+        (shape, inverse, bounds, w): the shape of the points, the
+            permutation that undoes the sort, the points bounds[q] to
+            bounds[q + 1] of the sorted points that are in piece q, and w of
+            shape ((mx + 1) * (my + 1), number of points), with
+            w[(my + 1) * a + b] the products T_a T_b of the sorted points,
+            for degree = (mx, my).
+    """
+    mx, my = degree
+    shape = np.shape(X)
+    piece, t = locate(x_range[0], x_range[1], pieces, np.ravel(X))
+    _, s = locate(y_range[0], y_range[1], 1, np.ravel(Y))
+
+    order = np.argsort(piece, kind='stable')
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    bounds = np.searchsorted(piece[order], np.arange(pieces + 1))
+
+    Tx = chebyshev(t[order], mx, derivative[0])
+    Ty = chebyshev(s[order], my, derivative[1])
+    if derivative[0]:
+        Tx *= _inside(x_range, np.ravel(X)[order]) * 2 * pieces / np.ptp(
+                x_range)
+    if derivative[1]:
+        Ty *= _inside(y_range, np.ravel(Y)[order]) * 2 / np.ptp(y_range)
+    w = np.einsum('ap,bp->abp', Tx, Ty).reshape(-1, len(order))
+    return shape, inverse, bounds, w
+
+
+def grid_weights(x_range, y_range, pieces, degree, X, Y):
+    """The basis matrices (Bx, By) of the axes X and Y of a grid.
+
+    Bx has shape (len(X), pieces * (mx + 1)), with T_a of X[i] in the
+    columns (mx + 1) * q + a of its piece q; By has shape (len(Y), my + 1).
+    """
+    mx, my = degree
+    q, t = locate(x_range[0], x_range[1], pieces, np.asarray(X,
+        dtype=np.float64))
+    _, s = locate(y_range[0], y_range[1], 1, np.asarray(Y, dtype=np.float64))
+    return (bspline.dense((mx + 1) * q, chebyshev(t, mx), pieces * (mx + 1)),
+            chebyshev(s, my).T)
+
+
+class ChebyshevSurrogate(object):
+    """Piecewise Chebyshev series of all charge states, as an interpolant.
+
+    See bspline.Splines for what an interpolant is.
+
+    Attributes:
+        log_temperature_range, log_density_range (np.array): the domain,
+            (lo, hi) of each.
+        coeffs (np.array): shape (nz, pieces, mx + 1, my + 1), the
+            coefficients of the series of each charge state on each piece.
+            This is a view of an array with the pieces first.
+        error (np.array): shape (nz,), the largest relative error of each
+            charge state found by fit(), or None.
+    """
+    def __init__(self, log_temperature_range, log_density_range, coeffs,
+            error=None):
+        self.log_temperature_range = np.asarray(log_temperature_range,
+                dtype=np.float64)
+        self.log_density_range = np.asarray(log_density_range,
+                dtype=np.float64)
+        self._by_piece = np.ascontiguousarray(np.moveaxis(coeffs, 1, 0))
+        self.coeffs = np.moveaxis(self._by_piece, 0, 1)
+        self.error = error
+
+    def __len__(self):
+        return len(self.coeffs)
+
+    @property
+    def pieces(self):
+        return self.coeffs.shape[1]
+
+    @property
+    def degree(self):
+        return self.coeffs.shape[2] - 1, self.coeffs.shape[3] - 1
+
+    @property
+    def key(self):
+        return ('chebyshev', self.pieces, self.degree,
+                self.log_temperature_range.tobytes(),
+                self.log_density_range.tobytes())
+
+    @property
+    def nbytes(self):
+        return self._by_piece.nbytes
+
+    def weights(self, x, y, derivative=(0, 0)):
+        return weights(self.log_temperature_range, self.log_density_range,
+                self.pieces, self.degree, x, y, derivative)
+
+    def grid_weights(self, x, y):
+        return grid_weights(self.log_temperature_range,
+                self.log_density_range, self.pieces, self.degree, x, y)
+
+    def evaluate_grid(self, weights, stages=slice(None), out=None):
+        """As bspline.Splines.evaluate_grid."""
+        nz, pieces, mx, my = self.coeffs.shape
+        C = self.coeffs[stages].reshape(-1, pieces * mx, my)
+        Bx, By = weights
+        return bspline.contract_grid(C, Bx, By, out=out)
+
+    def evaluate(self, weights, stages=slice(None), out=None,
+            workspace=None):
+        """As bspline.Splines.evaluate."""
+        shape, inverse, bounds, w = weights
+        coeffs = self._by_piece.reshape(self.pieces, len(self), -1)[:, stages]
+        nz = coeffs.shape[1]
+        if out is None:
+            out = np.empty((nz,) + shape)
+        result = out
+        if not out.flags.c_contiguous:
+            result = scratch(workspace, 'ChebyshevSurrogate.result',
+                    out.shape)
+
+        by_piece = scratch(workspace, 'ChebyshevSurrogate.by_piece',
+                (nz, len(inverse)))
+        for q in range(self.pieces):
+            start, stop = bounds[q], bounds[q + 1]
+            if start < stop:
+                np.matmul(coeffs[q], w[:, start:stop],
+                        out=by_piece[:, start:stop])
+        np.take(by_piece, inverse, axis=1, out=result.reshape(nz, -1),
+                mode='clip')
+
+        if result is not out:
+            out[...] = result
+        return out
+
+    def save(self, filename):
+        """Write the surrogate to a storage.py file."""
+        arrays = {'log_temperature_range' : self.log_temperature_range,
+            'log_density_range' : self.log_density_range,
+            'coeffs' : self._by_piece}
+        if self.error is not None:
+            arrays['error'] = self.error
+        storage.save(filename, arrays)
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Read a surrogate written by save()."""
+        arrays = storage.load(filename, mmap=mmap)[1]
+        return cls(arrays['log_temperature_range'],
+                arrays['log_density_range'],
+                np.moveaxis(arrays['coeffs'], 0, 1), arrays.get('error'))
+
+
+def fit_pieces(rate_coefficient, pieces, degree=(16, 4)):
+    """The surrogate of a RateCoefficient with a given number of pieces.
+
+    Its error is not computed; see fit() and relative_error().
+    """
+    rc = rate_coefficient
+    splines = _splines(rc)
+    x, y = rc.log_temperature, rc.log_density
+    mx, my = degree
+
+    edges = np.linspace(x[0], x[-1], pieces + 1)
+    tx, ty = nodes(mx + 1), nodes(my + 1)
+    X = edges[:-1, np.newaxis] + (tx + 1) / 2 * np.diff(edges)[:, np.newaxis]
+    Y = y[0] + (ty + 1) / 2 * (y[-1] - y[0])
+    X, Y = np.broadcast_arrays(X[:, :, np.newaxis], Y)
+
+    # shape (nz, pieces, mx + 1, my + 1), like the coefficients
+    F = splines.evaluate(splines.weights(X, Y))
+    c = np.linalg.solve(chebyshev(tx, mx).T, F)
+    c = np.linalg.solve(chebyshev(ty, my).T, np.swapaxes(c, -1, -2))
+    c = np.swapaxes(c, -1, -2)
+    return ChebyshevSurrogate((x[0], x[-1]), (y[0], y[-1]), c)
+
+
+def relative_error(surrogate, rate_coefficient, check=3):
+    """The largest relative error of the surrogate of each charge state,
+    compared to the splines at the grid points and check points between
+    each pair of them.
+    """
+    rc = rate_coefficient
+    splines = _splines(rc)
+    X, Y = np.meshgrid(_refine(rc.log_temperature, check),
+            _refine(rc.log_density, check), indexing='ij')
+    state = PlasmaState(10**X, 10**Y)
+    log_spline = splines.evaluate(state.weights(splines))
+    log_surrogate = surrogate.evaluate(state.weights(surrogate))
+    error = np.abs(np.expm1(np.log(10) * (log_surrogate - log_spline)))
+    return error.reshape(len(error), -1).max(axis=1)
+
+
+def fit(rate_coefficient, degree=(16, 4), tolerance=1e-2, max_pieces=None):
+    """Fit a surrogate to a RateCoefficient.
+
+    The number of pieces is doubled, starting from one, until the largest
+    relative error of all charge states is below tolerance, or until there
+    are max_pieces.
+
+    Args:
+        rate_coefficient (RateCoefficient): the coefficients to fit.
+        degree (tuple): (mx, my), the degrees in log_temperature and
+            log_density.
+        tolerance (float): the largest relative error wanted.
+        max_pieces (int): the most pieces to try.  Default is the number of
+            cells of the grid in log_temperature.
+
+    Returns:
+        ChebyshevSurrogate: with the error of each charge state.  It may be
+            larger than the tolerance if max_pieces were not enough.
+    """
+    if max_pieces is None:
+        max_pieces = len(rate_coefficient.log_temperature) - 1
+
+    pieces = 1
+    while True:
+        surrogate = fit_pieces(rate_coefficient, pieces, degree)
+        surrogate.error = relative_error(surrogate, rate_coefficient)
+        if surrogate.error.max() <= tolerance or pieces >= max_pieces:
+            return surrogate
+        pieces = min(2 * pieces, max_pieces)
+
+
+def _splines(rate_coefficient):
+    arrays = rate_coefficient.spline_arrays()
+    return bspline.Splines(arrays['knots_temperature'],
+            arrays['knots_density'], arrays['spline_coeffs'])
+
+
+def _inside(x_range, X):
+    return (X >= x_range[0]) & (X <= x_range[1])
+
+
+def _refine(x, check):
+    """The points x and check points evenly between each pair of them."""
+    steps = np.arange(check + 1) / (check + 1.)
+    inner = x[:-1, np.newaxis] + np.diff(x)[:, np.newaxis] * steps
+    return np.append(inner.ravel(), x[-1])
@@ -0,0 +1,116 @@
+"""
+Reduced quantities of very many points, in chunks of bounded memory.
+
+The fractional abundances of N points take (Z + 1) N doubles, and the
+radiation as much again per power key: for tungsten at 10^8 points, tens of
+GB.  ChunkedEquilibrium takes the points a chunk at a time, computes the
+collisional-radiative equilibrium and the radiation of the chunk with
+CollRadEquilibrium.reduced, which never stores the abundances, and scratch
+arrays that are reused for every chunk (see workspace.py), and writes only
+the reduced quantities, one number per point, into output arrays.  Its
+memory is set by the chunk size, not by the number of points.
+
+The inputs and outputs can be memory mapped, e.g. from a simulation
+snapshot:
+
+    >>> Te = np.load('Te.npy', mmap_mode='r')                  # doctest: +SKIP
+    >>> ne = np.load('ne.npy', mmap_mode='r')                  # doctest: +SKIP
+    >>> out = {'total' : np.lib.format.open_memmap('total.npy', mode='w+',
+    ...         shape=Te.shape)}                               # doctest: +SKIP
+    >>> ChunkedEquilibrium(ad, impurity_fraction=0.01).compute(Te, ne,
+    ...         out)                                           # doctest: +SKIP
+"""
+import numpy as np
+
+from .collisional_radiative import CollRadEquilibrium
+from .plasma_state import PlasmaState
+from .workspace import Workspace
+
+# what compute() can write.
+quantities = ('mean_charge', 'mean_square_charge', 'effective_charge',
+        'line_power', 'continuum_power', 'cx_power', 'total')
+
+
+class ChunkedEquilibrium(object):
+    """Reduced quantities of collisional-radiative equilibrium, computed a
+    chunk of points at a time.
+
+    Attributes:
+        atomic_data (AtomicData): the element.
+        chunk_size (int): the number of points in a chunk, which sets the
+            memory: about 60 doubles per point of a chunk, for the basis
+            weights of its PlasmaState and the scratch arrays, whatever the
+            element.
+        impurity_fraction, neutral_fraction: as for Radiation.
+        workspace (Workspace): the scratch arrays of a chunk, kept between
+            chunks and calls.
+    """
+    def __init__(self, atomic_data, chunk_size=2**16, impurity_fraction=1.,
+            neutral_fraction=0.):
+        self.atomic_data = atomic_data
+        self.chunk_size = chunk_size
+        self.impurity_fraction = impurity_fraction
+        self.neutral_fraction = neutral_fraction
+        self.workspace = Workspace()
+        self._eq = CollRadEquilibrium(atomic_data)
+
+    def compute(self, temperature, density, out=None):
+        """Compute the quantities at all points, chunk by chunk.
+
+        Args:
+            temperature (array_like): temperatures [eV], e.g. memory mapped.
+            density (array_like): densities [m^-3], which broadcast against
+                temperature.
+            out (dict): arrays of the broadcast shape of temperature and
+                density, e.g. memory mapped, for some of the keys in
+                quantities.  Only the power coefficients of those are
+                evaluated; <Z> and <Z**2>, which need only the ionisation
+                and recombination coefficients, always are.  Default is new
+                arrays for all of them.
+
+        Returns:
+            out: the dict of arrays, with
+                'mean_charge': <Z>, see FractionalAbundance.mean_charge.
+                'mean_square_charge': <Z**2>.
+                'effective_charge': see FractionalAbundance.effective_charge.
+                'line_power', 'continuum_power', 'cx_power', 'total':
+                    see Radiation.power [W/m3].
+        """
+        shape = np.broadcast(temperature, density).shape
+        if out is None:
+            out = {key : np.empty(shape) for key in quantities}
+        for key, a in out.items():
+            if key not in quantities:
+                raise KeyError('unknown quantity: %s.' % key)
+            if a.shape != shape:
+                raise ValueError('%s has shape %s, not %s.' % (key, a.shape,
+                    shape))
+
+        temperature = np.broadcast_to(temperature, shape)
+        density = np.broadcast_to(density, shape)
+        size = int(np.prod(shape))
+        for start in range(0, size, self.chunk_size):
+            chunk = slice(start, min(start + self.chunk_size, size))
+            # .flat copies just the chunk, whatever the layout
+            results = self._chunk(temperature.flat[chunk],
+                    density.flat[chunk], out)
+            for key, a in out.items():
+                a.flat[chunk] = results[key]
+        return out
+
+    def _chunk(self, temperature, density, out):
+        """The quantities in out at the points of one chunk."""
+        # a PlasmaState is not taken in blocks again by reduced(), so that
+        # chunk_size alone bounds the memory
+        reduced = self._eq.reduced(PlasmaState(temperature, density),
+                impurity_fraction=self.impurity_fraction,
+                neutral_fraction=self.neutral_fraction,
+                workspace=self.workspace, power_keys=out)
+
+        results = dict(reduced.power)
+        results['mean_charge'] = reduced.mean_charge()
+        results['mean_square_charge'] = reduced.mean_square_charge()
+        if 'effective_charge' in out:
+            results['effective_charge'] = reduced.effective_charge(
+                    self.impurity_fraction)
+        return results
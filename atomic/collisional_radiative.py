@@ -1,39 +1,313 @@
 import numpy as np
 
-from .abundance import FractionalAbundance
+from .abundance import FractionalAbundance, ReducedAbundance
+from .atomic_data import ZeroCoefficient
+from .plasma_state import PlasmaState, as_plasma_state
+from .workspace import Workspace, scratch
+
+
+# log10 of the smallest abundance, which is kept a normal double through
+# the normalisation.
+_log10_tiny = -305.
+
+# log10 of the abundance relative to the largest one below which reduced()
+# neglects a stage; its products with the coefficients stay normal doubles.
+_log10_negligible = -200.
+
+# the power coefficients, the stages they go with (see Radiation) and
+# whether they are multiplied by the electron or the neutral density.
+_power_keys = [('line_power', 0, 'electron'), ('continuum_power', 1,
+    'electron'), ('cx_power', 0, 'neutral')]
 
 
 class CollRadEquilibrium(object):
+    """
+    Attributes:
+        block (int): the number of points reduced() takes at a time.
+    """
+    block = 2**14
+
     def __init__(self, atomic_data):
         self.atomic_data = atomic_data
         self.ionisation_coeff = atomic_data.coeffs['ionisation'] # RateCoefficient objects
         self.recombination_coeff = atomic_data.coeffs['recombination']
         self.nuclear_charge = atomic_data.nuclear_charge #could be generalized to include metastables?
 
-    def ionisation_stage_distribution(self, temperature, density):
+    def ionisation_stage_distribution(self, temperature, density=None,
+            out=None, workspace=None, derivative=False, grid=False):
         """Compute ionisation stage fractions for collrad equilibrium.
 
         This case only includes ionisation and recombination.
         It does not include charge exchange, or any time-dependent effects.
 
+        The abundances are computed in log space, from the cumulative sum
+        over the stages of log10(S / alpha) and a log-sum-exp
+        normalisation, so that they neither overflow nor underflow for
+        heavy elements, and at all points and stages at once.  temperature
+        and density may have any shapes that broadcast together.
+
         Args:
-            temperature (array_like): temperatures [eV].
-            density (array_like): densities [m^-3].
+            temperature (array_like or PlasmaState): temperatures [eV].
+            density (array_like): densities [m^-3]; None with a PlasmaState.
+            out (np.array): optional array of shape (nuclear_charge + 1,)
+                + the shape of the points for the fractional abundances.
+            workspace (Workspace): optional scratch arrays. With a
+                PlasmaState, out and workspace nothing is allocated but
+                the returned FractionalAbundance.
+            derivative (bool): also compute dy_dTe, the derivative of the
+                fractional abundances with respect to temperature, from the
+                analytic derivatives of the rate coefficients.
+            grid (bool): compute the abundances on the grid of all the
+                temperatures with all the densities, which are then 1D axes
+                (see RateCoefficient.evaluate_all).  The abundances have
+                shape (nuclear_charge + 1, len(temperature), len(density)),
+                and the FractionalAbundance has temperature[:, np.newaxis]
+                and density[np.newaxis, :], which broadcast to that mesh.
 
         Returns:
             A FractionalAbundance object
         """
-        if len(temperature) == 1 and len(density) > 1:
-            temperature = temperature * np.ones_like(density)
-        y = np.zeros((self.nuclear_charge + 1, len(temperature)))
-        y[0] = np.ones_like(temperature)
-        for k in range(self.nuclear_charge):
-            S = self.ionisation_coeff(k, temperature, density)
-            alpha = self.recombination_coeff(k, temperature, density)
-            y[k+1] = y[k] * S / alpha
-
-        y /= y.sum(0) # fractional abundance
-        return FractionalAbundance(self.atomic_data, y, temperature, density)
+        if grid:
+            return self._grid_distribution(np.asarray(temperature),
+                    np.asarray(density), out, workspace, derivative)
+        if isinstance(temperature, PlasmaState):
+            state = temperature
+            temperature, density = state.temperature, state.density
+        else:
+            if np.size(temperature) == 1 and np.size(density) > 1:
+                # a view, e.g. for plotting against density
+                temperature = np.broadcast_to(temperature, np.shape(density))
+            state = PlasmaState(temperature, density)
+
+        shape = (self.nuclear_charge,) + state.shape
+        log_S = self.ionisation_coeff.log10_all(state,
+                out=scratch(workspace, 'CollRadEquilibrium.S', shape),
+                workspace=workspace)
+        log_alpha = self.recombination_coeff.log10_all(state,
+                out=scratch(workspace, 'CollRadEquilibrium.alpha', shape),
+                workspace=workspace)
+        y = self._equilibrium(log_S, log_alpha, out, workspace)
+
+        dy_dTe = None
+        if derivative:
+            dy_dTe = self._temperature_derivative(state, y)
+        return FractionalAbundance(self.atomic_data, y, temperature, density,
+                plasma_state=state, dy_dTe=dy_dTe)
+
+    def reduced(self, temperature, density=None, impurity_fraction=1.,
+            neutral_fraction=0., workspace=None, power_keys=None):
+        """The moments of the equilibrium fractional abundances and the
+        radiated power, without the abundances themselves.
+
+        The stages are taken one at a time: log10 of the abundance of
+        stage k + 1 relative to stage 0 is that of stage k plus
+        log10(S[k] / alpha[k]), and its power, relative to the largest one
+        so far, is added to running sums of y, k y, k**2 y and of y times
+        the power coefficients of stage k, which are rescaled when the
+        largest changes.  Stages with abundances below 1e-200 of the
+        largest are neglected.
+
+        Nothing of the size of (nuclear_charge + 1) times the points is
+        made.  Given arrays, the points are taken in blocks of self.block,
+        each with a PlasmaState of its own whose basis weights (32 numbers
+        per point, see plasma_state.py) are dropped after the block; the
+        result takes 6 numbers per point, and the rest of the memory is set
+        by the block size.  A PlasmaState is used as it is, and keeps the
+        weights of all its points.
+
+        Args:
+            temperature (array_like or PlasmaState): temperatures [eV].
+            density (array_like): densities [m^-3]; None with a PlasmaState.
+            impurity_fraction, neutral_fraction: as for Radiation.
+            workspace (Workspace): optional scratch arrays.
+            power_keys (iterable): the keys of Radiation.power wanted, by
+                default all of them.  The power coefficients of the others
+                are not evaluated, unless 'total' is wanted.
+
+        Returns:
+            A ReducedAbundance, with the same mean_charge(),
+            effective_charge() and power (for power_keys) as
+            FractionalAbundance and Radiation give.
+        """
+        if power_keys is None:
+            power_keys = [key for key, offset, name in _power_keys]
+            power_keys.append('total')
+        power_keys = set(power_keys)
+        wanted = [p for p in _power_keys
+                if p[0] in power_keys or 'total' in power_keys]
+
+        if isinstance(temperature, PlasmaState):
+            state = as_plasma_state(temperature, density)
+            temperature, density = state.temperature, state.density
+        else:
+            state = None
+            temperature, density = np.broadcast_arrays(
+                    np.asarray(temperature, dtype=np.float64),
+                    np.asarray(density, dtype=np.float64))
+
+        # <Z>, <Z**2> and the power coefficients summed over the stages
+        sums = [np.empty(temperature.shape) for i in range(2 + len(wanted))]
+        if state is not None:
+            self._reduced_sums(state, wanted, sums, workspace)
+        else:
+            if workspace is None:
+                workspace = Workspace()
+            size = temperature.size
+            flat = [s.reshape(-1) for s in sums]
+            for start in range(0, size, self.block):
+                chunk = slice(start, min(start + self.block, size))
+                # .flat copies just the block, whatever the layout
+                self._reduced_sums(PlasmaState(temperature.flat[chunk],
+                    density.flat[chunk]), wanted, [s[chunk] for s in flat],
+                    workspace)
+
+        mean_charge, mean_square_charge = sums[:2]
+        ni = impurity_fraction * density
+        n0 = neutral_fraction * density
+        power = {}
+        for (key, offset, density_name), s in zip(wanted, sums[2:]):
+            s *= density if density_name == 'electron' else n0
+            s *= ni
+            power[key] = s
+        if 'total' in power_keys:
+            power['total'] = (power['line_power'] + power['continuum_power']
+                    + power['cx_power'])
+        for key in set(power) - power_keys:
+            del power[key]
+        return ReducedAbundance(self.atomic_data, mean_charge,
+                mean_square_charge, power, temperature, density,
+                plasma_state=state)
+
+    def _reduced_sums(self, state, power_keys, sums, workspace):
+        """Write <Z>, <Z**2> and the mean power coefficient of each of
+        power_keys, a sublist of _power_keys, at the points of state into
+        the arrays sums.
+        """
+        coeffs = self.atomic_data.coeffs
+        Z = self.nuclear_charge
+
+        def array(name):
+            return scratch(workspace, 'CollRadEquilibrium.reduced.' + name,
+                    state.shape)
+
+        g, largest, scale = array('g'), array('largest'), array('scale')
+        w, log_S, c = array('w'), array('log_S'), array('c')
+        # the sums are relative to the largest y
+        norm = array('norm')
+        mean_charge, mean_square_charge = sums[:2]
+        power_coeffs = [(offset, coeffs.get(key, ZeroCoefficient(Z)), s)
+                for (key, offset, density_name), s in zip(power_keys,
+                    sums[2:])]
+
+        norm.fill(1.)
+        for s in sums:
+            s.fill(0.)
+        g.fill(0.)
+        largest.fill(0.)
+        w.fill(1.)
+        for k in range(Z + 1):
+            if k > 0:
+                self.ionisation_coeff.log10(k - 1, state, out=log_S,
+                        workspace=workspace)
+                g += log_S
+                g -= self.recombination_coeff.log10(k - 1, state, out=log_S,
+                        workspace=workspace)
+
+                # rescale the sums if the largest y has changed
+                np.subtract(largest, g, out=scale)
+                np.minimum(scale, 0., out=scale)
+                np.maximum(largest, g, out=largest)
+                _power10(scale)
+                norm *= scale
+                for s in sums:
+                    s *= scale
+
+                np.subtract(g, largest, out=w)
+                _power10(w)
+                norm += w
+                mean_charge += k * w
+                mean_square_charge += k * k * w
+
+            for offset, rc, s in power_coeffs:
+                if 0 <= k - offset < Z:
+                    rc(k - offset, state, out=c, workspace=workspace)
+                    c *= w
+                    s += c
+
+        for s in sums:
+            s /= norm
+
+    def _grid_distribution(self, temperature, density, out, workspace,
+            derivative):
+        shape = (self.nuclear_charge, len(temperature), len(density))
+        log_S = self.ionisation_coeff.log10_all(temperature, density,
+                out=scratch(workspace, 'CollRadEquilibrium.S', shape),
+                grid=True)
+        log_alpha = self.recombination_coeff.log10_all(temperature, density,
+                out=scratch(workspace, 'CollRadEquilibrium.alpha', shape),
+                grid=True)
+        y = self._equilibrium(log_S, log_alpha, out, workspace)
+
+        temperature = temperature[:, np.newaxis]
+        density = density[np.newaxis, :]
+        dy_dTe = None
+        if derivative:
+            dy_dTe = self._temperature_derivative(
+                    PlasmaState(temperature, density), y)
+        return FractionalAbundance(self.atomic_data, y, temperature, density,
+                dy_dTe=dy_dTe)
+
+    def _equilibrium(self, log_S, log_alpha, out, workspace):
+        """The fractional abundances from log10 of the coefficients S and
+        alpha.  log_S is overwritten.
+
+        In equilibrium y[k+1] / y[k] = S[k] / alpha[k], so log10(y[k]) is,
+        up to the normalisation, the sum of log10(S[j] / alpha[j]) over
+        j < k.  It is normalised by subtracting its largest value over k
+        before taking powers, so that the largest is 1.  Abundances below
+        1e-305 are held there: powers and quotients in the subnormal range
+        below the smallest normal double, 2.2e-308, are many times slower.
+        """
+        y = out
+        if y is None:
+            y = np.empty((self.nuclear_charge + 1,) + log_S.shape[1:])
+        log_S -= log_alpha
+        y[0] = 0.
+        np.cumsum(log_S, axis=0, out=y[1:])
+
+        # fractional abundance
+        norm = scratch(workspace, 'CollRadEquilibrium.norm', log_S.shape[1:])
+        y -= np.max(y, axis=0, out=norm)
+        np.maximum(y, _log10_tiny, out=y)
+        y *= np.log(10)
+        np.exp(y, out=y)
+        y /= np.sum(y, axis=0, out=norm)
+        return y
+
+    def _temperature_derivative(self, state, y):
+        """dy/dTe of the fractional abundances y.
+
+        y[k] is proportional to exp(g[k]), with g[k] the sum of
+        ln(S[j] / alpha[j]) over j < k, so that
+            dy[k]/dTe = y[k] (dg[k]/dTe - sum_m y[m] dg[m]/dTe),
+        and d ln(c)/dTe = d log10(c)/d log10(Te) / Te.
+        """
+        dS = self.ionisation_coeff.log10_derivative_all(state)
+        dalpha = self.recombination_coeff.log10_derivative_all(state)
+
+        dg = np.zeros_like(y)
+        np.cumsum(dS - dalpha, axis=0, out=dg[1:])
+        dg /= state.temperature
+        dg -= np.sum(y * dg, axis=0)
+        dg *= y
+        return dg
+
+
+def _power10(x):
+    """x = 10**x in place, for x <= 0, holding negligible values."""
+    np.maximum(x, _log10_negligible, out=x)
+    x *= np.log(10)
+    np.exp(x, out=x)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,171 @@
+"""
+A single-file database of all the atomic data in adas_data.
+
+pack() reads every (unresolved) adf11 file and every adf15 file once and
+writes their contents, including the fitted adf11 splines, into one file in
+the format of storage.py.  The JSON header of that file is the index: it
+lists the files with their element, year and class (adf11) or their
+nuclear charge, charge and datablocks (adf15).
+
+A Database memory maps the packed file, so opening it is one sequential read
+of the header, and the tables of a file are only paged in when they are used.
+This is much cheaper than opening dozens of small files, e.g. for many
+workers started on a shared filesystem:
+
+    >>> db = Database('atomic_data.bin')                     # doctest: +SKIP
+    >>> ad = AtomicData.from_database(db, 'carbon')          # doctest: +SKIP
+    >>> pool = TransitionPool.from_database(db, 'pec96#c*')  # doctest: +SKIP
+
+To make the file run
+
+    $ python3 -m atomic.database atomic_data.bin
+"""
+import fnmatch
+import glob
+import os
+
+import numpy as np
+
+from . import manifest
+from . import storage
+from .adf11 import adf11_classes
+from .atomic_data import RateCoefficient, _full_path
+
+# bump this when the layout of the database changes.
+_version = 1
+
+
+def pack(filename, directory=None, adf15_files='pec*.dat'):
+    """Pack the adf11 and adf15 files of a directory into one file.
+
+    Args:
+        filename (str): the database file to write.
+        directory (str): the data directory, default adas_data.
+        adf15_files (str): glob pattern, relative to directory, of the
+            adf15 files. Reading these needs the _xxdata_15 extension.
+    """
+    if directory is None:
+        directory = _full_path('')
+
+    arrays = {}
+    header = {'version' : _version, 'adf11' : {}, 'adf15' : {}}
+
+    for name, element, year, class_, resolved in manifest.scan(directory):
+        if resolved or class_ not in adf11_classes:
+            continue
+        rc = RateCoefficient.from_adf11(os.path.join(directory, name))
+        header['adf11'][name] = {'charge' : int(rc.nuclear_charge),
+                'element' : rc.element, 'year' : year, 'class' : class_}
+
+        prefix = 'adf11/%s/' % name
+        arrays[prefix + 'log_temperature'] = rc.log_temperature
+        arrays[prefix + 'log_density'] = rc.log_density
+        arrays[prefix + 'log_coeff'] = rc.log_coeff
+        for key, value in rc.spline_arrays().items():
+            arrays[prefix + key] = value
+
+    adf15_names = sorted(glob.glob(os.path.join(directory, adf15_files)))
+    if adf15_names:
+        from .adf15 import Adf15
+    for fullname in adf15_names:
+        name = os.path.basename(fullname)
+        d = Adf15(fullname).read()
+
+        datablocks = []
+        for i, b in enumerate(d.pop('datablocks')):
+            prefix = 'adf15/%s/%d/' % (name, i)
+            for key in ['density', 'temperature', 'pec']:
+                arrays[prefix + key] = b[key]
+            datablocks.append({'wavelength' : float(b['wavelength']),
+                'type' : b['type']})
+
+        d = {key : _to_json(value) for key, value in d.items()}
+        d['datablocks'] = datablocks
+        header['adf15'][name] = d
+
+    storage.save(filename, arrays, header)
+
+
+def _to_json(value):
+    """numpy scalars -> python scalars"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class Database(object):
+    """A packed database file, memory mapped.
+
+    It can be given to AtomicData.from_database,
+    RateCoefficient.from_database and TransitionPool.from_database.
+
+    Attributes:
+        filename (str): the database file.
+        index (manifest.ElementIndex): the adf11 files in the database.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        header, self._arrays = storage.load(filename)
+        if header.get('version') != _version:
+            raise IOError('unsupported database version: %s' % filename)
+
+        self._adf11 = header['adf11']
+        self._adf15 = header['adf15']
+
+        # the arrays of each adf11 file, by name
+        self._adf11_arrays = {}
+        for key, value in self._arrays.items():
+            kind, _, rest = key.partition('/')
+            if kind == 'adf11':
+                name, _, array_name = rest.rpartition('/')
+                self._adf11_arrays.setdefault(name, {})[array_name] = value
+
+        entries = [[name, h['element'], h['year'], h['class'], False]
+                for name, h in sorted(self._adf11.items())]
+        self.index = manifest.ElementIndex(filename, entries)
+
+    def adf11_names(self):
+        return sorted(self._adf11)
+
+    def adf15_names(self, pattern='*'):
+        """Names of the adf15 files matching a shell-style pattern."""
+        return sorted(fnmatch.filter(self._adf15, pattern))
+
+    def adf11(self, name):
+        """The contents of an adf11 file, in the form of cache.load()."""
+        if name not in self._adf11:
+            raise KeyError('no adf11 file %s in %s' % (name, self.filename))
+
+        d = dict(self._adf11_arrays[name])
+        d['charge'] = self._adf11[name]['charge']
+        d['element'] = self._adf11[name]['element']
+        return d
+
+    def adf15(self, name):
+        """The contents of an adf15 file, in the form of Adf15.read()."""
+        if name not in self._adf15:
+            raise KeyError('no adf15 file %s in %s' % (name, self.filename))
+
+        d = dict(self._adf15[name])
+        datablocks = []
+        for i, b in enumerate(d['datablocks']):
+            prefix = 'adf15/%s/%d/' % (name, i)
+            b = dict(b)
+            for key in ['density', 'temperature', 'pec']:
+                b[key] = self._arrays[prefix + key]
+            datablocks.append(b)
+        d['datablocks'] = datablocks
+        return d
+
+    # the source interface of atomic_data.LazyCoefficients
+    def rate_coefficient(self, name):
+        return RateCoefficient.from_database(self, name)
+
+    def header(self, name):
+        h = self._adf11[name]
+        return h['charge'], h['element']
+
+
+if __name__ == '__main__':
+    import sys
+    pack(sys.argv[1])
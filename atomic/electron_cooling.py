@@ -21,8 +21,9 @@ class ElectronCooling(object):
         rad: a Radiation object.
         y: a FractionalAbundance object.
         atomic_data: that FrAb's atomic data.
-        temperature (np.array): that FrAb's temperature list.
-        electron_density (np.array or float): that FrAb's density list.
+        temperature (np.array): that FrAb's temperatures.
+        electron_density (np.array or float): that FrAb's densities.
+            The powers have the broadcast shape of the two.
         impurity_fraction: ???
             n_impurity = n_e * impurity_fraction
         neutral_fraction: fraction of neutral hydrogen, for cx_power.
@@ -82,7 +83,7 @@ class ElectronCooling(object):
         staging_coeffs = {}
         for key in ['ionisation', 'recombination', 'ionisation_potential']:
             staging_coeffs[key] = self.atomic_data.coeffs.get(key,
-                    ZeroCoefficient())
+                    ZeroCoefficient(self.atomic_data.nuclear_charge))
         return staging_coeffs
 
     def _compute_power(self):
@@ -90,35 +91,30 @@ class ElectronCooling(object):
         Compute electron cooling power density in [W/m3].
         """
 
-        shape_ = self.atomic_data.nuclear_charge, self.temperature.shape[0]
-
         staging_coeffs = self._get_staging_coeffs()
         staging_power = {}
         staging_power_keys = 'ionisation', 'recombination'
-        for key in staging_power_keys:
-            staging_power[key] = np.zeros(shape_)
 
         ne = self.electron_density
         ni = self.get_impurity_density()
         y = self.y # a FractionalAbundance
 
-        for k in range(self.atomic_data.nuclear_charge):
-            # in joules per ionisation stage transition
-            # note that the temperature and density don't matter for the potential.
-            potential = self.eV * staging_coeffs['ionisation_potential'](k, self.temperature, self.electron_density)
-            for key in staging_power_keys:
-                coeff = staging_coeffs[key](k, self.temperature,
-                        self.electron_density)
+        # in joules per ionisation stage transition, for all stages at once.
+        # note that the temperature and density don't matter for the potential.
+        potential = self.eV * staging_coeffs['ionisation_potential'].evaluate_all(
+                y.plasma_state)
+        for key in staging_power_keys:
+            coeff = staging_coeffs[key].evaluate_all(y.plasma_state)
 
-                # somewhat ugly...
-                if key == 'recombination':
-                    sign, shift = -1, 1
-                else:
-                    sign, shift = 1, 0
+            # somewhat ugly...
+            if key == 'recombination':
+                sign, populations = -1, y.y[1:]
+            else:
+                sign, populations = 1, y.y[:-1]
 
-                scale = ne * ni * y.y[k+shift] * potential
+            scale = ne * ni * populations * potential
 
-                staging_power[key][k] = sign * scale * coeff
+            staging_power[key] = sign * scale * coeff
 
         # sum over all ionisation stages
         for key in list(staging_power.keys()):
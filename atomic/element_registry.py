@@ -0,0 +1,164 @@
+"""
+A process-wide registry of loaded elements.
+
+AtomicData.from_element (atomic.element) builds a new object every time it is
+called.  The registry instead keeps the AtomicData it has built and hands out
+the same object again, so that code which looks up an element in a loop pays
+for a dict lookup rather than for loading the data:
+
+    >>> import atomic
+    >>> ad = atomic.registry.get('carbon')        # doctest: +SKIP
+    >>> ad is atomic.registry.get('c')            # doctest: +SKIP
+    True
+
+Because the objects are shared they are made read-only: their coeffs mapping
+cannot be changed and the arrays of the RateCoefficients are not writeable.
+Use AtomicData.copy() to get a private, mutable version.
+"""
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from .adf11 import Sniffer
+from .manifest import symbol
+from .atomic_data import AtomicData, LazyCoefficients, _element_files
+from .atomic_data import _set_read_only
+
+
+class ElementRegistry(object):
+    """A bounded LRU cache of shared AtomicData objects.
+
+    Entries are keyed by (element symbol, year, datatypes), where datatypes
+    is the sorted tuple of the datatypes that were loaded, e.g.
+    ('ionisation', 'recombination').
+
+    Attributes:
+        maxsize (int): the maximum number of entries; the least recently
+            used one is dropped when it is exceeded. None means no limit.
+        hits (int): number of lookups answered from the registry.
+        misses (int): number of lookups that had to load data.
+        evictions (int): number of entries dropped because of maxsize.
+    """
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._aliases = {}
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, element, datatypes=None, year=None):
+        """Return the shared AtomicData for an element.
+
+        Args:
+            element (str): a name like 'c' or 'carbon'.
+            datatypes (iterable): only load these datatypes, like
+                ['ionisation', 'recombination']. Default is all of them.
+            year: the year of the data. Default is the latest available.
+        """
+        request = (element.lower(),
+                None if datatypes is None else frozenset(datatypes), year)
+        with self._lock:
+            key = self._aliases.get(request)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        key = self._key(element, datatypes, year)
+        with self._lock:
+            self._aliases[request] = key
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        atomic_data = _freeze(AtomicData.from_element(element, datatypes,
+            year))
+
+        with self._lock:
+            self.misses += 1
+            # another thread may have loaded it in the meantime
+            atomic_data = self._entries.setdefault(key, atomic_data)
+            self._entries.move_to_end(key)
+            self._shrink()
+            return atomic_data
+
+    def evict(self, element, datatypes=None):
+        """Drop the entries for an element.
+
+        Without datatypes every entry for the element is dropped.
+
+        Returns:
+            The number of entries dropped.
+        """
+        s = symbol(element)
+        wanted = None if datatypes is None else tuple(sorted(datatypes))
+        with self._lock:
+            keys = [k for k in self._entries if k[0] == s
+                    and (wanted is None or k[2] == wanted)]
+            for k in keys:
+                self._drop(k)
+            return len(keys)
+
+    def clear(self):
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._aliases.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """A dict with the hits, misses, evictions, size and maxsize."""
+        with self._lock:
+            return {'hits' : self.hits, 'misses' : self.misses,
+                    'evictions' : self.evictions, 'size' : len(self._entries),
+                    'maxsize' : self.maxsize}
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _shrink(self):
+        if self.maxsize is None:
+            return
+        while len(self._entries) > self.maxsize:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        """Drop an entry and the request spellings that lead to it."""
+        del self._entries[key]
+        for request in [r for r, k in self._aliases.items() if k == key]:
+            del self._aliases[request]
+
+    def _key(self, element, datatypes, year):
+        files = _element_files(element, year)
+        if datatypes is not None:
+            files = {k : v for k, v in files.items() if k in datatypes}
+        if not files:
+            raise IOError('no data files for element: %s' % element)
+
+        s = Sniffer(next(iter(files.values())))
+        return s.element, s.year, tuple(sorted(files))
+
+
+def _freeze(atomic_data):
+    """Make an AtomicData (and its RateCoefficients) read-only."""
+    if isinstance(atomic_data.coeffs, LazyCoefficients):
+        # this does not read the files that have not been used yet.
+        atomic_data.coeffs.freeze()
+        return atomic_data
+
+    for coeff in atomic_data.coeffs.values():
+        _set_read_only(coeff)
+    atomic_data.coeffs = MappingProxyType(atomic_data.coeffs)
+    return atomic_data
+
+
+registry = ElementRegistry()
@@ -0,0 +1,176 @@
+"""
+Tables of collisional-radiative equilibrium, for fast lookups.
+
+CollRadEquilibrium evaluates 2 Z splines at every call.  A transport code
+that needs the equilibrium at the same element and neutral fraction over and
+over can instead tabulate it once on a dense (Te, ne) grid and interpolate:
+
+    >>> table = EquilibriumTable.build(ad, np.logspace(0, 4, 400),
+    ...         np.logspace(17, 21, 40))                         # doctest: +SKIP
+    >>> table.save('w.equilibrium')                              # doctest: +SKIP
+    >>> table = EquilibriumTable.load('w.equilibrium')           # doctest: +SKIP
+    >>> table.mean_charge(Te, ne)                                # doctest: +SKIP
+
+The table holds log10 of the fractional abundances, <Z>, <Z**2> and log10 of
+the radiative loss function Lz = P / (ne ni) [W m^3], interpolated in
+(log10 Te, log10 ne) by patches.PatchTables: bilinearly, which never
+overshoots, or with bicubic patches of the interpolating splines, which are
+more accurate on coarse grids.  The three moments are in a table of their
+own, so that looking them up costs a cell search and one small matrix
+product per point whatever the nuclear charge; see
+benchmarks/equilibrium_table.py.  Points outside the grid take
+the values at its edge, as for the rate coefficients.
+
+Tables are saved in the format of storage.py and memory mapped on loading.
+"""
+import numpy as np
+
+from . import bspline, patches, storage
+from .abundance import FractionalAbundance
+from .collisional_radiative import CollRadEquilibrium
+from .plasma_state import as_plasma_state
+from .radiation import Radiation
+from .workspace import scratch
+
+# log10 of the smallest abundance tabulated; smaller ones would only make
+# the interpolation between neighbouring points worse.
+_log10_floor = -40.
+
+
+class EquilibriumTable(object):
+    """Equilibrium abundances, moments and radiative loss on a grid.
+
+    Attributes:
+        element (str): the element.
+        nuclear_charge (int): Z.
+        neutral_fraction (float): n0 / ne, for the charge exchange power
+            in Lz.
+        log_temperature, log_density (np.array): the grid.
+        abundances (patches.PatchTable): the patches of log10 y_k for
+            k = 0..Z.
+        moments (patches.PatchTable): the patches of <Z>, <Z**2> and
+            log10 Lz.
+    """
+    def __init__(self, element, nuclear_charge, neutral_fraction,
+            abundances, moments):
+        self.element = element
+        self.nuclear_charge = nuclear_charge
+        self.neutral_fraction = neutral_fraction
+        self.abundances = abundances
+        self.moments = moments
+        self.log_temperature = abundances.log_temperature
+        self.log_density = abundances.log_density
+
+    @classmethod
+    def build(cls, atomic_data, temperature, density, neutral_fraction=0.,
+            interpolation='linear'):
+        """Tabulate the equilibrium of an element.
+
+        Args:
+            atomic_data (AtomicData): the element.
+            temperature (array_like): increasing temperatures [eV] of the
+                grid, e.g. np.logspace(0, 4, 400).
+            density (array_like): increasing densities [m^-3] of the grid.
+            neutral_fraction (float): n0 / ne, as for Radiation.
+            interpolation (str): 'linear' for bilinear patches or 'cubic'
+                for the bicubic patches of interpolating splines.
+        """
+        if interpolation not in ('linear', 'cubic'):
+            raise ValueError("interpolation must be 'linear' or 'cubic', "
+                    "not %r." % interpolation)
+        temperature = np.asarray(temperature, dtype=np.float64)
+        density = np.asarray(density, dtype=np.float64)
+        if temperature.ndim != 1 or density.ndim != 1:
+            raise ValueError('the grid needs 1D temperature and density.')
+
+        eq = CollRadEquilibrium(atomic_data)
+        fab = eq.ionisation_stage_distribution(temperature, density,
+                grid=True)
+        Lz = Radiation(fab, 1., neutral_fraction).specific_power['total']
+
+        log_y = np.log10(np.maximum(fab.y, 10**_log10_floor))
+        moments = np.array([fab.mean_charge(), fab.mean_square_charge(),
+            np.log10(np.maximum(Lz, np.finfo(float).tiny))])
+
+        x, y = np.log10(temperature), np.log10(density)
+        def table(z):
+            if interpolation == 'linear':
+                return patches.PatchTable(x, y, patches.bilinear_table(z))
+            return patches.PatchTable.from_splines(x, y,
+                    *bspline.fit(x, y, z))
+
+        return cls(atomic_data.element, eq.nuclear_charge, neutral_fraction,
+                table(log_y), table(moments))
+
+    @property
+    def nbytes(self):
+        return self.abundances.nbytes + self.moments.nbytes
+
+    def log10_abundance(self, Te, ne=None, out=None, workspace=None):
+        """log10 of the fractional abundances, of shape (Z + 1,) + the
+        broadcast shape of Te and ne.  Te may be a PlasmaState.
+        """
+        state = as_plasma_state(Te, ne)
+        return self.abundances.evaluate(state.weights(self.abundances),
+                out=out, workspace=workspace)
+
+    def _moment(self, row, Te, ne, out, workspace):
+        state = as_plasma_state(Te, ne)
+        moments = self.moments.evaluate(state.weights(self.moments),
+                out=scratch(workspace, 'EquilibriumTable.moments',
+                    (3,) + state.shape), workspace=workspace)
+        if out is None:
+            # an array even for 0-d points, so that it can be an out=
+            return np.array(moments[row])
+        out[...] = moments[row]
+        return out
+
+    def ionisation_stage_distribution(self, Te, ne=None, out=None,
+            workspace=None):
+        """The fractional abundances as a FractionalAbundance, normalised
+        to one after interpolation.  Its atomic_data is None.
+        """
+        state = as_plasma_state(Te, ne)
+        y = self.log10_abundance(state, out=out, workspace=workspace)
+        y *= np.log(10)
+        np.exp(y, out=y)
+        y /= y.sum(axis=0)
+        return FractionalAbundance(None, y, state.temperature, state.density,
+                plasma_state=state)
+
+    def mean_charge(self, Te, ne=None, out=None, workspace=None):
+        """<Z>, see FractionalAbundance.mean_charge."""
+        return self._moment(0, Te, ne, out, workspace)
+
+    def mean_square_charge(self, Te, ne=None, out=None, workspace=None):
+        """<Z**2>, see FractionalAbundance.mean_square_charge."""
+        return self._moment(1, Te, ne, out, workspace)
+
+    def radiative_loss(self, Te, ne=None, out=None, workspace=None):
+        """Lz = P / (ne ni) [W m^3], as Radiation.specific_power['total'].
+        """
+        Lz = self._moment(2, Te, ne, out, workspace)
+        Lz *= np.log(10)
+        return np.exp(Lz, out=Lz)
+
+    def save(self, filename):
+        """Write the table to a storage.py file."""
+        storage.save(filename, {'log_temperature' : self.log_temperature,
+            'log_density' : self.log_density,
+            'abundances' : self.abundances._by_cell,
+            'moments' : self.moments._by_cell}, {'element' : self.element,
+                'nuclear_charge' : self.nuclear_charge,
+                'neutral_fraction' : self.neutral_fraction})
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Read a table written by save().  With mmap its patches are a
+        read-only view on a memory map of the file, not a copy.
+        """
+        header, arrays = storage.load(filename, mmap=mmap)
+        def table(name):
+            return patches.PatchTable(arrays['log_temperature'],
+                    arrays['log_density'], np.moveaxis(arrays[name], -1, 0))
+        return cls(header['element'], header['nuclear_charge'],
+                header['neutral_fraction'], table('abundances'),
+                table('moments'))
@@ -0,0 +1,199 @@
+"""
+An index of the adf11 files in adas_data.
+
+Instead of a hard-coded table of elements and years, the data directory is
+scanned once: every *.dat file whose name adf11.Sniffer understands (like
+'scd96_li.dat') is recorded with its element, year, class and resolved flag.
+The result is written as a small JSON manifest into the cache directory
+(see cache.py), together with the data directory's modification time, so
+later runs read one small file instead of looking for every datatype of every
+element on disk.  Adding or removing a file changes the directory's
+modification time and the index is rebuilt.
+
+When an element has data from several years, the latest year is used unless
+a year is asked for explicitly.
+"""
+import hashlib
+import json
+import os
+
+from .adf11 import Sniffer
+from . import cache
+
+# bump this when the layout of the manifest changes.
+_version = 1
+
+# symbols of the elements, by name.
+element_symbols = {
+    'hydrogen' : 'h', 'helium' : 'he', 'lithium' : 'li', 'beryllium' : 'be',
+    'boron' : 'b', 'carbon' : 'c', 'nitrogen' : 'n', 'oxygen' : 'o',
+    'fluorine' : 'f', 'neon' : 'ne', 'sodium' : 'na', 'magnesium' : 'mg',
+    'aluminium' : 'al', 'aluminum' : 'al', 'silicon' : 'si',
+    'phosphorus' : 'p', 'sulphur' : 's', 'sulfur' : 's', 'chlorine' : 'cl',
+    'argon' : 'ar', 'potassium' : 'k', 'calcium' : 'ca', 'scandium' : 'sc',
+    'titanium' : 'ti', 'vanadium' : 'v', 'chromium' : 'cr',
+    'manganese' : 'mn', 'iron' : 'fe', 'cobalt' : 'co', 'nickel' : 'ni',
+    'copper' : 'cu', 'zinc' : 'zn', 'gallium' : 'ga', 'germanium' : 'ge',
+    'arsenic' : 'as', 'selenium' : 'se', 'bromine' : 'br', 'krypton' : 'kr',
+    'rubidium' : 'rb', 'strontium' : 'sr', 'yttrium' : 'y',
+    'zirconium' : 'zr', 'niobium' : 'nb', 'molybdenum' : 'mo',
+    'technetium' : 'tc', 'ruthenium' : 'ru', 'rhodium' : 'rh',
+    'palladium' : 'pd', 'silver' : 'ag', 'cadmium' : 'cd', 'indium' : 'in',
+    'tin' : 'sn', 'antimony' : 'sb', 'tellurium' : 'te', 'iodine' : 'i',
+    'xenon' : 'xe', 'caesium' : 'cs', 'cesium' : 'cs', 'barium' : 'ba',
+    'hafnium' : 'hf', 'tantalum' : 'ta', 'tungsten' : 'w', 'rhenium' : 're',
+    'osmium' : 'os', 'iridium' : 'ir', 'platinum' : 'pt', 'gold' : 'au',
+    'mercury' : 'hg', 'lead' : 'pb', 'bismuth' : 'bi', 'uranium' : 'u',
+}
+
+
+def symbol(element):
+    """'Lithium' -> 'li', 'Li' -> 'li'"""
+    e = element.lower()
+    return element_symbols.get(e, e)
+
+
+def year_key(year):
+    """Sort key for the two digit ADAS years: '89' < '96' < '00' < '12'.
+
+    Years below 50 are taken to be in the 21st century.
+    """
+    y = int(year)
+    return y + (2000 if y < 50 else 1900)
+
+
+def scan(directory):
+    """Index the adf11 files in a directory.
+
+    Returns:
+        a list of [name, element, year, class, resolved] entries.
+    """
+    entries = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.dat'):
+            continue
+        try:
+            s = Sniffer(name, check=False)
+            year_key(s.year.rstrip('r'))
+        except ValueError:
+            continue # not an adf11 file, e.g. adf15.
+        entries.append([name, s.element, s.year.rstrip('r'), s.class_,
+            s.resolved])
+    return entries
+
+
+def manifest_name(directory):
+    """The manifest file of a data directory, or None without a cache."""
+    if cache.directory is None:
+        return None
+    path = os.path.realpath(directory)
+    key = hashlib.sha1(path.encode()).hexdigest()[:12]
+    return os.path.join(cache.directory, 'manifest-%s.json' % key)
+
+
+def read(directory):
+    """Read the manifest of a directory.
+
+    Returns:
+        The list of entries, or None if there is no manifest or it is out
+        of date.
+    """
+    try:
+        with open(manifest_name(directory)) as f:
+            manifest = json.load(f)
+    except (IOError, OSError, TypeError, ValueError):
+        return None
+
+    if manifest.get('version') != _version:
+        return None
+    if manifest.get('mtime_ns') != os.stat(directory).st_mtime_ns:
+        return None
+    return manifest['files']
+
+
+def write(directory, entries, mtime_ns):
+    """Write the manifest; it is not an error if this fails.
+
+    Args:
+        mtime_ns: the modification time of directory when it was scanned.
+    """
+    filename = manifest_name(directory)
+    if filename is None:
+        return
+
+    tmpname = filename + '.%d.tmp' % os.getpid()
+    try:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(tmpname, 'w') as f:
+            json.dump({'version' : _version, 'mtime_ns' : mtime_ns,
+                'files' : entries}, f, separators=(',', ':'))
+        os.replace(tmpname, filename)
+    except (IOError, OSError):
+        pass
+
+
+class ElementIndex(object):
+    """Answers which adf11 files there are for an element.
+
+    Attributes:
+        directory (str): the indexed directory.
+        entries (list): [name, element, year, class, resolved] for every file.
+    """
+    def __init__(self, directory, entries):
+        self.directory = directory
+        self.entries = entries
+        self.mtime_ns = None
+
+    @classmethod
+    def from_directory(cls, directory):
+        """Read the directory's manifest, or scan it and write one."""
+        mtime_ns = os.stat(directory).st_mtime_ns
+        entries = read(directory)
+        if entries is None:
+            entries = scan(directory)
+            write(directory, entries, mtime_ns)
+        index = cls(directory, entries)
+        index.mtime_ns = mtime_ns
+        return index
+
+    def is_current(self):
+        """False if files were added or removed since the index was made."""
+        try:
+            return self.mtime_ns == os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return False
+
+    def elements(self):
+        """The symbols of all elements with unresolved data."""
+        return sorted(set(e[1] for e in self.entries if not e[4]))
+
+    def years(self, element):
+        """The years of unresolved data for an element, oldest first."""
+        s = symbol(element)
+        years = set(e[2] for e in self.entries if e[1] == s and not e[4])
+        return sorted(years, key=year_key)
+
+    def files(self, element, year=None):
+        """The unresolved adf11 files of an element.
+
+        Args:
+            element (str): a name like 'Li' or 'lithium'.
+            year (str or int): the year of the data; default is the latest.
+
+        Returns:
+            a dictionary of file names with the classes as keys, like
+            {'scd' : 'scd96_li.dat', 'acd' : 'acd96_li.dat', ...}
+        """
+        years = self.years(element)
+        if not years:
+            raise NotImplementedError('unknown element: %s' % element)
+        if year is None:
+            year = years[-1]
+        year = '%02d' % int(year)
+        if year not in years:
+            raise NotImplementedError('no data for %s from year %s.' %
+                    (element, year))
+
+        s = symbol(element)
+        return {e[3] : e[0] for e in self.entries
+                if e[1] == s and e[2] == year and not e[4]}
@@ -0,0 +1,93 @@
+"""
+Memoization of rate coefficient evaluations.
+
+The same temperature and density profiles often go through
+CollRadEquilibrium, Radiation, ElectronCooling and RateEquations in turn,
+and each of them evaluates the ionisation and recombination coefficients
+again at the same points.  A RateCoefficient with a memo keeps what it has
+evaluated, keyed by a hash of the contents of the temperature and density
+arrays (see PlasmaState.fingerprint), and copies it out the next time it
+is asked for at the same points:
+
+    >>> ad = atomic.element('argon')                             # doctest: +SKIP
+    >>> memo = ad.memoize(max_bytes=2**27)                       # doctest: +SKIP
+    >>> y = atomic.CollRadEquilibrium(ad).ionisation_stage_distribution(
+    ...         Te, ne)                                          # doctest: +SKIP
+    >>> atomic.ElectronCooling(y).power                          # doctest: +SKIP
+    >>> memo.hits, memo.misses                                   # doctest: +SKIP
+
+It is off unless asked for: hashing the points costs about as much as
+copying them, which is far less than an evaluation, but a memo that never
+hits is a waste of that and of memory.  One memo can be shared by many
+RateCoefficients.  The least recently used results are dropped when they
+take more than max_bytes.
+"""
+import threading
+from collections import OrderedDict
+
+
+class EvaluationCache(object):
+    """A least recently used cache of arrays, with a budget of bytes.
+
+    Attributes:
+        max_bytes (int): the most bytes the arrays may take.  An array
+            larger than that is never kept.
+        hits, misses (int): how many get() found their key or not.
+        evictions (int): how many arrays were dropped for the budget.
+    """
+    def __init__(self, max_bytes=2**27):
+        self.max_bytes = max_bytes
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def __getstate__(self):
+        # a memo is not worth sending to other processes; they start empty.
+        return {'max_bytes' : self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __repr__(self):
+        return '<%s %d arrays, %d bytes, hits=%d misses=%d evictions=%d>' % (
+                self.__class__.__name__, len(self), self.nbytes, self.hits,
+                self.misses, self.evictions)
+
+    def get(self, key):
+        """The array kept for key, or None.  It must not be written to."""
+        with self._lock:
+            a = self._arrays.get(key)
+            if a is None:
+                self.misses += 1
+                return None
+            self._arrays.move_to_end(key)
+            self.hits += 1
+            return a
+
+    def put(self, key, a):
+        """Keep the array a for key, dropping the least recently used
+        arrays to stay within max_bytes.  a is made read-only.
+        """
+        if a.nbytes > self.max_bytes:
+            return
+        a.flags.writeable = False
+        with self._lock:
+            old = self._arrays.pop(key, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._arrays[key] = a
+            self.nbytes += a.nbytes
+            while self.nbytes > self.max_bytes:
+                _, dropped = self._arrays.popitem(last=False)
+                self.nbytes -= dropped.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all arrays.  The counters are kept."""
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
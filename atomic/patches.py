@@ -0,0 +1,395 @@
+"""
+The interpolating splines of a RateCoefficient as bicubic patches.
+
+Inside one cell of the (log_temperature, log_density) grid, the spline of a
+charge state is a bicubic polynomial.  In the coordinates u, v in [0, 1]
+across the cell it is
+
+    p(u, v) = sum_{a,b} A[a, b] u**a v**b
+
+patch_table() computes the 16 coefficients A of every cell of every charge
+state from the B-spline coefficients.  Evaluating a point is then a lookup of
+its cell and two Horner schemes, which ScalarEvaluator does in plain python
+arithmetic for one point at a time, without any numpy overhead.
+
+PatchTable is the interpolant of RateCoefficient(interpolation='patches').
+It keeps the patches with the charge states last, so that the coefficients
+of all charge states in a cell lie next to each other in memory.  The cells
+of a block of points are gathered at once and multiplied by the 16
+monomials u**a v**b of every point in one matrix product, which for heavy
+elements is several times faster than the sum over the B-spline basis.
+The table can be saved to a storage.py file and memory mapped from there.
+It agrees with the splines to rounding, about 1e-12 in log10 of the
+coefficients.
+
+RateCoefficient(interpolation='linear') uses a PatchTable of bilinear
+patches, from bilinear_table(), which interpolate the tables linearly in
+(log_temperature, log_density).  Such a patch is a mean of the four corners
+of its cell with weights >= 0, so it never leaves the range of the table
+values around it: there is no overshoot at steep edges, and it is monotone
+wherever the table is.  See benchmarks/linear_error.py for how far it is
+from the splines.
+
+On a grid of points the patches are, like the splines, a product of basis
+matrices of the two axes and a matrix of coefficients (see
+bspline.contract_grid), with the basis functions u**a of every cell: in the
+basis matrix of x, the row of x[i] holds u**a in the columns of its cell.
+"""
+import math
+import struct
+from bisect import bisect_right
+
+import numpy as np
+
+from . import bspline, storage
+from .workspace import scratch
+
+# a cubic polynomial on [0, 1] from its values at these points.
+_u = np.array([0., 1/3., 2/3., 1.])
+_from_values = np.linalg.inv(np.vander(_u, 4, increasing=True))
+
+
+def cell_polynomials(t, x):
+    """The B-splines on each cell [x[i], x[i+1]] as cubic polynomials in u.
+
+    Args:
+        t (np.array): the knots.
+        x (np.array): the grid, every point of which is in t.
+
+    Returns:
+        (l, P): the knot interval l[i] of each cell and P of shape
+            (len(x) - 1, 4, 4), such that the spline with coefficients c is
+            sum_a u**a sum_r P[i, a, r] c[l[i] - 3 + r] on cell i.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    h = np.diff(x)
+    _, l = bspline.locate(t, x[:-1] + h / 2)
+    points = x[:-1, np.newaxis] + h[:, np.newaxis] * _u
+    b = bspline.basis(t, points, l[:, np.newaxis])
+    return l, np.einsum('ap,rip->iar', _from_values, b)
+
+
+def patch_table(x, y, tx, ty, c):
+    """The bicubic patches of splines on the grid (x, y).
+
+    Args:
+        x, y (np.array): the grid.
+        tx, ty, c: the knots and, shape (nz, ncoeffs), the coefficients of
+            nz splines, like from bspline.fit().
+
+    Returns:
+        A (np.array): shape (nz, len(x) - 1, len(y) - 1, 4, 4), with
+            A[z, i, j, a, b] the coefficient of u**a v**b in cell (i, j).
+    """
+    lx, Px = cell_polynomials(tx, x)
+    ly, Py = cell_polynomials(ty, y)
+
+    ny = len(ty) - bspline.degree - 1
+    c = np.asarray(c).reshape(len(c), -1, ny)
+    ix = lx[:, np.newaxis] - bspline.degree + np.arange(4)
+    iy = ly[:, np.newaxis] - bspline.degree + np.arange(4)
+    blocks = c[:, ix[:, np.newaxis, :, np.newaxis], iy[np.newaxis, :, np.newaxis, :]]
+    return np.einsum('iar,zijrs,jbs->zijab', Px, blocks, Py, optimize=True)
+
+
+def locate(x, X):
+    """Find the cell x[i] <= X <= x[i+1] of every X.
+
+    Points outside the grid are moved onto its edge.
+
+    Returns:
+        (i, u): the cells, and the position 0 <= u <= 1 of X across them.
+    """
+    n = len(x)
+    X = np.clip(X, x[0], x[-1])
+    i = np.searchsorted(x, X, side='right') - 1
+    i = np.clip(i, 0, n - 2)
+    u = (X - x[i]) / (x[i + 1] - x[i])
+    return i, u
+
+
+def bilinear_table(z):
+    """The bilinear patches interpolating a stack of tables.
+
+    Args:
+        z (np.array): shape (nz, nx, ny), the tables on the grid.
+
+    Returns:
+        A (np.array): shape (nz, nx - 1, ny - 1, 2, 2), like patch_table().
+    """
+    z = np.asarray(z, dtype=np.float64)
+    f00 = z[:, :-1, :-1]
+    f01 = z[:, :-1, 1:]
+    f10 = z[:, 1:, :-1]
+    f11 = z[:, 1:, 1:]
+
+    A = np.empty(f00.shape + (2, 2))
+    A[..., 0, 0] = f00
+    A[..., 0, 1] = f01 - f00
+    A[..., 1, 0] = f10 - f00
+    A[..., 1, 1] = (f11 - f10) - (f01 - f00)
+    return A
+
+
+def weights(x, y, X, Y, degree=3, derivative=(0, 0)):
+    """The cells and monomials of the points (X, Y) on the grid (x, y).
+
+    Args:
+        derivative (tuple): the orders (0 or 1) of the derivative in X and
+            Y, which are zero outside the grid.
+
+    Returns:
+        (cell, w): cell of shape X.shape, the flat index i * (len(y) - 1) + j
+            of the cells (i, j), and w of shape X.shape + (n * n,), with
+            w[..., n * a + b] = u**a v**b (or its derivative) and
+            n = degree + 1.
+    """
+    i, u = locate(x, X)
+    j, v = locate(y, Y)
+    cell = i * (len(y) - 1) + j
+    n = degree + 1
+    upowers = _powers(u, n, derivative[0], x, i, X)
+    vpowers = _powers(v, n, derivative[1], y, j, Y)
+
+    w = np.empty(np.shape(cell) + (n * n,))
+    for a in range(n):
+        for b in range(n):
+            w[..., n * a + b] = upowers[a] * vpowers[b]
+    return cell, w
+
+
+def contract_cells(coeffs, weights, stages=slice(None), out=None,
+        workspace=None, block=1024):
+    """Evaluate polynomials kept per cell, with the charge states last.
+
+    Args:
+        coeffs (np.array): shape (ncells, nterms, nz), the coefficients of
+            the terms of every charge state in every cell.
+        weights: (cell, w), the cell of every point and, of shape
+            cell.shape + (nterms,), the value of the terms there.
+        stages (slice): the charge states.
+        out (np.array): optional array for the result.
+        workspace (Workspace): optional scratch arrays.
+        block (int): the number of coefficients per charge state gathered
+            for one matrix product.
+
+    Returns:
+        np.array of shape (number of stages,) + cell.shape.
+    """
+    cell, w = weights
+    nterms = w.shape[-1]
+    coeffs = coeffs[..., stages]
+    nz = coeffs.shape[-1]
+    shape = (nz,) + cell.shape
+    if out is None:
+        out = np.empty(shape)
+    result = out
+    if not out.flags.c_contiguous:
+        result = scratch(workspace, 'contract_cells.result', shape)
+
+    cell = cell.reshape(-1)
+    w = w.reshape(-1, 1, nterms)
+    flat = result.reshape(nz, -1)
+    chunk = max(1, block // nterms)
+    gathered = scratch(workspace, 'contract_cells.block', (chunk, nterms, nz))
+    product = scratch(workspace, 'contract_cells.product', (chunk, 1, nz))
+    for start in range(0, len(cell), chunk):
+        n = min(chunk, len(cell) - start)
+        np.take(coeffs, cell[start:start + n], axis=0, out=gathered[:n],
+                mode='clip')
+        np.matmul(w[start:start + n], gathered[:n], out=product[:n])
+        flat[:, start:start + n] = product[:n, 0].T
+
+    if result is not out:
+        out[...] = result
+    return out
+
+
+def _powers(u, n, derivative, x, i, X):
+    """u**a for a < n, or their derivatives with respect to X."""
+    powers = [np.ones_like(u), u, u * u, u * u * u][:n]
+    if derivative:
+        inside = (X >= x[0]) & (X <= x[-1])
+        scale = inside / (x[i + 1] - x[i])
+        powers = [a * p * scale for a, p in
+                enumerate([np.zeros_like(u)] + powers[:-1])]
+    return powers
+
+
+def grid_weights(x, X, degree=3):
+    """The basis matrix of the axis X of a grid on the cells of x, of shape
+    (len(X), (len(x) - 1) * n), with u**a of X[i] at [i, n * cell + a].
+    """
+    i, u = locate(x, np.asarray(X, dtype=np.float64))
+    n = degree + 1
+    return bspline.dense(n * i, _powers(u, n, 0, x, i, X), (len(x) - 1) * n)
+
+
+class PatchTable(object):
+    """The patches of all charge states, as an interpolant.
+
+    See bspline.Splines for what an interpolant is.
+
+    Attributes:
+        log_temperature, log_density (np.array): the grid.
+        table (np.array): the patches, from patch_table() or
+            bilinear_table().  This is a view of an array of shape
+            (len(x) - 1, len(y) - 1, n, n, nz), in which they are kept.
+        degree (int): 3 for bicubic patches, 1 for bilinear ones.
+        block (int): the number of patch coefficients per charge state
+            gathered for one matrix product, e.g. 64 points of bicubic
+            patches.
+    """
+    block = 1024
+
+    def __init__(self, log_temperature, log_density, table):
+        self.log_temperature = log_temperature
+        self.log_density = log_density
+        self._by_cell = np.ascontiguousarray(np.moveaxis(table, 0, -1))
+        self.table = np.moveaxis(self._by_cell, -1, 0)
+        self.degree = self.table.shape[-1] - 1
+
+    @classmethod
+    def from_splines(cls, log_temperature, log_density, tx, ty, c):
+        return cls(log_temperature, log_density,
+                patch_table(log_temperature, log_density, tx, ty, c))
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def key(self):
+        return ('patches', self.degree, self.log_temperature.tobytes(),
+                self.log_density.tobytes())
+
+    @property
+    def nbytes(self):
+        return self._by_cell.nbytes
+
+    def weights(self, x, y, derivative=(0, 0)):
+        return weights(self.log_temperature, self.log_density, x, y,
+                self.degree, derivative)
+
+    def evaluate(self, weights, stages=slice(None), out=None,
+            workspace=None):
+        """As bspline.Splines.evaluate."""
+        nterms = weights[1].shape[-1]
+        return contract_cells(self._by_cell.reshape(-1, nterms, len(self)),
+                weights, stages, out=out, workspace=workspace,
+                block=self.block)
+
+    def grid_weights(self, x, y):
+        return (grid_weights(self.log_temperature, x, self.degree),
+                grid_weights(self.log_density, y, self.degree))
+
+    def evaluate_grid(self, weights, stages=slice(None), out=None):
+        """As bspline.Splines.evaluate_grid.
+
+        The first call makes a copy of the table with the cells in the
+        order of the basis matrices, which is then kept.
+        """
+        by_stage = getattr(self, '_by_stage', None)
+        if by_stage is None:
+            nx, ny, n = self.table.shape[1:4]
+            by_stage = np.ascontiguousarray(self.table.transpose(0, 1, 3, 2,
+                4)).reshape(len(self), nx * n, ny * n)
+            self._by_stage = by_stage
+        Bx, By = weights
+        return bspline.contract_grid(by_stage[stages], Bx, By, out=out)
+
+    def save(self, filename):
+        """Write the table to a storage.py file."""
+        storage.save(filename, {'log_temperature' : self.log_temperature,
+            'log_density' : self.log_density, 'patches' : self._by_cell})
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Read a table written by save().  With mmap the table is a
+        read-only view on a memory map of the file, not a copy.
+        """
+        arrays = storage.load(filename, mmap=mmap)[1]
+        return cls(arrays['log_temperature'], arrays['log_density'],
+                np.moveaxis(arrays['patches'], -1, 0))
+
+
+class ScalarEvaluator(object):
+    """Evaluates a RateCoefficient at one point at a time, quickly.
+
+    RateCoefficient.__call__ is made for arrays; for a single point most of
+    its time goes into argument checking and array set-up.  This looks up
+    the cell of the point with bisect, unpacks its 16 coefficients (4 for
+    bilinear patches) from the flat table in one go and evaluates the patch
+    with python floats.  Points
+    outside the grid are moved onto its edge, as by the spline.
+
+        >>> f = rc.scalar_evaluator()                       # doctest: +SKIP
+        >>> f(k, 50., 1e19) # == rc(k, 50., 1e19)           # doctest: +SKIP
+
+    Args:
+        x, y (np.array): the grid, log10 of temperature and density.
+        table (np.array): the patches, from patch_table() or
+            bilinear_table().
+    """
+    def __init__(self, x, y, table):
+        self.nuclear_charge = len(table)
+        self._x = [float(v) for v in x]
+        self._y = [float(v) for v in y]
+        self._inverse_dx = [float(v) for v in 1 / np.diff(x)]
+        self._inverse_dy = [float(v) for v in 1 / np.diff(y)]
+        self._nx = len(x) - 1
+        self._ny = len(y) - 1
+        self._table = np.ascontiguousarray(table, dtype=np.float64)
+        self._bytes = memoryview(self._table).cast('B')
+        self.degree = self._table.shape[-1] - 1
+        n = (self.degree + 1)**2
+        self._patch = struct.Struct('=%dd' % n)
+        self._patch_bytes = 8 * n
+
+    def __call__(self, k, Te, ne):
+        """The coefficient of charge state k at Te [eV], ne [m^-3]."""
+        return 10 ** self.log10(k, Te, ne)
+
+    def log10(self, k, Te, ne):
+        if not 0 <= k < self.nuclear_charge:
+            raise IndexError('no charge state %d' % k)
+
+        # the cells, inlined as this is the hot path.
+        x = math.log10(Te)
+        grid = self._x
+        if x <= grid[0]:
+            i, u = 0, 0.
+        elif x >= grid[-1]:
+            i, u = self._nx - 1, 1.
+        else:
+            i = bisect_right(grid, x) - 1
+            u = (x - grid[i]) * self._inverse_dx[i]
+
+        y = math.log10(ne)
+        grid = self._y
+        if y <= grid[0]:
+            j, v = 0, 0.
+        elif y >= grid[-1]:
+            j, v = self._ny - 1, 1.
+        else:
+            j = bisect_right(grid, y) - 1
+            v = (y - grid[j]) * self._inverse_dy[j]
+
+        a = self._patch.unpack_from(self._bytes,
+                self._patch_bytes * ((k * self._nx + i) * self._ny + j))
+        if self.degree == 1:
+            a00, a01, a10, a11 = a
+            return (a11 * v + a10) * u + a01 * v + a00
+
+        (a00, a01, a02, a03, a10, a11, a12, a13,
+         a20, a21, a22, a23, a30, a31, a32, a33) = a
+        p0 = ((a03 * v + a02) * v + a01) * v + a00
+        p1 = ((a13 * v + a12) * v + a11) * v + a10
+        p2 = ((a23 * v + a22) * v + a21) * v + a20
+        p3 = ((a33 * v + a32) * v + a31) * v + a30
+        return ((p3 * u + p2) * u + p1) * u + p0
+
+    def evaluate(self, k, Te, ne):
+        """A few points at once: Te and ne are sequences of equal length."""
+        log10 = self.log10
+        return [10 ** log10(k, t, n) for t, n in zip(Te, ne)]
+
@@ -57,6 +57,19 @@ class TransitionPool(object):
         obj.append_files(files)
         return obj
 
+    @classmethod
+    def from_database(cls, database, pattern='*'):
+        """Make a TransitionPool from the adf15 files in a packed database.
+
+        Args:
+            database: a database.Database.
+            pattern: shell-style pattern of the file names, like 'pec96#c*'.
+        """
+        obj = cls()
+        for name in database.adf15_names(pattern):
+            obj.append_adf15_data(database.adf15(name))
+        return obj
+
     def create_atomic_data(self, ad):
         keys = [('ex', 'line_power'), ('rec', 'continuum_power'),
                 ('cx', 'cx_power')]
@@ -78,7 +91,10 @@ class TransitionPool(object):
             self.append_file(f)
 
     def append_file(self, filename):
-        f = Adf15(filename).read()
+        self.append_adf15_data(Adf15(filename).read())
+
+    def append_adf15_data(self, f):
+        """Append the transitions of the output of Adf15.read()."""
         element = f['element']
         nuclear_charge = f['nuclear_charge']
         charge = f['charge']
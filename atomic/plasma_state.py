@@ -0,0 +1,92 @@
+"""
+Temperatures and densities at which many rate coefficients are evaluated.
+
+Evaluating a RateCoefficient takes the logarithms of Te and ne, finds the
+grid interval of every point and computes the spline basis there, before
+the (cheap) sum over the coefficients.  A PlasmaState does the first part
+once: it keeps the logarithms, and the interval indices and basis weights
+for every coefficient grid (and interpolation) it has been evaluated on.
+The datatypes of an element are usually all tabulated on the same grid, so
+evaluating a dozen of them at the same points locates the points only once:
+
+    >>> state = PlasmaState(Te, ne)                              # doctest: +SKIP
+    >>> S = ad.coeffs['ionisation'].evaluate_all(state)          # doctest: +SKIP
+    >>> alpha = ad.coeffs['recombination'].evaluate_all(state)   # doctest: +SKIP
+
+A PlasmaState can be given wherever (Te, ne) are, in place of both.
+The weights take 256 bytes per point and grid.
+"""
+import hashlib
+
+import numpy as np
+
+
+class PlasmaState(object):
+    """Temperatures and densities, with their spline basis per grid.
+
+    Attributes:
+        temperature (np.array): temperatures [eV].
+        density (np.array): densities [m^-3], broadcast against temperature.
+        log_temperature (np.array): log10(temperature).
+        log_density (np.array): log10(density).
+    """
+    def __init__(self, temperature, density):
+        self.temperature, self.density = np.broadcast_arrays(
+                np.asarray(temperature, dtype=np.float64),
+                np.asarray(density, dtype=np.float64))
+        self.log_temperature = np.log10(self.temperature)
+        self.log_density = np.log10(self.density)
+        self._weights = {}
+
+    @property
+    def shape(self):
+        return self.temperature.shape
+
+    @property
+    def fingerprint(self):
+        """A hash of the shape and the contents of temperature and density,
+        which is the same for PlasmaStates of equal arrays.  See memo.py.
+        """
+        fingerprint = getattr(self, '_fingerprint', None)
+        if fingerprint is None:
+            h = hashlib.blake2b(repr(self.shape).encode(), digest_size=16)
+            h.update(np.ascontiguousarray(self.temperature).data)
+            h.update(np.ascontiguousarray(self.density).data)
+            fingerprint = self._fingerprint = h.digest()
+        return fingerprint
+
+    def weights(self, interpolant, derivative=(0, 0)):
+        """interpolant.weights() at the points, like bspline.Splines or
+        patches.PatchTable, for the derivative of the given orders in
+        log_temperature and log_density.
+
+        They are computed on the first call for an interpolant.key and
+        derivative, and then kept.
+        """
+        key = interpolant.key, tuple(derivative)
+        w = self._weights.get(key)
+        if w is None:
+            w = interpolant.weights(self.log_temperature, self.log_density,
+                    derivative)
+            self._weights[key] = w
+        return w
+
+    def grids(self):
+        """How many coefficient grids the basis has been computed for."""
+        return len(set(key for key, derivative in self._weights))
+
+
+def as_plasma_state(Te, ne=None):
+    """Make a PlasmaState of Te and ne, unless Te is one already.
+
+    Args:
+        Te (array_like or PlasmaState): temperature [eV].
+        ne (array_like): density [m^-3]; None if Te is a PlasmaState.
+    """
+    if isinstance(Te, PlasmaState):
+        if ne is not None:
+            raise TypeError('no density can be given with a PlasmaState.')
+        return Te
+    if ne is None:
+        raise TypeError('a density is needed with a temperature.')
+    return PlasmaState(Te, ne)
@@ -1,7 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from .atomic_data import ZeroCoefficient
-from functools import reduce
+from .workspace import scratch
 
 
 class Radiation(object):
@@ -9,8 +9,9 @@ class Radiation(object):
     Attributes:
         y: a FractionalAbundance object.
         atomic_data: that FrAb's atomic data.
-        temperature (np.array): that FrAb's temperature list.
-        electron_density (np.array): that FrAb's density list.
+        temperature (np.array): that FrAb's temperatures.
+        electron_density (np.array or float): that FrAb's densities.
+            The powers have the broadcast shape of the two.
         impurity_fraction: ???
             n_impurity = n_e * impurity_fraction
         neutral_fraction: fraction of neutral hydrogen, for cx_power.
@@ -59,49 +60,104 @@ class Radiation(object):
         power_coeffs = {}
         for key in ['line_power', 'continuum_power', 'cx_power']:
             power_coeffs[key] = self.atomic_data.coeffs.get(key,
-                    ZeroCoefficient())
+                    ZeroCoefficient(self.atomic_data.nuclear_charge))
         return power_coeffs
 
-    def _compute_power(self):
+    def _compute_power(self, out=None, workspace=None):
         """
         Compute radiation power density in [W/m3].
-        """
-        shape_ = self.atomic_data.nuclear_charge, self.temperature.shape[0]
 
+        Args:
+            out (dict): optional arrays for the results, with the keys
+                of the returned dictionary.
+            workspace (Workspace): optional scratch arrays.
+
+        Returns:
+            {'line_power', 'continuum_power', 'cx_power', 'total'}, each
+            summed over all ionisation stages.
+        """
         power_coeffs = self._get_power_coeffs()
-        radiation_power = {}
-        for key in list(power_coeffs.keys()):
-            radiation_power[key] = np.zeros(shape_)
+        radiation_power = {} if out is None else out
 
         ne = self.electron_density
         ni = self.get_impurity_density()
         n0 = self.get_neutral_density()
         y = self.y
+        state = y.plasma_state
 
-        for k in range(self.atomic_data.nuclear_charge):
-            for key in list(radiation_power.keys()):
-                coeff = power_coeffs[key](k, self.temperature,
-                        self.electron_density)
+        coeff = scratch(workspace, 'Radiation.coeff',
+                (self.atomic_data.nuclear_charge,) + state.shape)
+        for key in list(power_coeffs.keys()):
+            # all ionisation stages at once, shape (nuclear_charge, ...)
+            power_coeffs[key].evaluate_all(state, out=coeff,
+                    workspace=workspace)
+
+            if key in ['continuum_power', 'line_power']:
+                if key in ['continuum_power']:
+                    coeff *= y.y[1:]
+                else:
+                    coeff *= y.y[:-1]
+                density = ne
+            elif key in ['cx_power']:
+                coeff *= y.y[:-1]
+                density = n0
+
+            # sum over all ionisation stages
+            power = np.sum(coeff, axis=0, out=radiation_power.get(key))
+            power *= density
+            power *= ni
+            radiation_power[key] = power
 
-                if key in ['continuum_power', 'line_power']:
-                    if key in ['continuum_power']:
-                        scale = ne * ni * y.y[k + 1]
-                    else:
-                        scale = ne * ni * y.y[k]
-                elif key in ['cx_power']:
-                    scale = n0 * ni * y.y[k]
+        # compute the total power
+        total = np.add(radiation_power['line_power'],
+                radiation_power['continuum_power'],
+                out=radiation_power.get('total'))
+        total += radiation_power['cx_power']
+        radiation_power['total'] = total
 
-                radiation_power[key][k] = scale * coeff
+        return radiation_power
 
-        # compute the total power
-        radiation_power['total'] = reduce(lambda x,y: x+y,
-                list(radiation_power.values()))
+    def temperature_derivative(self):
+        """The derivative of the power densities with respect to temperature,
+        at fixed densities, in [W/m3/eV].
 
-        # sum over all ionisation stages
-        for key in list(radiation_power.keys()):
-            radiation_power[key] = radiation_power[key].sum(0)
+        It uses the analytic derivatives of the power coefficients and, if
+        the FractionalAbundance has one, its dy_dTe (see
+        CollRadEquilibrium.ionisation_stage_distribution(derivative=True));
+        without it the abundances are held fixed.
 
-        return radiation_power
+        Returns:
+            {'line_power', 'continuum_power', 'cx_power', 'total'}, as
+            power.
+        """
+        power_coeffs = self._get_power_coeffs()
+        derivative = {}
+
+        ne = self.electron_density
+        ni = self.get_impurity_density()
+        n0 = self.get_neutral_density()
+        y = self.y
+        dy = y.dy_dTe
+        state = y.plasma_state
+
+        for key in list(power_coeffs.keys()):
+            if key in ['continuum_power']:
+                stages = slice(1, None)
+            else:
+                stages = slice(None, -1)
+            density = n0 if key in ['cx_power'] else ne
+
+            dP = power_coeffs[key].derivative_all(state) * y.y[stages]
+            if dy is not None:
+                dP += power_coeffs[key].evaluate_all(state) * dy[stages]
+            dP = np.sum(dP, axis=0)
+            dP *= density
+            dP *= ni
+            derivative[key] = dP
+
+        derivative['total'] = (derivative['line_power']
+                + derivative['continuum_power'] + derivative['cx_power'])
+        return derivative
 
     def plot(self, **kwargs):
         """Plot the specific power for line_power, continuum_power,
@@ -0,0 +1,178 @@
+"""
+AtomicData in shared memory, for multiprocessing workers.
+
+Sending an AtomicData to a worker process pickles all its tables and splines,
+and the worker keeps its own copy of them.  Instead, AtomicData.share() puts
+the tables and the spline knots and coefficients of every RateCoefficient
+into one multiprocessing.shared_memory block and returns a small, picklable
+handle.  AtomicData.attach(handle) in a worker builds an AtomicData whose
+arrays are read-only views on that block: nothing is copied or refitted.
+
+    >>> handle = atomic.element('argon').share()          # doctest: +SKIP
+    >>> def init(h):
+    ...     global ad
+    ...     ad = atomic.AtomicData.attach(h)
+    >>> pool = multiprocessing.Pool(8, init, (handle,))   # doctest: +SKIP
+    ...
+    >>> handle.unlink() # when all workers are done        # doctest: +SKIP
+
+The process that called share() owns the block and must keep the handle
+alive while workers use it, and unlink() it at the end.
+"""
+import os
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+_alignment = 64
+
+_attach_lock = threading.Lock()
+
+_array_names = ['log_temperature', 'log_density', 'log_coeff',
+        'knots_temperature', 'knots_density', 'spline_coeffs']
+
+
+class SharedAtomicData(object):
+    """Handle of an AtomicData in shared memory.
+
+    Only the name of the shared memory block and the layout of the arrays
+    in it are pickled, so it is cheap to send to other processes.
+
+    Attributes:
+        name (str): the name of the shared memory block.
+        layout (dict): for each datatype, 'charge', 'element', 'name' and
+            the (offset, shape, dtype) of its arrays.
+    """
+    def __init__(self, name, layout, shm=None):
+        self.name = name
+        self.layout = layout
+        self._shm = shm
+
+    def __getstate__(self):
+        return {'name' : self.name, 'layout' : self.layout, '_shm' : None}
+
+    def unlink(self):
+        """Free the shared memory block. Only call this from the process
+        that made it, when no worker needs it any more.
+
+        The block is unmapped once no attached AtomicData in this process
+        uses it any more.
+        """
+        if self._shm is not None:
+            if os.name == 'posix' and sys.version_info < (3, 13):
+                # workers may have taken it off the resource tracker, see
+                # _attach_shared_memory; unlinking takes it off again.
+                resource_tracker.register(self._shm._name, 'shared_memory')
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+
+def share(atomic_data):
+    """Copy the arrays of an AtomicData into a new shared memory block.
+
+    Every datatype of the AtomicData is loaded.
+
+    Returns:
+        A SharedAtomicData handle.
+    """
+    arrays = {}
+    layout = {}
+    offset = 0
+    for key, rc in atomic_data.coeffs.items():
+        d = {'log_temperature' : rc.log_temperature,
+                'log_density' : rc.log_density, 'log_coeff' : rc.log_coeff}
+        d.update(rc.spline_arrays())
+
+        entry = {'charge' : int(rc.nuclear_charge), 'element' : rc.element,
+                'name' : rc.adf11_file, 'interpolation' : rc.interpolation,
+                'arrays' : {}}
+        for array_name in _array_names:
+            a = np.ascontiguousarray(d[array_name], dtype=np.float64)
+            arrays[key, array_name] = (offset, a)
+            entry['arrays'][array_name] = (offset, a.shape, a.dtype.str)
+            offset += -(-a.nbytes // _alignment) * _alignment
+        layout[key] = entry
+
+    shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for offset, a in arrays.values():
+        shm.buf[offset:offset + a.nbytes] = a.tobytes()
+
+    return SharedAtomicData(shm.name, layout, shm)
+
+
+def attach(handle, cls=None):
+    """Make an AtomicData from the shared memory block of a handle.
+
+    Args:
+        handle (SharedAtomicData): the result of share().
+        cls: the AtomicData class to make.
+
+    Returns:
+        An AtomicData whose arrays are read-only views on the shared memory.
+    """
+    from .atomic_data import AtomicData, RateCoefficient
+    if cls is None:
+        cls = AtomicData
+
+    if handle._shm is not None:
+        shm = handle._shm # attaching in the process that made the block
+    else:
+        shm = _attach_shared_memory(handle.name)
+
+    buffer_ = np.asarray(_Buffer(shm))
+    coefficients = {}
+    for key, entry in handle.layout.items():
+        d = {'charge' : entry['charge'], 'element' : entry['element']}
+        for array_name, (offset, shape, dtype) in entry['arrays'].items():
+            a = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=buffer_,
+                    offset=offset)
+            a.flags.writeable = False
+            d[array_name] = a
+        rc = RateCoefficient._from_cache(entry['name'], d)
+        rc.interpolation = entry['interpolation']
+        coefficients[key] = rc
+
+    return cls(coefficients)
+
+
+class _Buffer(object):
+    """The memory of a SharedMemory, as seen by numpy.
+
+    numpy does not hold on to shm.buf, so views made from it outlive the
+    mapping once the SharedMemory is closed or garbage collected.  Arrays
+    made from a _Buffer keep it, and so the SharedMemory, alive.
+    """
+    def __init__(self, shm):
+        self.shm = shm
+        address = np.frombuffer(shm.buf, dtype=np.uint8).ctypes.data
+        self.__array_interface__ = {'version' : 3, 'typestr' : '|u1',
+                'shape' : (shm.size,), 'data' : (address, False)}
+
+
+def _attach_shared_memory(name):
+    """Open an existing block and take it off the resource tracker, which
+    would otherwise unlink it when this (worker) process exits.
+
+    Before python 3.13 there is no track=False, so the block is unregistered
+    right after opening it registered it, under a lock so that attaching
+    threads do not interleave.  Workers that share the tracker of the
+    process that made the block (e.g. forked ones) thereby take its
+    registration off too, so the block is freed by unlink() only (which
+    registers it again before unlinking it).
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    with _attach_lock:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == 'posix':
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
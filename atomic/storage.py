@@ -0,0 +1,111 @@
+"""
+A minimal binary container for named numpy arrays.
+
+A file holds a JSON header followed by the raw array data, each array aligned
+to a 64 byte boundary, so that the arrays can be memory mapped straight from
+disk without being parsed or copied:
+
+    magic (8 bytes) | header length (uint64) | JSON header | arrays ...
+
+The JSON header stores a free-form 'header' dictionary supplied by the caller
+and, for every array, its offset, shape and dtype.
+"""
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+_magic = b'ATOMIC01'
+_alignment = 64
+
+
+def _aligned(n):
+    return -(-n // _alignment) * _alignment
+
+
+def save(filename, arrays, header=None):
+    """Write a dict of arrays (and a JSON-able header) to filename.
+
+    The file is written under a temporary name and then moved into place, so
+    readers never see a partially written file.
+    """
+    entries = {}
+    blobs = []
+    offset = 0
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        entries[name] = {'offset' : offset, 'shape' : a.shape,
+                'dtype' : a.dtype.str}
+        blobs.append((offset, a))
+        offset += _aligned(a.nbytes)
+
+    meta = json.dumps({'header' : header or {}, 'arrays' : entries}).encode()
+    start = _aligned(len(_magic) + 8 + len(meta))
+    end = start + offset
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmpname = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_magic)
+            f.write(struct.pack('<Q', len(meta)))
+            f.write(meta)
+            for offset, a in blobs:
+                f.seek(start + offset)
+                f.write(a.tobytes())
+            f.truncate(end)
+        os.chmod(tmpname, 0o644)
+        os.replace(tmpname, filename)
+    except BaseException:
+        os.remove(tmpname)
+        raise
+
+
+def read_header(filename):
+    """Read only the JSON header of a file written by save()."""
+    with open(filename, 'rb') as f:
+        return _read_meta(f)[0]['header']
+
+
+def load(filename, mmap=True, writeable=False):
+    """Read a file written by save().
+
+    Args:
+        filename (str): the container file.
+        mmap (bool): if True the arrays are views on a memory map of the
+            file, otherwise they are read into memory.
+        writeable (bool): if True the arrays can be written to.  A memory
+            map is then copy-on-write: the pages written to are copied, and
+            the file never changes.
+
+    Returns:
+        (header, arrays): the header dictionary and a dict of np.arrays.
+    """
+    with open(filename, 'rb') as f:
+        meta, start = _read_meta(f)
+        if mmap:
+            buffer_ = np.memmap(f, dtype=np.uint8,
+                    mode='c' if writeable else 'r')
+        else:
+            f.seek(0)
+            data = f.read()
+            buffer_ = np.frombuffer(bytearray(data) if writeable else data,
+                    dtype=np.uint8)
+
+    arrays = {}
+    for name, e in meta['arrays'].items():
+        arrays[name] = np.ndarray(tuple(e['shape']), dtype=np.dtype(e['dtype']),
+                buffer=buffer_, offset=start + e['offset'])
+    return meta['header'], arrays
+
+
+def _read_meta(f):
+    magic = f.read(len(_magic))
+    if magic != _magic:
+        raise IOError('not an atomic storage file: %s' % f.name)
+    length, = struct.unpack('<Q', f.read(8))
+    meta = json.loads(f.read(length).decode())
+    start = _aligned(len(_magic) + 8 + length)
+    return meta, start
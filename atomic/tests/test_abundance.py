@@ -29,6 +29,17 @@ class TestFractionalAbundance(unittest.TestCase):
         expected = np.array([0,3])
         assert np.array_equal(result, expected)
 
+    def test_mean_charge_n_dimensional(self):
+        y = np.zeros((4, 2, 3))
+        y[0, 0] = 1
+        y[3, 1] = 1
+        fab = atomic.abundance.FractionalAbundance(self.ad, y,
+                np.ones((2, 3)), 1e19)
+        np.testing.assert_array_equal([[0, 0, 0], [3, 3, 3]],
+                fab.mean_charge())
+        np.testing.assert_allclose([[1, 1, 1], [1.09, 1.09, 1.09]],
+                fab.effective_charge(0.01, ion_density=1e19))
+
     @unittest.skip("")
     def test_effective_charge(self):
         assert False # TODO: implement your test here
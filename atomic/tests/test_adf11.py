@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 import atomic
 
 class TestAdf11(unittest.TestCase):
@@ -28,6 +29,37 @@ class TestAdf11(unittest.TestCase):
         self.assertEqual('li', adf11.element.lower())
         self.assertEqual(self.ionis, adf11.name)
 
+class TestParseAdf11(unittest.TestCase):
+    def setUp(self):
+        self.lines = [
+            '    2    2    3    1    2     /HELIUM            /GCR PROJECT\n',
+            '-------------------------------------------------------------\n',
+            '   8.00000   9.00000\n',
+            '  -0.50000   0.00000   1.00000\n',
+            '------/ IPRT= 1  / IGRD= 1  /--------/ Z1= 1   / DATE= 18/06/96\n',
+            ' -10.00000 -11.00000 -12.00000 -13.00000 -14.00000 -15.00000\n',
+            '------/ IPRT= 1  / IGRD= 1  /--------/ Z1= 2   / DATE= 18/06/96\n',
+            ' -20.00000-21.00000 -22.00000 -23.00000 -24.00000 -25.00000\n',
+            'C-------------------------------------------------------------\n',
+            'C  1.00000\n',
+        ]
+
+    def test_axes(self):
+        iz0, ddens, dtev, drcof = atomic.adf11.parse_adf11(self.lines)
+        self.assertEqual(2, iz0)
+        np.testing.assert_equal([8, 9], ddens)
+        np.testing.assert_equal([-0.5, 0, 1], dtev)
+
+    def test_blocks_density_fastest(self):
+        iz0, ddens, dtev, drcof = atomic.adf11.parse_adf11(self.lines)
+        self.assertEqual((2, 3, 2), drcof.shape)
+        np.testing.assert_equal([-12, -13], drcof[0, 1])
+        np.testing.assert_equal([-20, -21], drcof[1, 0])
+
+    def test_truncated_block(self):
+        with self.assertRaises(ValueError):
+            atomic.adf11.parse_adf11(self.lines[:-3])
+
 class TestSniffer(unittest.TestCase):
     @unittest.skip("")
     def test___init__(self):
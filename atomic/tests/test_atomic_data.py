@@ -4,7 +4,7 @@ import atomic
 
 class TestAtomicData(unittest.TestCase):
     def test_element_data_names_abbreviated_and_long(self):
-        """This does not require that the user has downloaded data"""
+        """Requires data from ./fetch_adas_data to be in the correct spot."""
         data1 = atomic.atomic_data._element_data('Li')
         data2 = atomic.atomic_data._element_data('lithium')
         self.assertEqual(data1['recombination'],'acd96_li.dat')
@@ -35,10 +35,56 @@ class TestAtomicData(unittest.TestCase):
         rc = ad.coeffs['ionisation']
         self.assertIsInstance(rc, atomic.atomic_data.RateCoefficient)
 
+    def test_from_element_lazy(self):
+        ad = atomic.AtomicData.from_element('Li')
+        self.assertEqual([], ad.coeffs.loaded())
+        atomic.CollRadEquilibrium(ad)
+        self.assertEqual({'ionisation', 'recombination'},
+                set(ad.coeffs.loaded()))
+
+    def test_from_element_datatypes(self):
+        ad = atomic.AtomicData.from_element('Li', ['ionisation'])
+        self.assertEqual(['ionisation'], list(ad.coeffs))
+        self.assertEqual(ad.nuclear_charge, 3)
+
+    def test_copy_lazy(self):
+        ad = atomic.AtomicData.from_element('Li')
+        rc = ad.coeffs['ionisation']
+        new = ad.copy()
+        self.assertEqual(['ionisation'], new.coeffs.loaded())
+        self.assertIsNot(rc, new.coeffs['ionisation'])
+        self.assertEqual(set(ad.coeffs), set(new.coeffs))
+
+    def test_copy_keeps_memo(self):
+        ad = atomic.AtomicData.from_element('Li')
+        ad.coeffs['ionisation']
+        memo = ad.memoize()
+        new = ad.copy()
+        self.assertIs(memo, new.coeffs['ionisation'].memo)
+        self.assertIs(memo, new.coeffs['recombination'].memo)
+
     def test_make_element_initial_uppercase(self):
         ad = atomic.AtomicData.from_element('c')
         self.assertEqual(ad.element,'C')
 
+class TestLoadElements(unittest.TestCase):
+    def test_load_elements_order(self):
+        """Requires data from ./fetch_adas_data to be in the correct spot."""
+        ads = atomic.load_elements(['c', 'li'], workers=2)
+        self.assertEqual(['C', 'Li'], [ad.element for ad in ads])
+        self.assertEqual([6, 3], [ad.nuclear_charge for ad in ads])
+
+    def test_load_elements_same_as_from_element(self):
+        ad1, = atomic.load_elements(['li'], executor='process')
+        ad2 = atomic.AtomicData.from_element('li')
+        self.assertEqual(set(ad1.coeffs), set(ad2.coeffs))
+        np.testing.assert_allclose(ad1.coeffs['ionisation'](0, 10, 1e19),
+                ad2.coeffs['ionisation'](0, 10, 1e19))
+
+    def test_load_elements_invalid_executor(self):
+        with self.assertRaises(ValueError):
+            atomic.load_elements(['li'], executor='fiber')
+
 class TestRateCoefficient(unittest.TestCase):
     def setUp(self):
         data = atomic.atomic_data._element_data('Li')
@@ -71,6 +117,84 @@ class TestRateCoefficient(unittest.TestCase):
         result = self.rc(0, np.array([20, 10]), np.array([1e19,1e20]))
         self.assertEqual(expected, len(result))
 
+    def test_splines_built_on_first_use(self):
+        rc = atomic.atomic_data.RateCoefficient(self.rc.nuclear_charge,
+                self.rc.element, self.rc.log_temperature, self.rc.log_density,
+                self.rc.log_coeff)
+        self.assertEqual([], rc.built_stages())
+        rc(2, 10, 1e19)
+        rc.log10(0, 10, 1e19)
+        self.assertEqual([0, 2], rc.built_stages())
+        self.assertEqual(3, len(rc.splines))
+
+    def test_copy_keeps_built_splines(self):
+        self.rc(1, 10, 1e19)
+        new = self.rc.copy()
+        self.assertIn(1, new.built_stages())
+        np.testing.assert_allclose(self.rc(0, 10, 1e19), new(0, 10, 1e19))
+
+    def test_evaluate_all_same_as___call__(self):
+        Te = np.logspace(-1, 4, 30)
+        ne = np.logspace(18, 21, 30)
+        result = self.rc.evaluate_all(Te, ne)
+        self.assertEqual((3, 30), result.shape)
+        for k in range(3):
+            np.testing.assert_allclose(self.rc(k, Te, ne), result[k],
+                    rtol=1e-8)
+
+    def test_evaluate_all_not_cached(self):
+        rc = atomic.atomic_data.RateCoefficient(self.rc.nuclear_charge,
+                self.rc.element, self.rc.log_temperature, self.rc.log_density,
+                self.rc.log_coeff)
+        result = rc.evaluate_all(10, np.array([1e19, 1e20]))
+        self.assertEqual((3, 2), result.shape)
+        np.testing.assert_allclose(self.rc(2, 10, 1e20), result[2, 1],
+                rtol=1e-8)
+
+    def test_evaluate_all_grid(self):
+        Te = np.logspace(-1, 4, 30)
+        ne = np.logspace(18, 21, 10)
+        result = self.rc.evaluate_all(Te, ne, grid=True)
+        self.assertEqual((3, 30, 10), result.shape)
+        for k in range(3):
+            np.testing.assert_allclose(self.rc(k, Te[:, np.newaxis], ne),
+                    result[k], rtol=1e-8)
+        out = np.empty((30, 10))
+        self.assertIs(out, self.rc(-1, Te, ne, out=out, grid=True))
+        np.testing.assert_allclose(result[-1], out, rtol=1e-14)
+
+        with self.assertRaises(ValueError):
+            self.rc.evaluate_all(Te[:, np.newaxis], ne, grid=True)
+        with self.assertRaises(TypeError):
+            self.rc.evaluate_all(atomic.PlasmaState(Te, 1e19), grid=True)
+
+    def test_derivative(self):
+        Te = np.logspace(0, 3, 30)
+        ne = np.logspace(18, 20, 30)
+        h = 1e-6
+        for interpolation in ['spline', 'patches', 'linear', 'chebyshev']:
+            self.rc.interpolation = interpolation
+            dTe = self.rc.derivative_all(Te, ne)
+            expected = (self.rc.evaluate_all(Te * (1 + h), ne)
+                    - self.rc.evaluate_all(Te * (1 - h), ne)) / (2 * h * Te)
+            np.testing.assert_allclose(dTe, expected, rtol=1e-5)
+
+            dne = self.rc.derivative(1, Te, ne, dTe=0, dne=1)
+            expected = (self.rc(1, Te, ne * (1 + h))
+                    - self.rc(1, Te, ne * (1 - h))) / (2 * h * ne)
+            np.testing.assert_allclose(dne, expected, rtol=1e-5)
+
+            mixed = self.rc.derivative(1, Te, ne, dTe=1, dne=1)
+            expected = (self.rc.derivative(1, Te, ne * (1 + h))
+                    - self.rc.derivative(1, Te, ne * (1 - h))) / (2 * h * ne)
+            np.testing.assert_allclose(mixed, expected, rtol=1e-4)
+
+    def test_derivative_outside_grid(self):
+        Te = self.rc.temperature_grid[-1] * np.array([2., 10.])
+        np.testing.assert_array_equal(0, self.rc.derivative_all(Te, 1e19))
+        with self.assertRaises(ValueError):
+            self.rc.derivative(0, Te, 1e19, dTe=2)
+
     @unittest.skip("")
     def test___init__(self):
         # rate_coefficient = RateCoefficient(nuclear_charge, element, log_temperature, log_density, log_coeff, name)
@@ -105,6 +229,17 @@ class TestRateCoefficient(unittest.TestCase):
         np.testing.assert_allclose(expected, log_rcs)
 
 class TestZeroCoefficient(unittest.TestCase):
+    def test_evaluate_all(self):
+        zc = atomic.atomic_data.ZeroCoefficient(3)
+        result = zc.evaluate_all(np.array([1., 10.]), 1e19)
+        self.assertEqual((3, 2), result.shape)
+        self.assertTrue(np.all(result > 0))
+
+    def test_derivative_all(self):
+        zc = atomic.atomic_data.ZeroCoefficient(3)
+        result = zc.derivative_all(np.array([1., 10.]), 1e19)
+        np.testing.assert_array_equal(np.zeros((3, 2)), result)
+
     @unittest.skip("")
     def test___call__(self):
         # zero_coefficient = ZeroCoefficient()
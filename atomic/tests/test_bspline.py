@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+
+from atomic import bspline
+
+class TestBspline(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.x = np.linspace(-0.7, 4., 25)
+        self.y = np.linspace(13., 21., 16)
+        X, Y = np.meshgrid(self.x, self.y, indexing='ij')
+        self.z = np.array([-12 - (k + 1) / X.clip(0.1) - 0.1 * k * Y
+            + 0.01 * rng.randn(*X.shape) for k in range(4)])
+
+    def test_knots_same_as_scipy(self):
+        s = RectBivariateSpline(self.x, self.y, self.z[0])
+        np.testing.assert_equal(s.tck[0], bspline.knots(self.x))
+        np.testing.assert_equal(s.tck[1], bspline.knots(self.y))
+
+    def test_fit_same_as_scipy(self):
+        tx, ty, c = bspline.fit(self.x, self.y, self.z)
+        self.assertEqual((4, 25 * 16), c.shape)
+        for k in range(4):
+            s = RectBivariateSpline(self.x, self.y, self.z[k])
+            np.testing.assert_allclose(s.tck[2], c[k], rtol=1e-10)
+
+    def test_basis_partition_of_unity(self):
+        t = bspline.knots(self.x)
+        x, l = bspline.locate(t, np.linspace(-1, 5, 101))
+        np.testing.assert_allclose(1., bspline.basis(t, x, l).sum(0))
+
+    def test_contract_same_as_scipy(self):
+        """Points outside the grid too, which are moved onto its edge."""
+        tx, ty, c = bspline.fit(self.x, self.y, self.z)
+        x = np.linspace(-1, 5, 40)
+        y = np.linspace(12, 22, 40)
+        result = bspline.contract(c, *bspline.weights(tx, ty, x, y))
+        self.assertEqual((4, 40), result.shape)
+        for k in range(4):
+            s = RectBivariateSpline(self.x, self.y, self.z[k])
+            np.testing.assert_allclose(s(x, y, grid=False), result[k],
+                    rtol=1e-10)
+
+    def test_derivative_same_as_scipy(self):
+        tx, ty, c = bspline.fit(self.x, self.y, self.z)
+        x = np.linspace(-0.6, 3.9, 40)
+        y = np.linspace(13.5, 20.5, 40)
+        s = RectBivariateSpline(self.x, self.y, self.z[1])
+        for dx, dy in [(1, 0), (0, 1), (1, 1)]:
+            result = bspline.contract(c, *bspline.weights(tx, ty, x, y,
+                (dx, dy)))
+            np.testing.assert_allclose(s(x, y, dx=dx, dy=dy, grid=False),
+                    result[1], rtol=1e-8)
+
+    def test_grid_same_as_scipy(self):
+        tx, ty, c = bspline.fit(self.x, self.y, self.z)
+        x = np.linspace(-1, 5, 30)
+        y = np.linspace(12, 22, 20)
+        Bx, By = bspline.grid_weights(tx, ty, x, y)
+        self.assertEqual((30, 25), Bx.shape)
+        result = bspline.contract_grid(c.reshape(4, 25, 16), Bx, By)
+        self.assertEqual((4, 30, 20), result.shape)
+        for k in range(4):
+            s = RectBivariateSpline(self.x, self.y, self.z[k])
+            np.testing.assert_allclose(s(x, y), result[k], rtol=1e-10)
+
+
+        tx, ty, c = bspline.fit(self.x, self.y, self.z)
+        x = np.ones((3, 5))
+        index, w = bspline.weights(tx, ty, x, 15 * x)
+        self.assertEqual((16, 3, 5), w.shape)
+        self.assertEqual((4, 3, 5), bspline.contract(c, index, w).shape)
+
+if __name__ == '__main__':
+    unittest.main()
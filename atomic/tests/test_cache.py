@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import atomic
+import atomic.cache as cache
+
+def write_adf11(filename, shift=0.):
+    """Write a small two stage adf11 file."""
+    logd = np.linspace(8, 15, 5)
+    logt = np.linspace(0, 3, 6)
+    lines = ['    2    5    6    1    2     /HELIUM            /GCR PROJECT\n',
+            '-' * 70 + '\n']
+    lines.append(' '.join('%10.5f' % d for d in logd) + '\n')
+    lines.append(' '.join('%10.5f' % t for t in logt) + '\n')
+    for z1 in (1, 2):
+        lines.append('------/ IPRT= 1  / IGRD= 1  /---/ Z1= %d   / DATE= 18/06/96\n'
+                % z1)
+        block = -10 - z1 + shift + np.add.outer(0.5 * logt, 0.1 * logd)
+        for row in block:
+            lines.append(' '.join('%10.5f' % v for v in row) + '\n')
+    with open(filename, 'w') as f:
+        f.writelines(lines)
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.saved_directory = cache.directory
+        cache.directory = os.path.join(self.tmp, 'cache')
+        self.filename = os.path.join(self.tmp, 'scd96_he.dat')
+        write_adf11(self.filename)
+
+    def tearDown(self):
+        cache.directory = self.saved_directory
+        shutil.rmtree(self.tmp)
+
+    def test_load_missing(self):
+        self.assertIsNone(cache.load(self.filename))
+
+    def test_from_adf11_stores(self):
+        rc = atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        self.assertTrue(os.path.isfile(cache.entry_name(self.filename)))
+        cached = cache.load(self.filename)
+        self.assertEqual(2, cached['charge'])
+        np.testing.assert_equal(rc.log_coeff, cached['log_coeff'])
+
+    def test_warm_start_same_values(self):
+        cold = atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        warm = atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        Te, ne = np.logspace(0, 3, 7), 1e19
+        for k in range(2):
+            np.testing.assert_allclose(cold(k, Te, ne), warm(k, Te, ne))
+
+    def test_invalidated_when_source_changes(self):
+        atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        write_adf11(self.filename, shift=1.)
+        self.assertIsNone(cache.load(self.filename))
+        rc = atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        # -10 - 1 + shift + 0.1 * 8, less 6 for the conversion to m^3/s
+        self.assertAlmostEqual(-15.2, rc.log_coeff[0, 0, 0])
+
+    def test_warm_start_writeable(self):
+        """Changing the tables of a cached file does not change the cache."""
+        atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        warm = atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        for a in (warm.log_temperature, warm.log_density, warm.log_coeff):
+            self.assertTrue(a.flags.writeable)
+        expected = warm.log_coeff[0, 0, 0]
+        warm.log_coeff[0, 0, 0] = 0.
+        self.assertEqual(expected,
+                cache.load(self.filename)['log_coeff'][0, 0, 0])
+
+    def test_touched_source_is_hashed(self):
+        atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        st = os.stat(self.filename)
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertIsNotNone(cache.load(self.filename))
+
+    def test_touched_source_is_hashed_once(self):
+        atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        st = os.stat(self.filename)
+        os.utime(self.filename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        with mock.patch.object(cache, '_sha1', wraps=cache._sha1) as sha1:
+            for i in range(3):
+                cached = cache.load(self.filename)
+                self.assertEqual(2, cached['charge'])
+        self.assertEqual(1, sha1.call_count)
+        np.testing.assert_equal(
+                atomic.atomic_data.RateCoefficient.from_adf11(
+                    self.filename).log_coeff, cached['log_coeff'])
+
+    def test_disabled(self):
+        cache.directory = None
+        atomic.atomic_data.RateCoefficient.from_adf11(self.filename)
+        self.assertIsNone(cache.load(self.filename))
+
+if __name__ == '__main__':
+    unittest.main()
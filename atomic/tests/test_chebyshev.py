@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import atomic
+from atomic import chebyshev
+from atomic.plasma_state import PlasmaState
+
+class TestChebyshev(unittest.TestCase):
+    def setUp(self):
+        self.rc = atomic.element('c').coeffs['ionisation']
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def relative_error(self, surrogate, rc, state):
+        spline = rc.log10_all(state)
+        approx = surrogate.evaluate(state.weights(surrogate))
+        return np.abs(10**(approx - spline) - 1)
+
+    def test_chebyshev(self):
+        t = np.linspace(-1, 1, 7)
+        np.testing.assert_allclose(
+                np.polynomial.chebyshev.chebvander(t, 5).T,
+                chebyshev.chebyshev(t, 5), atol=1e-14)
+
+    def test_fit(self):
+        surrogate = chebyshev.fit(self.rc, tolerance=1e-2)
+        self.assertEqual((self.rc.nuclear_charge,), surrogate.error.shape)
+        self.assertLessEqual(surrogate.error.max(), 1e-2)
+        self.assertLess(surrogate.nbytes, self.rc.patch_table().nbytes)
+
+        # the grid points are among the points checked
+        X, Y = np.meshgrid(self.rc.log_temperature, self.rc.log_density,
+                indexing='ij')
+        error = self.relative_error(surrogate, self.rc,
+                PlasmaState(10**X, 10**Y))
+        self.assertTrue(np.all(error.max(axis=(1, 2)) <= surrogate.error))
+
+    def test_smooth_coefficients_need_one_piece(self):
+        rc = atomic.element('c').coeffs['recombination']
+        surrogate = chebyshev.fit(rc, tolerance=1e-3)
+        self.assertEqual(1, surrogate.pieces)
+        self.assertLessEqual(surrogate.error.max(), 1e-3)
+
+    def test_max_pieces(self):
+        surrogate = chebyshev.fit(self.rc, tolerance=1e-12, max_pieces=3)
+        self.assertEqual(3, surrogate.pieces)
+        self.assertGreater(surrogate.error.max(), 1e-12)
+
+    def test_interpolation(self):
+        ad = atomic.element('c', interpolation='chebyshev')
+        rc = ad.coeffs['ionisation']
+        surrogate = rc.surrogate()
+        self.assertIs(surrogate, rc.interpolant())
+
+        rng = np.random.RandomState(3)
+        Te = 10**rng.uniform(-1, 4, (20, 5))
+        ne = 10**rng.uniform(16, 21, (20, 5))
+        all_ = rc.log10_all(Te, ne)
+        self.assertEqual((rc.nuclear_charge, 20, 5), all_.shape)
+        for k in range(rc.nuclear_charge):
+            np.testing.assert_allclose(all_[k], rc.log10(k, Te, ne),
+                    rtol=1e-13)
+
+    def test_grid(self):
+        surrogate = chebyshev.fit(self.rc)
+        x = np.linspace(-1, 5, 40)
+        y = np.linspace(13, 22, 9)
+        X, Y = np.meshgrid(x, y, indexing='ij')
+        expected = surrogate.evaluate(surrogate.weights(X, Y))
+        np.testing.assert_allclose(expected,
+                surrogate.evaluate_grid(surrogate.grid_weights(x, y)),
+                rtol=1e-13)
+        np.testing.assert_allclose(expected[2:4],
+                surrogate.evaluate_grid(surrogate.grid_weights(x, y),
+                    slice(2, 4)), rtol=1e-13)
+
+    def test_save_and_load(self):
+        filename = os.path.join(self.tmp, 'scd96_c.chebyshev')
+        surrogate = chebyshev.fit(self.rc)
+        surrogate.save(filename)
+        loaded = chebyshev.ChebyshevSurrogate.load(filename)
+        self.assertFalse(loaded.coeffs.flags.writeable)
+        np.testing.assert_array_equal(surrogate.error, loaded.error)
+
+        rc = atomic.element('c').coeffs['ionisation']
+        rc.use_surrogate(loaded)
+        self.assertEqual('chebyshev', rc.interpolation)
+        state = PlasmaState(np.logspace(0, 3, 50), 1e19)
+        np.testing.assert_array_equal(
+                surrogate.evaluate(state.weights(surrogate)),
+                rc.log10_all(state))
+
+        with self.assertRaises(ValueError):
+            atomic.element('li').coeffs['ionisation'].use_surrogate(loaded)
+
+if __name__ == '__main__':
+    unittest.main()
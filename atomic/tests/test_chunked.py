@@ -0,0 +1,65 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import atomic
+from atomic import chunked
+
+class TestChunkedEquilibrium(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('carbon')
+        self.Te = np.logspace(0, 3, 60).reshape(5, 12)
+        self.ne = np.logspace(18, 20, 12)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def expected(self, impurity_fraction, neutral_fraction):
+        y = atomic.CollRadEquilibrium(self.ad).ionisation_stage_distribution(
+                self.Te, self.ne)
+        expected = atomic.Radiation(y, impurity_fraction,
+                neutral_fraction).power
+        expected['mean_charge'] = y.mean_charge()
+        expected['mean_square_charge'] = y.mean_square_charge()
+        expected['effective_charge'] = y.effective_charge(impurity_fraction)
+        return expected
+
+    def test_same_as_whole(self):
+        """A chunk size that does not divide the number of points."""
+        ch = atomic.ChunkedEquilibrium(self.ad, chunk_size=7,
+                impurity_fraction=0.01, neutral_fraction=1e-3)
+        result = ch.compute(self.Te, self.ne)
+        self.assertEqual(set(chunked.quantities), set(result))
+        expected = self.expected(0.01, 1e-3)
+        for key in chunked.quantities:
+            self.assertEqual((5, 12), result[key].shape)
+            np.testing.assert_allclose(expected[key], result[key],
+                    rtol=1e-12)
+
+    def test_memory_mapped(self):
+        np.save(os.path.join(self.tmp, 'Te.npy'), self.Te)
+        Te = np.load(os.path.join(self.tmp, 'Te.npy'), mmap_mode='r')
+        total = np.lib.format.open_memmap(os.path.join(self.tmp,
+            'total.npy'), mode='w+', shape=Te.shape)
+        out = atomic.ChunkedEquilibrium(self.ad, chunk_size=16).compute(Te,
+                1e19, {'total' : total})
+        self.assertEqual(['total'], list(out))
+        self.assertIs(total, out['total'])
+        total.flush()
+
+        y = atomic.CollRadEquilibrium(self.ad).ionisation_stage_distribution(
+                self.Te, 1e19)
+        np.testing.assert_allclose(atomic.Radiation(y).power['total'],
+                np.load(os.path.join(self.tmp, 'total.npy')), rtol=1e-12)
+
+    def test_bad_outputs(self):
+        ch = atomic.ChunkedEquilibrium(self.ad)
+        with self.assertRaises(KeyError):
+            ch.compute(self.Te, self.ne, {'zeff' : np.empty((5, 12))})
+        with self.assertRaises(ValueError):
+            ch.compute(self.Te, self.ne, {'total' : np.empty(60)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 import numpy as np
 import atomic
 
@@ -80,6 +81,127 @@ class TestCollRadEquilibrium(unittest.TestCase):
         fab = self.eq.ionisation_stage_distribution(Te, ne)
         self.assertEqual((stages, len(ne)), fab.y.shape)
 
+    def test_ionisation_stage_distribution_n_dimensional(self):
+        Te = np.logspace(0, 3, 20).reshape(4, 5)
+        fab = self.eq.ionisation_stage_distribution(Te, 1e19)
+        self.assertEqual((4, 4, 5), fab.y.shape)
+        expected = self.eq.ionisation_stage_distribution(Te.ravel(),
+                1e19 * np.ones(20))
+        np.testing.assert_allclose(expected.y.reshape(4, 4, 5), fab.y,
+                rtol=1e-14)
+
+    def test_ionisation_stage_distribution_no_overflow(self):
+        """S / alpha ** Z overflows for tungsten if S is large enough."""
+        ad = atomic.element('w')
+        S = ad.coeffs['ionisation']
+        ad.coeffs['ionisation'] = atomic.atomic_data.RateCoefficient(
+                S.nuclear_charge, S.element, S.log_temperature,
+                S.log_density, S.log_coeff + 10)
+        eq = atomic.CollRadEquilibrium(ad)
+        Te = np.logspace(0, 4, 30)
+        fab = eq.ionisation_stage_distribution(Te, 1e19)
+        self.assertTrue(np.all(np.isfinite(fab.y)))
+        np.testing.assert_allclose(fab.y.sum(axis=0), 1, rtol=1e-12)
+
+        # the ratios of neighbouring stages are S / alpha
+        ratio = (ad.coeffs['ionisation'].log10_all(Te, 1e19)
+                - ad.coeffs['recombination'].log10_all(Te, 1e19))
+        k = np.argmax(fab.y, axis=0)
+        k = np.minimum(k, len(ratio) - 1)
+        points = np.arange(len(Te))
+        stages = fab.y[k, points], fab.y[k + 1, points]
+        significant = np.minimum(*stages) > 1e-200
+        np.testing.assert_allclose(np.log10(stages[1] / stages[0]
+            )[significant], ratio[k, points][significant], atol=1e-9)
+
+    def test_ionisation_stage_distribution_grid(self):
+        """Independent axes give the abundances on their mesh."""
+        Te = np.logspace(0, 3, 20)
+        ne = np.array([1e18, 1e19, 1e20])
+        fab = self.eq.ionisation_stage_distribution(Te, ne, grid=True)
+        self.assertEqual((4, 20, 3), fab.y.shape)
+        for j in range(len(ne)):
+            expected = self.eq.ionisation_stage_distribution(Te, ne[j])
+            np.testing.assert_allclose(expected.y, fab.y[:, :, j],
+                    rtol=1e-10, atol=1e-14)
+        self.assertEqual((20, 3), fab.mean_charge().shape)
+
+    def test_ionisation_stage_distribution_derivative(self):
+        Te = np.logspace(0, 2.5, 20)
+        ne = 1e19
+        h = 1e-6
+        fab = self.eq.ionisation_stage_distribution(Te, ne, derivative=True)
+        self.assertEqual(fab.y.shape, fab.dy_dTe.shape)
+        np.testing.assert_allclose(fab.dy_dTe.sum(axis=0), 0, atol=1e-12)
+
+        plus = self.eq.ionisation_stage_distribution(Te * (1 + h), ne)
+        minus = self.eq.ionisation_stage_distribution(Te * (1 - h), ne)
+        expected = (plus.y - minus.y) / (2 * h * Te)
+        np.testing.assert_allclose(fab.dy_dTe, expected, rtol=1e-4,
+                atol=1e-8)
+        self.assertIsNone(
+                self.eq.ionisation_stage_distribution(Te, ne).dy_dTe)
+
+    def test_reduced(self):
+        """The same moments and power as the abundances give."""
+        Te = np.logspace(0, 4, 60).reshape(6, 10)
+        ne = np.logspace(18, 20, 10)
+        for element in ['Li', 'c', 'w']:
+            ad = atomic.element(element)
+            eq = atomic.CollRadEquilibrium(ad)
+            reduced = eq.reduced(Te, ne, impurity_fraction=0.01,
+                    neutral_fraction=1e-3)
+            fab = eq.ionisation_stage_distribution(Te, ne)
+            np.testing.assert_allclose(fab.mean_charge(),
+                    reduced.mean_charge(), rtol=1e-12)
+            np.testing.assert_allclose(fab.mean_square_charge(),
+                    reduced.mean_square_charge(), rtol=1e-12)
+            np.testing.assert_allclose(fab.effective_charge(0.01),
+                    reduced.effective_charge(0.01), rtol=1e-12)
+
+            power = atomic.Radiation(fab, 0.01, 1e-3).power
+            self.assertEqual(set(power), set(reduced.power))
+            for key in power:
+                self.assertEqual((6, 10), reduced.power[key].shape)
+                np.testing.assert_allclose(power[key], reduced.power[key],
+                        rtol=1e-10)
+
+    def test_reduced_power_keys(self):
+        """The coefficients of the power not asked for are not evaluated."""
+        Te = np.logspace(0, 4, 60).reshape(6, 10)
+        ne = np.logspace(18, 20, 10)
+        expected = self.eq.reduced(Te, ne)
+        ad = self.ad.copy()
+        for key in ['continuum_power', 'cx_power']:
+            ad.coeffs[key] = mock.Mock(side_effect=AssertionError(key))
+        reduced = atomic.CollRadEquilibrium(ad).reduced(Te, ne,
+                power_keys=['mean_charge', 'line_power'])
+        self.assertEqual(['line_power'], list(reduced.power))
+        np.testing.assert_array_equal(expected.power['line_power'],
+                reduced.power['line_power'])
+        np.testing.assert_array_equal(expected.mean_charge(),
+                reduced.mean_charge())
+
+    def test_reduced_in_blocks(self):
+        """Blocks of arrays give what a PlasmaState of all the points does.
+        """
+        Te = np.logspace(0, 4, 60).reshape(6, 10)
+        ne = np.logspace(18, 20, 10)
+        state = atomic.PlasmaState(Te, ne)
+        expected = self.eq.reduced(state, neutral_fraction=1e-3)
+        self.eq.block = 7
+        reduced = self.eq.reduced(Te, ne, neutral_fraction=1e-3)
+        np.testing.assert_array_equal(expected.mean_charge(),
+                reduced.mean_charge())
+        np.testing.assert_array_equal(expected.mean_square_charge(),
+                reduced.mean_square_charge())
+        for key in expected.power:
+            np.testing.assert_array_equal(expected.power[key],
+                    reduced.power[key])
+        self.assertIs(state, expected.plasma_state)
+        np.testing.assert_array_equal(Te,
+                reduced.plasma_state.temperature)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,121 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import atomic
+from atomic import adf15
+from atomic.database import Database, pack
+from atomic.pec import TransitionPool
+
+def adf15_data():
+    """Like Adf15.read() of a file with two datablocks."""
+    temperature = np.logspace(0, 3, 4)
+    density = np.logspace(14, 20, 3)
+    datablocks = []
+    for i, type_ in enumerate(['EXCIT', 'RECOM']):
+        datablocks.append({'density' : density, 'temperature' : temperature,
+            'pec' : 1e-16 * (i + 1) * np.outer(temperature, density**0.1),
+            'wavelength' : np.float64(1215.7e-10 * (i + 1)), 'type' : type_})
+    return {'nuclear_charge' : np.int32(1), 'charge' : np.int32(0),
+            'charge+1' : np.int32(1), 'element' : 'H',
+            'partition_levels' : np.int32(0), 'partial_file' : False,
+            'partial_block_present' : False,
+            'comment_text_block_present' : True, 'datablocks' : datablocks}
+
+def compare_adf15(test, expected, d):
+    test.assertEqual(expected['element'], d['element'])
+    test.assertEqual(expected['nuclear_charge'], d['nuclear_charge'])
+    test.assertEqual(expected['charge'], d['charge'])
+    test.assertEqual(len(expected['datablocks']), len(d['datablocks']))
+    for a, b in zip(expected['datablocks'], d['datablocks']):
+        test.assertEqual(a['wavelength'], b['wavelength'])
+        test.assertEqual(a['type'], b['type'])
+        for key in ['density', 'temperature', 'pec']:
+            np.testing.assert_array_equal(a[key], b[key])
+
+class TestDatabase(unittest.TestCase):
+    """Requires data from ./fetch_adas_data to be in the correct spot."""
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.filename = os.path.join(cls.tmp, 'atomic_data.bin')
+        pack(cls.filename)
+        cls.db = Database(cls.filename)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_index(self):
+        files = self.db.index.files('lithium')
+        self.assertEqual('scd96_li.dat', files['scd'])
+        self.assertIn('scd96_li.dat', self.db.adf11_names())
+
+    def test_rate_coefficient(self):
+        rc1 = atomic.atomic_data.RateCoefficient.from_database(self.db,
+                'scd96_li.dat')
+        ad = atomic.element('li')
+        rc2 = ad.coeffs['ionisation']
+        np.testing.assert_equal(rc2.log_coeff, rc1.log_coeff)
+        Te = np.logspace(0, 3, 5)
+        np.testing.assert_allclose(rc2(1, Te, 1e19), rc1(1, Te, 1e19))
+
+    def test_atomic_data(self):
+        ad = atomic.AtomicData.from_database(self.db, 'Li')
+        self.assertEqual(3, ad.nuclear_charge)
+        self.assertEqual('Li', ad.element)
+        self.assertEqual([], ad.coeffs.loaded())
+        eq = atomic.CollRadEquilibrium(ad)
+        y = eq.ionisation_stage_distribution(np.array([10.]), np.array([1e19]))
+        np.testing.assert_allclose(1, y.y.sum(0))
+
+    def test_missing_file(self):
+        with self.assertRaises(KeyError):
+            self.db.adf11('scd96_xx.dat')
+
+    @unittest.skipIf(adf15._xxdata_15 is None
+            or not glob.glob(atomic.atomic_data._full_path('pec*.dat')),
+            'needs adf15 files and the _xxdata_15 extension')
+    def test_adf15_same_as_read(self):
+        for name in self.db.adf15_names():
+            compare_adf15(self, adf15.Adf15(
+                atomic.atomic_data._full_path(name)).read(),
+                self.db.adf15(name))
+
+
+class TestDatabaseAdf15(unittest.TestCase):
+    """adf15 data through pack(), without needing _xxdata_15."""
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.name = 'pec96#h_pju#h0.dat'
+        open(os.path.join(self.tmp, self.name), 'w').close()
+        self.filename = os.path.join(self.tmp, 'atomic_data.bin')
+        self.expected = adf15_data()
+        with mock.patch.object(adf15.Adf15, 'read',
+                side_effect=lambda: adf15_data()):
+            pack(self.filename, directory=self.tmp)
+        self.db = Database(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_adf15(self):
+        self.assertEqual([self.name], self.db.adf15_names('pec96#h*'))
+        self.assertEqual([], self.db.adf15_names('pec96#c*'))
+        compare_adf15(self, self.expected, self.db.adf15(self.name))
+
+    def test_transition_pool(self):
+        pool = TransitionPool.from_database(self.db)
+        self.assertEqual(2, pool.size)
+        expected = TransitionPool()
+        expected.append_adf15_data(self.expected)
+        np.testing.assert_array_equal(expected.wavelengths, pool.wavelengths)
+        np.testing.assert_array_equal(expected.coeffs, pool.coeffs)
+        self.assertEqual(['EXCIT', 'RECOM'], [t.type_ for t in pool])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -31,6 +31,25 @@ class TestElectronCooling(unittest.TestCase):
         result = p['line_power'] + p['cx_power'] + p['continuum_power']
         np.testing.assert_allclose(expected, result)
 
+    def test_n_dimensional(self):
+        """A 2D grid of temperatures and densities, as from an edge code,
+        gives powers of its shape.
+        """
+        ad = atomic.element('li')
+        eq = atomic.CollRadEquilibrium(ad)
+        Te = self.temperature[:48].reshape(6, 8)
+        ne = np.logspace(18, 20, 8)
+        elc = atomic.ElectronCooling(eq.ionisation_stage_distribution(Te, ne),
+                neutral_fraction=1e-2)
+        flat = atomic.ElectronCooling(eq.ionisation_stage_distribution(
+            Te.ravel(), np.tile(ne, 6)), neutral_fraction=1e-2)
+        power, expected = elc.power, flat.power
+        for key in expected:
+            self.assertEqual((6, 8), power[key].shape)
+            np.testing.assert_allclose(expected[key].reshape(6, 8),
+                    power[key], rtol=1e-12)
+        self.assertEqual((6, 8), elc.specific_power['total'].shape)
+
     def test_equilbrium(self):
         """Test that ionisation and recombination powers are opposite.
 
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+import atomic
+from atomic.element_registry import ElementRegistry
+
+class TestElementRegistry(unittest.TestCase):
+    """Requires data from ./fetch_adas_data to be in the correct spot."""
+    def setUp(self):
+        self.registry = ElementRegistry(maxsize=2)
+
+    def test_get_shared(self):
+        ad1 = self.registry.get('li')
+        ad2 = self.registry.get('lithium')
+        self.assertIs(ad1, ad2)
+        self.assertEqual(1, self.registry.misses)
+        self.assertEqual(1, self.registry.hits)
+
+    def test_get_datatypes(self):
+        ad = self.registry.get('li', ['ionisation', 'recombination'])
+        self.assertEqual({'ionisation', 'recombination'}, set(ad.coeffs))
+        self.assertIsNot(ad, self.registry.get('li'))
+
+    def test_read_only(self):
+        ad = self.registry.get('li')
+        with self.assertRaises(TypeError):
+            ad.coeffs['ionisation'] = None
+        with self.assertRaises(ValueError):
+            ad.coeffs['ionisation'].log_coeff[0, 0, 0] = 0.
+
+    def test_copy_is_writeable(self):
+        ad = self.registry.get('li').copy()
+        ad.coeffs['ionisation'].log_coeff[0, 0, 0] = 0.
+
+    def test_copy_before_reading_is_writeable(self):
+        ad = self.registry.get('li')
+        new = ad.copy()
+        new.coeffs['ionisation'] = new.coeffs['recombination']
+        self.assertIsNot(ad.coeffs['ionisation'], new.coeffs['ionisation'])
+        rc = new.coeffs['ionisation']
+        for a in (rc.log_temperature, rc.log_density, rc.log_coeff):
+            self.assertTrue(a.flags.writeable)
+
+    def test_lru_eviction(self):
+        self.registry.get('li')
+        self.registry.get('c')
+        self.registry.get('li')
+        self.registry.get('h')
+        self.assertEqual(1, self.registry.evictions)
+        symbols = [key[0] for key in self.registry.keys()]
+        self.assertEqual(['li', 'h'], symbols)
+
+    def test_evict(self):
+        self.registry.get('li')
+        self.registry.get('li', ['ionisation'])
+        self.assertEqual(1, self.registry.evict('lithium', ['ionisation']))
+        self.assertEqual(1, len(self.registry))
+        self.assertEqual(1, self.registry.evict('li'))
+        self.assertEqual(0, len(self.registry))
+
+    def test_evicted_aliases_are_dropped(self):
+        self.registry.get('li')
+        self.registry.get('Lithium')
+        self.registry.get('c')
+        self.assertEqual(1, self.registry.evict('li'))
+        self.assertEqual(['c'], [key[0] for key in
+            set(self.registry._aliases.values())])
+
+        self.registry.get('li')
+        self.registry.get('h') # drops 'c'
+        self.assertEqual({'li', 'h'}, set(key[0] for key in
+            self.registry._aliases.values()))
+
+    def test_clear(self):
+        self.registry.get('li')
+        self.registry.clear()
+        self.assertEqual({'hits' : 0, 'misses' : 0, 'evictions' : 0,
+            'size' : 0, 'maxsize' : 2}, self.registry.stats())
+
+if __name__ == '__main__':
+    unittest.main()
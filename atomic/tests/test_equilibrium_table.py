@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import atomic
+from atomic.plasma_state import PlasmaState
+
+class TestEquilibriumTable(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('c')
+        self.eq = atomic.CollRadEquilibrium(self.ad)
+        self.temperature = np.logspace(0, 3, 300)
+        self.density = np.logspace(17, 21, 9)
+        self.tmp = tempfile.mkdtemp()
+
+        rng = np.random.RandomState(1)
+        self.Te = 10**rng.uniform(0.5, 2.8, (20, 5))
+        self.ne = 10**rng.uniform(17.5, 20.5, (20, 5))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def build(self, interpolation='linear'):
+        return atomic.EquilibriumTable.build(self.ad, self.temperature,
+                self.density, interpolation=interpolation)
+
+    def test_grid_points(self):
+        """The table is exact on its grid."""
+        table = self.build()
+        Te, ne = np.meshgrid(self.temperature, self.density, indexing='ij')
+        fab = self.eq.ionisation_stage_distribution(Te, ne)
+        np.testing.assert_allclose(fab.mean_charge(),
+                table.mean_charge(Te, ne), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(fab.mean_square_charge(),
+                table.mean_square_charge(Te, ne), rtol=1e-12, atol=1e-12)
+        Lz = atomic.Radiation(fab).specific_power['total']
+        np.testing.assert_allclose(Lz, table.radiative_loss(Te, ne),
+                rtol=1e-11)
+
+    def test_between_grid_points(self):
+        fab = self.eq.ionisation_stage_distribution(self.Te, self.ne)
+        Lz = atomic.Radiation(fab).specific_power['total']
+        for interpolation, rtol in [('linear', 1e-2), ('cubic', 1e-4)]:
+            table = self.build(interpolation)
+            state = PlasmaState(self.Te, self.ne)
+            self.assertEqual((20, 5), table.mean_charge(state).shape)
+            np.testing.assert_allclose(fab.mean_charge(),
+                    table.mean_charge(state), rtol=rtol)
+            np.testing.assert_allclose(Lz, table.radiative_loss(state),
+                    rtol=rtol)
+
+            y = table.ionisation_stage_distribution(state)
+            self.assertEqual(fab.y.shape, y.y.shape)
+            np.testing.assert_allclose(y.y.sum(axis=0), 1, rtol=1e-14)
+            np.testing.assert_allclose(fab.y, y.y, atol=10 * rtol)
+
+    def test_out(self):
+        table = self.build()
+        out = np.empty((20, 5))
+        self.assertIs(out, table.mean_charge(self.Te, self.ne, out=out))
+        np.testing.assert_array_equal(table.mean_charge(self.Te, self.ne),
+                out)
+
+    def test_scalar(self):
+        """A single point gives 0-d arrays, as for the points of an array.
+        """
+        table = self.build()
+        Te, ne = self.Te[0, 0], self.ne[0, 0]
+        for f in [table.mean_charge, table.mean_square_charge,
+                table.radiative_loss]:
+            value = f(Te, ne)
+            self.assertEqual((), np.shape(value))
+            np.testing.assert_allclose(f(self.Te, self.ne)[0, 0], value,
+                    rtol=1e-14)
+        self.assertEqual((7,), table.log10_abundance(Te, ne).shape)
+
+    def test_save_and_load(self):
+        filename = os.path.join(self.tmp, 'c.equilibrium')
+        table = self.build('cubic')
+        table.save(filename)
+        loaded = atomic.EquilibriumTable.load(filename)
+        self.assertEqual('C', loaded.element)
+        self.assertEqual(6, loaded.nuclear_charge)
+        self.assertEqual(0., loaded.neutral_fraction)
+        self.assertFalse(loaded.abundances.table.flags.writeable)
+        np.testing.assert_array_equal(table.radiative_loss(self.Te, self.ne),
+                loaded.radiative_loss(self.Te, self.ne))
+        np.testing.assert_array_equal(
+                table.log10_abundance(self.Te, self.ne),
+                loaded.log10_abundance(self.Te, self.ne))
+
+    def test_bad_arguments(self):
+        with self.assertRaises(ValueError):
+            self.build('quintic')
+        with self.assertRaises(ValueError):
+            atomic.EquilibriumTable.build(self.ad, self.Te, self.density)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import atomic.cache as cache
+import atomic.manifest as manifest
+
+class TestManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data = os.path.join(self.tmp, 'data')
+        os.mkdir(self.data)
+        for name in ['scd89_ar.dat', 'acd89_ar.dat', 'scd96_ar.dat',
+                'acd96_ar.dat', 'scd96_li.dat', 'scd96r_li.dat',
+                'pec96#c_pju#c0.dat', 'README']:
+            open(os.path.join(self.data, name), 'w').close()
+
+        self.saved_directory = cache.directory
+        cache.directory = os.path.join(self.tmp, 'cache')
+
+    def tearDown(self):
+        cache.directory = self.saved_directory
+        shutil.rmtree(self.tmp)
+
+    def test_scan(self):
+        entries = manifest.scan(self.data)
+        names = [e[0] for e in entries]
+        self.assertNotIn('pec96#c_pju#c0.dat', names)
+        self.assertNotIn('README', names)
+        self.assertIn(['scd96r_li.dat', 'li', '96', 'scd', True], entries)
+
+    def test_latest_year(self):
+        index = manifest.ElementIndex.from_directory(self.data)
+        self.assertEqual(['89', '96'], index.years('argon'))
+        expected = {'scd' : 'scd96_ar.dat', 'acd' : 'acd96_ar.dat'}
+        self.assertEqual(expected, index.files('Ar'))
+
+    def test_explicit_year(self):
+        index = manifest.ElementIndex.from_directory(self.data)
+        self.assertEqual('scd89_ar.dat', index.files('ar', 89)['scd'])
+        with self.assertRaises(NotImplementedError):
+            index.files('ar', 93)
+
+    def test_resolved_files_not_used(self):
+        index = manifest.ElementIndex.from_directory(self.data)
+        self.assertEqual({'scd' : 'scd96_li.dat'}, index.files('lithium'))
+
+    def test_unknown_element(self):
+        index = manifest.ElementIndex.from_directory(self.data)
+        with self.assertRaises(NotImplementedError):
+            index.files('adamantium')
+
+    def test_manifest_written_and_read(self):
+        manifest.ElementIndex.from_directory(self.data)
+        self.assertTrue(os.path.isfile(manifest.manifest_name(self.data)))
+        self.assertEqual(manifest.scan(self.data), manifest.read(self.data))
+
+    def test_new_file_rebuilds(self):
+        index = manifest.ElementIndex.from_directory(self.data)
+        time.sleep(0.01)
+        open(os.path.join(self.data, 'scd96_ne.dat'), 'w').close()
+        self.assertFalse(index.is_current())
+        self.assertIsNone(manifest.read(self.data))
+        index = manifest.ElementIndex.from_directory(self.data)
+        self.assertEqual(['ar', 'li', 'ne'], index.elements())
+
+    def test_year_key(self):
+        years = sorted(['00', '96', '12', '89'], key=manifest.year_key)
+        self.assertEqual(['89', '96', '00', '12'], years)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import pickle
+import unittest
+import numpy as np
+import atomic
+from atomic.memo import EvaluationCache
+
+class TestEvaluationCache(unittest.TestCase):
+    def test_get_and_put(self):
+        memo = EvaluationCache()
+        self.assertIsNone(memo.get('a'))
+        memo.put('a', np.ones(3))
+        np.testing.assert_array_equal(np.ones(3), memo.get('a'))
+        self.assertFalse(memo.get('a').flags.writeable)
+        self.assertEqual((2, 1), (memo.hits, memo.misses))
+        self.assertEqual(24, memo.nbytes)
+
+    def test_least_recently_used_are_evicted(self):
+        memo = EvaluationCache(max_bytes=3 * 80)
+        for key in 'abc':
+            memo.put(key, np.zeros(10))
+        memo.get('a')
+        memo.put('d', np.zeros(10))
+        self.assertIsNone(memo.get('b'))
+        self.assertIsNotNone(memo.get('a'))
+        self.assertEqual(1, memo.evictions)
+        self.assertEqual(240, memo.nbytes)
+
+        memo.put('e', np.zeros(100)) # too large to keep
+        self.assertIsNone(memo.get('e'))
+        self.assertEqual(3, len(memo))
+
+    def test_pickle_starts_empty(self):
+        memo = EvaluationCache(1000)
+        memo.put('a', np.ones(3))
+        new = pickle.loads(pickle.dumps(memo))
+        self.assertEqual((0, 1000), (len(new), new.max_bytes))
+
+
+class TestMemoize(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('c')
+        self.Te = np.logspace(0, 3, 40)
+        self.ne = np.logspace(18, 20, 40)
+
+    def test_same_results(self):
+        rc = self.ad.coeffs['ionisation']
+        expected = rc.evaluate_all(self.Te, self.ne)
+        expected_k = rc(2, self.Te, self.ne)
+        memo = rc.memoize()
+        for i in range(2):
+            np.testing.assert_array_equal(expected,
+                    rc.evaluate_all(self.Te.copy(), self.ne.copy()))
+            np.testing.assert_array_equal(expected_k,
+                    rc(2, self.Te, self.ne))
+        self.assertEqual((2, 2), (memo.hits, memo.misses))
+
+        out = np.empty_like(expected)
+        self.assertIs(out, rc.evaluate_all(self.Te, self.ne, out=out))
+        np.testing.assert_array_equal(expected, out)
+        self.assertEqual(3, memo.hits)
+
+        rc(-1, self.Te, self.ne)
+        rc(len(rc.splines) - 1, self.Te, self.ne)
+        self.assertEqual(4, memo.hits)
+
+    def test_other_points_miss(self):
+        rc = self.ad.coeffs['ionisation']
+        memo = rc.memoize()
+        rc.evaluate_all(self.Te, self.ne)
+        rc.evaluate_all(self.Te, 2 * self.ne)
+        rc.evaluate_all(self.Te[:-1], self.ne[:-1])
+        self.assertEqual((0, 3), (memo.hits, memo.misses))
+
+    def test_shared_by_all_coefficients(self):
+        memo = self.ad.memoize()
+        S = self.ad.coeffs['ionisation']
+        alpha = self.ad.coeffs['recombination']
+        self.assertIs(memo, S.memo)
+        self.assertIs(memo, alpha.memo)
+        self.assertFalse(np.array_equal(S.evaluate_all(self.Te, self.ne),
+                alpha.evaluate_all(self.Te, self.ne)))
+        self.assertEqual((0, 2), (memo.hits, memo.misses))
+
+    def test_pipeline(self):
+        memo = self.ad.memoize()
+        eq = atomic.CollRadEquilibrium(self.ad)
+        expected = eq.ionisation_stage_distribution(self.Te, self.ne).y
+        y = eq.ionisation_stage_distribution(self.Te, self.ne)
+        np.testing.assert_array_equal(expected, y.y)
+        atomic.Radiation(y).power
+        self.assertEqual(2, memo.hits)
+
+    def test_new_interpolant_is_not_found(self):
+        rc = self.ad.coeffs['ionisation']
+        memo = rc.memoize()
+        rc.evaluate_all(self.Te, self.ne)
+        rc.interpolation = 'linear'
+        rc.evaluate_all(self.Te, self.ne)
+        rc.use_patch_table(rc.patch_table('linear'))
+        rc.evaluate_all(self.Te, self.ne)
+        self.assertEqual((0, 3), (memo.hits, memo.misses))
+
+if __name__ == '__main__':
+    unittest.main()
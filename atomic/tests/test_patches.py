@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import atomic
+from atomic import bspline, patches
+from atomic.plasma_state import PlasmaState
+
+class TestPatches(unittest.TestCase):
+    def setUp(self):
+        self.rc = atomic.element('c').coeffs['ionisation']
+        rng = np.random.RandomState(0)
+        # also outside the grid, where the splines stay at their edge
+        self.Te = 10**rng.uniform(-2, 5, 200)
+        self.ne = 10**rng.uniform(12, 23, 200)
+
+    def test_patch_table_same_as_spline(self):
+        x, y = self.rc.log_temperature, self.rc.log_density
+        arrays = self.rc.spline_arrays()
+        tx, ty = arrays['knots_temperature'], arrays['knots_density']
+        c = arrays['spline_coeffs']
+        table = patches.patch_table(x, y, tx, ty, c)
+        self.assertEqual((6, len(x) - 1, len(y) - 1, 4, 4), table.shape)
+
+        # the corner of cell (i, j) is its patch at u = v = 0.
+        i, j = 3, 5
+        expected = bspline.contract(c, *bspline.weights(tx, ty,
+            np.array(x[i]), np.array(y[j])))
+        np.testing.assert_allclose(expected, table[:, i, j, 0, 0], rtol=1e-12)
+
+    def test_scalar_evaluator_same_as___call__(self):
+        f = self.rc.scalar_evaluator()
+        self.assertIs(f, self.rc.scalar_evaluator())
+        for k in range(self.rc.nuclear_charge):
+            expected = self.rc.log10(k, self.Te, self.ne)
+            result = [f.log10(k, t, n) for t, n in zip(self.Te, self.ne)]
+            np.testing.assert_allclose(expected, result, rtol=1e-12)
+
+    def test_scalar_evaluator_every_interpolation(self):
+        for interpolation in ['spline', 'patches', 'linear']:
+            self.rc.interpolation = interpolation
+            f = self.rc.scalar_evaluator()
+            for k in range(self.rc.nuclear_charge):
+                expected = self.rc.log10(k, self.Te, self.ne)
+                result = [f.log10(k, t, n) for t, n in zip(self.Te, self.ne)]
+                np.testing.assert_allclose(expected, result, rtol=1e-12)
+        self.rc.interpolation = 'chebyshev'
+        with self.assertRaises(ValueError):
+            self.rc.scalar_evaluator()
+
+    def test_scalar_evaluator_call(self):
+        f = self.rc.scalar_evaluator()
+        self.assertAlmostEqual(1, f(2, 50., 1e19) / self.rc(2, 50., 1e19))
+        np.testing.assert_allclose(self.rc(2, self.Te[:3], self.ne[:3]),
+                f.evaluate(2, self.Te[:3], self.ne[:3]))
+
+    def test_scalar_evaluator_bad_stage(self):
+        f = self.rc.scalar_evaluator()
+        with self.assertRaises(IndexError):
+            f(6, 50., 1e19)
+        with self.assertRaises(IndexError):
+            f(-1, 50., 1e19)
+
+
+class TestPatchTable(unittest.TestCase):
+    """interpolation='patches' agrees with the scipy splines to 1e-10 in
+    log10 of the coefficients.
+    """
+    rtol = 1e-10
+
+    def setUp(self):
+        self.ad = atomic.element('c', interpolation='patches')
+        self.rc = self.ad.coeffs['ionisation']
+        rng = np.random.RandomState(1)
+        self.Te = 10**rng.uniform(-2, 5, 300)
+        self.ne = 10**rng.uniform(12, 23, 300)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_same_as_scipy(self):
+        self.assertEqual('patches', self.rc.interpolation)
+        log_Te, log_ne = np.log10(self.Te), np.log10(self.ne)
+        expected = np.array([s(log_Te, log_ne, grid=False)
+            for s in self.rc.splines])
+        np.testing.assert_allclose(expected,
+                self.rc.log10_all(self.Te, self.ne), rtol=self.rtol)
+        for k in range(self.rc.nuclear_charge):
+            np.testing.assert_allclose(expected[k],
+                    self.rc.log10(k, self.Te, self.ne), rtol=self.rtol)
+
+    def test_every_datatype(self):
+        state = PlasmaState(self.Te, self.ne)
+        spline = atomic.element('c')
+        for key in self.ad.coeffs:
+            np.testing.assert_allclose(
+                    spline.coeffs[key].log10_all(state),
+                    self.ad.coeffs[key].log10_all(state), rtol=self.rtol)
+
+    def test_weights(self):
+        table = self.rc.patch_table()
+        x, y = table.log_temperature, table.log_density
+        cell, w = patches.weights(x, y, x[[2, -1]], y[[4, -1]])
+        # at a corner the value is the constant term of its cell
+        self.assertEqual(2 * (len(y) - 1) + 4, cell[0])
+        self.assertEqual(1., w[0, 0])
+        np.testing.assert_array_equal(0., w[0, 1:])
+        # the far edge is the end of the last cell
+        self.assertEqual((len(x) - 1) * (len(y) - 1) - 1, cell[1])
+        np.testing.assert_array_equal(1., w[1])
+
+    def test_shapes(self):
+        Te = self.Te[:12].reshape(3, 4)
+        ne = self.ne[:12].reshape(3, 4)
+        expected = self.rc.log10_all(Te.ravel(), ne.ravel())
+        np.testing.assert_array_equal(expected.reshape(-1, 3, 4),
+                self.rc.log10_all(Te, ne))
+        out = np.empty((4, 3)).T
+        self.rc.log10(2, Te, ne, out=out)
+        np.testing.assert_allclose(expected[2].reshape(3, 4), out,
+                rtol=1e-14)
+        np.testing.assert_allclose(expected[-1].reshape(3, 4),
+                self.rc.log10(-1, Te, ne), rtol=1e-14)
+
+    def test_grid(self):
+        Te, ne = np.sort(self.Te[:40]), self.ne[:15]
+        X, Y = np.meshgrid(Te, ne, indexing='ij')
+        for interpolation in ['patches', 'linear']:
+            self.rc.interpolation = interpolation
+            expected = self.rc.log10_all(X, Y)
+            np.testing.assert_allclose(expected,
+                    self.rc.log10_all(Te, ne, grid=True), rtol=1e-13)
+            np.testing.assert_allclose(10**expected[3],
+                    self.rc(3, Te, ne, grid=True), rtol=1e-12)
+
+    def test_save_and_load(self):
+        filename = os.path.join(self.tmp, 'scd96_c.patches')
+        self.rc.patch_table().save(filename)
+        table = patches.PatchTable.load(filename)
+        # not copied out of the memory map
+        self.assertFalse(table.table.flags.writeable)
+
+        rc = atomic.element('c').coeffs['ionisation']
+        rc.use_patch_table(table)
+        self.assertEqual('patches', rc.interpolation)
+        self.assertIs(table, rc.patch_table())
+        np.testing.assert_array_equal(self.rc.log10_all(self.Te, self.ne),
+                rc.log10_all(self.Te, self.ne))
+
+        with self.assertRaises(ValueError):
+            atomic.element('li').coeffs['ionisation'].use_patch_table(table)
+
+    def test_copy(self):
+        self.rc.patch_table()
+        rc = self.rc.copy()
+        self.assertEqual('patches', rc.interpolation)
+        self.assertIs(self.rc.patch_table(), rc.patch_table())
+
+    def test_unknown_interpolation(self):
+        with self.assertRaises(ValueError):
+            self.rc.interpolation = 'quintic'
+
+
+class TestLinear(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('c', interpolation='linear')
+        self.rc = self.ad.coeffs['ionisation']
+        self.z = self.rc.log_coeff[:self.rc.nuclear_charge]
+        self.x, self.y = self.rc.log_temperature, self.rc.log_density
+        rng = np.random.RandomState(2)
+        self.X = rng.uniform(self.x[0], self.x[-1], 500)
+        self.Y = rng.uniform(self.y[0], self.y[-1], 500)
+
+    def log10_all(self, X, Y):
+        return self.rc.log10_all(10**X, 10**Y)
+
+    def test_interpolates_the_table(self):
+        X, Y = np.meshgrid(self.x, self.y, indexing='ij')
+        np.testing.assert_allclose(self.z, self.log10_all(X, Y), rtol=1e-14)
+
+    def test_no_overshoot(self):
+        i, _ = patches.locate(self.x, self.X)
+        j, _ = patches.locate(self.y, self.Y)
+        corners = np.array([self.z[:, i, j], self.z[:, i + 1, j],
+            self.z[:, i, j + 1], self.z[:, i + 1, j + 1]])
+        c = self.log10_all(self.X, self.Y)
+        self.assertTrue(np.all(c >= corners.min(axis=0) - 1e-12))
+        self.assertTrue(np.all(c <= corners.max(axis=0) + 1e-12))
+
+    def test_monotone(self):
+        X = np.linspace(self.x[0], self.x[-1], 1000)
+        for k in range(self.rc.nuclear_charge):
+            for j in range(len(self.y)):
+                if np.all(np.diff(self.z[k, :, j]) >= 0):
+                    c = self.rc.log10(k, 10**X, 10**self.y[j])
+                    self.assertTrue(np.all(np.diff(c) >= -1e-12))
+
+    def test_outside_the_grid(self):
+        c = self.log10_all(np.array([self.x[0] - 1, self.x[-1] + 1]),
+                np.array([self.y[0] - 1, self.y[-1] + 1]))
+        np.testing.assert_array_equal(self.z[:, 0, 0], c[:, 0])
+        np.testing.assert_array_equal(self.z[:, -1, -1], c[:, 1])
+
+    def test_every_datatype(self):
+        state = PlasmaState(10**self.X, 10**self.Y)
+        for key, rc in self.ad.coeffs.items():
+            self.assertEqual('linear', rc.interpolation)
+            all_ = rc.evaluate_all(state)
+            np.testing.assert_allclose(all_[1], rc(1, state), rtol=1e-14)
+
+if __name__ == '__main__':
+    unittest.main()
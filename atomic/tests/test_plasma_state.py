@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import atomic
+from atomic.plasma_state import PlasmaState, as_plasma_state
+
+class TestPlasmaState(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('li')
+        self.Te = np.logspace(0, 3, 20)
+        self.ne = 1e19
+        self.state = PlasmaState(self.Te, self.ne)
+
+    def test_broadcast(self):
+        self.assertEqual((20,), self.state.shape)
+        np.testing.assert_allclose(19., self.state.log_density)
+
+    def test_same_as_arrays(self):
+        for key in ['ionisation', 'recombination', 'line_power']:
+            rc = self.ad.coeffs[key]
+            np.testing.assert_allclose(rc.evaluate_all(self.Te, self.ne),
+                    rc.evaluate_all(self.state))
+            np.testing.assert_allclose(rc(1, self.Te, self.ne),
+                    rc(1, self.state), rtol=1e-8)
+
+    def test_weights_once_per_grid(self):
+        S = self.ad.coeffs['ionisation']
+        alpha = self.ad.coeffs['recombination']
+        S.evaluate_all(self.state)
+        alpha.evaluate_all(self.state)
+        self.assertEqual(1, self.state.grids())
+        self.assertIs(self.state.weights(S.interpolant()),
+                self.state.weights(alpha.interpolant()))
+
+    def test_as_plasma_state(self):
+        self.assertIs(self.state, as_plasma_state(self.state))
+        with self.assertRaises(TypeError):
+            as_plasma_state(self.state, self.ne)
+        with self.assertRaises(TypeError):
+            as_plasma_state(self.Te)
+        self.assertEqual((20,), as_plasma_state(self.Te, self.ne).shape)
+
+    def test_coll_rad_equilibrium(self):
+        eq = atomic.CollRadEquilibrium(self.ad)
+        y1 = eq.ionisation_stage_distribution(self.Te, self.ne)
+        y2 = eq.ionisation_stage_distribution(self.state)
+        np.testing.assert_allclose(y1.y, y2.y)
+        self.assertIs(self.state, y2.plasma_state)
+
+    def test_radiation_reuses_state(self):
+        eq = atomic.CollRadEquilibrium(self.ad)
+        y = eq.ionisation_stage_distribution(self.state)
+        atomic.Radiation(y).power
+        self.assertEqual(1, self.state.grids())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -53,6 +53,33 @@ class TestRadiation(unittest.TestCase):
         result = rad.get_neutral_density()
         self.assertEqual(expected, result)
 
+    def test_power_n_dimensional(self):
+        eq = atomic.CollRadEquilibrium(atomic.element('carbon'))
+        te = np.logspace(0, 3, 12).reshape(3, 4)
+        rad = atomic.Radiation(eq.ionisation_stage_distribution(te, 1e19),
+                impurity_fraction=0.01)
+        flat = atomic.Radiation(eq.ionisation_stage_distribution(te.ravel(),
+            1e19), impurity_fraction=0.01)
+        power, expected = rad.power, flat.power
+        for key in expected:
+            np.testing.assert_allclose(expected[key].reshape(3, 4),
+                    power[key], rtol=1e-12)
+        self.assertEqual((3, 4), rad.specific_power['total'].shape)
+
+    def test_temperature_derivative(self):
+        eq = atomic.CollRadEquilibrium(atomic.element('carbon'))
+        te = np.logspace(0.5, 2.5, 20)
+        h = 1e-6
+        y = eq.ionisation_stage_distribution(te, 1e19, derivative=True)
+        derivative = atomic.Radiation(y, neutral_fraction=1e-2
+                ).temperature_derivative()
+
+        power = [atomic.Radiation(eq.ionisation_stage_distribution(t, 1e19),
+            neutral_fraction=1e-2).power for t in [te * (1 + h), te * (1 - h)]]
+        for key in ['line_power', 'continuum_power', 'total']:
+            expected = (power[0][key] - power[1][key]) / (2 * h * te)
+            np.testing.assert_allclose(derivative[key], expected, rtol=1e-4)
+
     @unittest.skip("")
     def test_power(self):
         rad = atomic.Radiation(self.y1)
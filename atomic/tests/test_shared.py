@@ -0,0 +1,53 @@
+import multiprocessing
+import pickle
+import unittest
+
+import numpy as np
+import atomic
+
+def _ionisation(handle, k, Te, ne):
+    ad = atomic.AtomicData.attach(handle)
+    return ad.coeffs['ionisation'](k, Te, ne)
+
+class TestShared(unittest.TestCase):
+    """Requires data from ./fetch_adas_data to be in the correct spot."""
+    def setUp(self):
+        self.ad = atomic.element('li')
+        self.handle = self.ad.share()
+
+    def tearDown(self):
+        self.handle.unlink()
+
+    def test_attach_same_values(self):
+        ad = atomic.AtomicData.attach(self.handle)
+        self.assertEqual('Li', ad.element)
+        self.assertEqual(set(self.ad.coeffs), set(ad.coeffs))
+        Te = np.logspace(0, 3, 5)
+        for k in range(3):
+            np.testing.assert_allclose(self.ad.coeffs['recombination'](k, Te, 1e19),
+                    ad.coeffs['recombination'](k, Te, 1e19))
+
+    def test_attach_read_only(self):
+        ad = atomic.AtomicData.attach(self.handle)
+        with self.assertRaises(ValueError):
+            ad.coeffs['ionisation'].log_coeff[0, 0, 0] = 0.
+
+    def test_arrays_outlive_atomic_data(self):
+        rc = atomic.AtomicData.attach(pickle.loads(pickle.dumps(self.handle))
+                ).coeffs['ionisation']
+        import gc
+        gc.collect()
+        np.testing.assert_allclose(self.ad.coeffs['ionisation'](0, 10., 1e19),
+                rc(0, 10., 1e19))
+
+    def test_handle_is_small(self):
+        self.assertLess(len(pickle.dumps(self.handle)), 4096)
+
+    def test_attach_in_worker(self):
+        expected = self.ad.coeffs['ionisation'](1, 50., 1e19)
+        with multiprocessing.Pool(1) as pool:
+            result = pool.apply(_ionisation, (self.handle, 1, 50., 1e19))
+        np.testing.assert_allclose(expected, result)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import atomic.storage as storage
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp, 'arrays.bin')
+        self.arrays = {'a' : np.arange(5.), 'b' : np.ones((2, 3), dtype=int),
+                'empty' : np.zeros(0)}
+        storage.save(self.filename, self.arrays, {'answer' : 42})
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_round_trip(self):
+        header, arrays = storage.load(self.filename)
+        self.assertEqual({'answer' : 42}, header)
+        for key, value in self.arrays.items():
+            np.testing.assert_equal(value, arrays[key])
+            self.assertEqual(value.dtype, arrays[key].dtype)
+
+    def test_load_mmap_is_read_only(self):
+        header, arrays = storage.load(self.filename)
+        with self.assertRaises(ValueError):
+            arrays['a'][0] = 1.
+
+    def test_load_no_mmap(self):
+        header, arrays = storage.load(self.filename, mmap=False)
+        np.testing.assert_equal(self.arrays['b'], arrays['b'])
+
+    def test_read_header(self):
+        self.assertEqual({'answer' : 42}, storage.read_header(self.filename))
+
+    def test_not_a_storage_file(self):
+        with open(self.filename, 'w') as f:
+            f.write('garbage')
+        with self.assertRaises(IOError):
+            storage.load(self.filename)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -26,6 +26,44 @@ class TestRateEquations(unittest.TestCase):
         result = S[-1]
         np.testing.assert_equal(expected, result)
 
+    def test_banded_jacobian(self):
+        """The banded Jacobian is that of derivs() by finite differences."""
+        self.rt._set_temperature_and_density_grid(self.temperature[:4],
+                self.density)
+        self.rt._set_initial_conditions()
+        n = self.rt.y.size
+        y = self.rt._by_point(np.random.RandomState(0).uniform(size=n))
+
+        def f(y):
+            return self.rt._by_point(self.rt.derivs(self.rt._by_state(y),
+                0.).copy())
+
+        h = 1e-3
+        full = np.array([(f(y + h * e) - f(y - h * e)) / (2 * h)
+            for e in np.eye(n)]).T
+        jac = self.rt._banded_jacobian()
+        self.assertEqual((3, n), jac.shape)
+        banded = np.zeros((n, n))
+        for i in range(n):
+            for j in range(max(0, i - 1), min(n, i + 2)):
+                banded[i, j] = jac[i - j + 1, j]
+        np.testing.assert_allclose(full, banded, rtol=1e-8,
+                atol=1e-8 * np.abs(full).max())
+
+    def test_solve_jacobian(self):
+        """The analytic Jacobian gives the same solution as a numerical
+        one, with far fewer Jacobian evaluations."""
+        with_jacobian = self.rt.solve(self.times, self.temperature,
+                self.density)
+        nfe = self.rt.info['nfe'][-1]
+        numerical = self.rt.solve(self.times, self.temperature,
+                self.density, jacobian=False)
+        self.assertLess(nfe, self.rt.info['nfe'][-1])
+        self.assertEqual((len(self.times), 4, 50),
+                np.array([a.y for a in with_jacobian]).shape)
+        for a, b in zip(with_jacobian, numerical):
+            np.testing.assert_allclose(a.y, b.y, atol=1e-5)
+
     @unittest.skip("")
     def test_derivs(self):
         # rate_equations = RateEquations(atomic_data)
@@ -53,6 +91,17 @@ class TestRateEquationsWithDiffusion(unittest.TestCase):
         result = [np.sum(yy.abundances[i].y)/len(temperature) for i in range(len(times))]
         np.testing.assert_array_almost_equal(expected, result)
 
+    def test_jacobian(self):
+        ad = atomic.element('carbon')
+        temperature = np.logspace(0, 3, 20)
+        times = np.logspace(-7, 0, 40)
+        times -= times[0]
+        rt = atomic.RateEquationsWithDiffusion(ad)
+        with_jacobian = rt.solve(times, temperature, 1e19, 1e-3)
+        numerical = rt.solve(times, temperature, 1e19, 1e-3, jacobian=False)
+        for a, b in zip(with_jacobian, numerical):
+            np.testing.assert_allclose(a.y, b.y, atol=1e-5)
+
 class TestRateEquationsSolution(unittest.TestCase):
     @unittest.skip("")
     def test___getitem__(self):
@@ -0,0 +1,75 @@
+import unittest
+import numpy as np
+import atomic
+from atomic.workspace import Workspace, scratch
+
+class TestWorkspace(unittest.TestCase):
+    def test_array_reused(self):
+        ws = Workspace()
+        a = ws.array('a', (3, 4))
+        self.assertIs(a, ws.array('a', (3, 4)))
+        self.assertIsNot(a, ws.array('a', (4, 3)))
+        self.assertIsNot(a, ws.array('b', (3, 4)))
+        self.assertEqual(8 * 12 * 3, ws.nbytes)
+        ws.clear()
+        self.assertEqual(0, ws.nbytes)
+
+    def test_scratch_without_workspace(self):
+        self.assertEqual((2, 5), scratch(None, 'a', (2, 5)).shape)
+
+class TestOutArguments(unittest.TestCase):
+    def setUp(self):
+        self.ad = atomic.element('li')
+        self.Te = np.logspace(0, 3, 20)
+        self.ne = 1e19 * np.ones(20)
+        self.state = atomic.PlasmaState(self.Te, self.ne)
+        self.ws = Workspace()
+
+    def test_rate_coefficient(self):
+        rc = self.ad.coeffs['ionisation']
+        out = np.empty((3, 20))
+        result = rc.evaluate_all(self.state, out=out, workspace=self.ws)
+        self.assertIs(out, result)
+        np.testing.assert_allclose(rc.evaluate_all(self.Te, self.ne), out)
+
+        out1 = np.empty(20)
+        rc(1, self.state, out=out1, workspace=self.ws)
+        np.testing.assert_allclose(rc(1, self.Te, self.ne), out1, rtol=1e-8)
+        rc(1, self.Te, self.ne, out=out1)
+        np.testing.assert_allclose(rc(1, self.Te, self.ne), out1)
+
+    def test_ionisation_stage_distribution(self):
+        eq = atomic.CollRadEquilibrium(self.ad)
+        expected = eq.ionisation_stage_distribution(self.Te, self.ne).y
+        out = np.empty((4, 20))
+        for i in range(2):
+            y = eq.ionisation_stage_distribution(self.state, out=out,
+                    workspace=self.ws)
+            self.assertIs(out, y.y)
+            np.testing.assert_allclose(expected, out)
+
+    def test_radiation(self):
+        eq = atomic.CollRadEquilibrium(self.ad)
+        rad = atomic.Radiation(eq.ionisation_stage_distribution(self.state),
+                neutral_fraction=1e-2)
+        expected = rad.power
+        out = {}
+        rad._compute_power(out=out, workspace=self.ws)
+        total = out['total']
+        rad._compute_power(out=out, workspace=self.ws)
+        self.assertIs(total, out['total'])
+        for key in expected:
+            np.testing.assert_allclose(expected[key], out[key])
+
+    def test_derivs(self):
+        rt = atomic.RateEquations(self.ad)
+        rt._set_temperature_and_density_grid(self.Te, 1e19)
+        rt._set_initial_conditions()
+        y = np.random.RandomState(0).rand(rt.y.size)
+        expected = rt.derivs(y, 0.).copy()
+        out = np.empty_like(y)
+        self.assertIs(out, rt.derivs(y, 0., out=out).base)
+        np.testing.assert_allclose(expected, out)
+
+if __name__ == '__main__':
+    unittest.main()
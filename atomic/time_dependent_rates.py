@@ -3,6 +3,7 @@ import scipy.integrate
 
 from .abundance import FractionalAbundance
 from .collisional_radiative import CollRadEquilibrium
+from .plasma_state import PlasmaState
 
 class RateEquations(object):
     """
@@ -14,6 +15,7 @@ class RateEquations(object):
         temperature: a list of temperature points at which the rate equations
             will be integrated.
         density: a float represing the density.
+        plasma_state: a PlasmaState of temperature and density.
         y: an np.array of dimensions self.y_shape.
             Used as initial conditions for the integrator.
         y_shape: (nuclear_charge+1, # temperature points)
@@ -22,26 +24,39 @@ class RateEquations(object):
             Both have arrays of zeros at their highest index.
         dydt: array with dimensions y_shape. Initialized to zero, 
             gets changed by derivs().
+        ionisation_flux, recombination_flux: scratch arrays of derivs(),
+            so that it allocates nothing.
+        info (dict): odeint's information about the last solve(), e.g.
+            'nfe' and 'nje', the cumulative numbers of derivs() and Jacobian
+            evaluations at each time.
     """
     def __init__(self, atomic_data):
         self.atomic_data = atomic_data
         self.nuclear_charge = atomic_data.nuclear_charge
 
     def _set_temperature_and_density_grid(self, temperature, density):
+        if isinstance(temperature, PlasmaState):
+            self.plasma_state = temperature
+            temperature, density = temperature.temperature, temperature.density
+        else:
+            self.plasma_state = PlasmaState(temperature, density)
         self.temperature = temperature
         self.density = density
 
     def _set_initial_conditions(self):
-        self.y_shape = (self.nuclear_charge + 1, len(self.temperature))
+        self.y_shape = (self.nuclear_charge + 1,) + self.plasma_state.shape
         self._init_y()
         self._init_coeffs()
 
     def _init_y(self):
         """Start with the ions all in the +0 state at t=0."""
         y = np.zeros(self.y_shape)
-        y[0] = np.ones_like(self.temperature)
+        y[0] = 1.
         self.y = y.ravel() #functions like MMA's Flatten[] here
         self.dydt = np.zeros(self.y_shape)
+        self.ionisation_flux = np.zeros(self.y_shape)
+        self.recombination_flux = np.zeros((self.nuclear_charge,)
+                + self.y_shape[1:])
 
     def _init_coeffs(self):
         """Initialises ionisation and recombination coefficents S and alpha.
@@ -54,22 +69,24 @@ class RateEquations(object):
 
         recombination_coeff = self.atomic_data.coeffs['recombination']
         ionisation_coeff = self.atomic_data.coeffs['ionisation']
-        for k in range(self.nuclear_charge):
-            S[k] = ionisation_coeff(k, self.temperature, self.density)
-            alpha[k] = recombination_coeff(k, self.temperature, self.density)
+        ionisation_coeff.evaluate_all(self.plasma_state, out=S[:-1])
+        recombination_coeff.evaluate_all(self.plasma_state, out=alpha[:-1])
 
         self.S = S
         self.alpha = alpha
 
-    def derivs(self, y_, t0):
+    def derivs(self, y_, t0, out=None):
         """Construct the r.h.s. of the rate equations.
 
         This function is executed several times for each odeint step.
         If 100 'times' happen this was executed probably 500 times?
         Also since dydt is an array, the assignment is a copy so
         it gets changed each call.
+
+        Nothing is allocated: the result is written into self.dydt, or
+        into out (a flat array of the size of y_) if it is given.
         """
-        dydt = self.dydt
+        dydt = self.dydt if out is None else out.reshape(self.y_shape)
         S = self.S
         alpha_to = self.alpha
         ne = self.density
@@ -78,43 +95,92 @@ class RateEquations(object):
         # rate coeffients to specific charge states, then switch it back
         # to a 1D array so that odeint can handle it: y0 must be 1D.
         y = y_.reshape(self.y_shape)
-        current = slice(1, -1) # everything but the first and last
-        upper = slice(2, None)
-        lower = slice(None, -2)
-        dydt[current]  = y[lower] * S[lower]
-        dydt[current] += y[upper] * alpha_to[current]
-        dydt[current] -= y[current] * S[current]
-        dydt[current] -= y[current] * alpha_to[lower]
-
-        current, upper = 0, 1 # neutral and single ionised state
-        dydt[current] = y[upper] * alpha_to[current] - y[current] * S[current]
-
-        current, lower = -1, -2 # fully stripped and 1 electron state
-        dydt[current] = y[lower] * S[lower] - y[current] * alpha_to[lower]
+
+        # ionisation k -> k+1 (zero for the fully stripped state) and
+        # recombination k+1 -> k.
+        ionisation = np.multiply(y, S, out=self.ionisation_flux)
+        recombination = np.multiply(y[1:], alpha_to[:-1],
+                out=self.recombination_flux)
+
+        np.negative(ionisation, out=dydt)
+        dydt[1:] += ionisation[:-1]
+        dydt[:-1] += recombination
+        dydt[1:] -= recombination
         dydt *= ne
 
         return dydt.ravel()
 
-    def solve(self, time, temperature, density):
+    def _banded_jacobian(self):
+        """The Jacobian of derivs() for y ordered point by point, i.e. as
+        y.reshape(nuclear_charge + 1, -1).T.ravel().
+
+        The charge states of a point only exchange ions with their
+        neighbours, and not with other points, so in that order the
+        Jacobian is tridiagonal.  It is returned in the banded form of
+        odeint(ml=1, mu=1): jac[i - j + 1, j] = d dydt[i] / d y[j].  The
+        entries between the last state of a point and the first of the
+        next are zero, since S[-1] and alpha[-1] are.
+        """
+        ne = self.density
+        S, alpha = self.S, self.alpha
+        jac = np.zeros((3,) + self.y_shape)
+        # d dydt[k-1] / d y[k] = ne alpha[k-1]
+        jac[0, 1:] = ne * alpha[:-1]
+        # d dydt[k] / d y[k] = -ne (S[k] + alpha[k-1])
+        jac[1] = -ne * S
+        jac[1, 1:] -= ne * alpha[:-1]
+        # d dydt[k+1] / d y[k] = ne S[k]
+        jac[2] = ne * S
+        return np.ascontiguousarray(np.swapaxes(jac.reshape(3, len(S), -1),
+            1, 2)).reshape(3, -1)
+
+    def _by_point(self, y):
+        """y, ordered by charge state as derivs() takes it, reordered by
+        point."""
+        return np.ascontiguousarray(y.reshape(self.nuclear_charge + 1, -1).T
+                ).ravel()
+
+    def _by_state(self, y):
+        """The inverse of _by_point."""
+        return np.ascontiguousarray(y.reshape(-1, self.nuclear_charge + 1).T
+                ).ravel()
+
+    def solve(self, time, temperature, density=None, jacobian=True):
         """
         Integrate the rate equations.
 
         Args:
             time (np.array): A sequence of time points for which to solve.
-            temperature (np.array): Electron temperature grid to solve on [eV].
+            temperature (np.array): Electron temperature grid to solve on [eV],
+                or a PlasmaState.
             density (float): Electron density grid to solve on [m^-3].
+                None with a PlasmaState.
+            jacobian (bool): if True, the stiff solver is given the analytic,
+                tridiagonal Jacobian (see _banded_jacobian).  Otherwise it
+                makes a full one by finite differences, which takes
+                (nuclear_charge + 1) * len(temperature) calls to derivs().
 
         Returns:
             a RateEquationSolution
         """
         self._set_temperature_and_density_grid(temperature, density)
         self._set_initial_conditions()
-        solution  = scipy.integrate.odeint(self.derivs, self.y, time)
+        if jacobian:
+            # the rate equations are linear, so the Jacobian is constant.
+            jac = self._banded_jacobian()
+            solution, self.info = scipy.integrate.odeint(
+                    lambda y, t: self._by_point(self.derivs(self._by_state(y),
+                        t)), self._by_point(self.y), time,
+                    Dfun=lambda y, t: jac, ml=1, mu=1, full_output=True)
+            solution = np.array([self._by_state(s) for s in solution])
+        else:
+            solution, self.info = scipy.integrate.odeint(self.derivs, self.y,
+                    time, full_output=True)
 
         abundances = []
         for s in solution.reshape(time.shape + self.y_shape):
             abundances.append(FractionalAbundance(self.atomic_data, s, self.temperature,
-                self.density))
+                self.density, plasma_state=self.plasma_state))
 
         return RateEquationsSolution(time, abundances)
 
@@ -134,9 +200,16 @@ class RateEquationsWithDiffusion(RateEquations):
         dydt[0] += 1/tau # ensures stable population of 1
         return dydt.ravel()
 
-    def solve(self, time, temperature, density, diffusion_time):
+    def _banded_jacobian(self):
+        jac = super(self.__class__, self)._banded_jacobian()
+        jac[1] -= 1/self.diffusion_time
+        return jac
+
+    def solve(self, time, temperature, density, diffusion_time,
+            jacobian=True):
         self.diffusion_time = diffusion_time
-        return super(self.__class__, self).solve(time, temperature, density)
+        return super(self.__class__, self).solve(time, temperature, density,
+                jacobian)
 
 
 class RateEquationsSolution(object):
@@ -152,6 +225,7 @@ class RateEquationsSolution(object):
         self.atomic_data = y.atomic_data
         self.temperature = y.temperature
         self.density = y.density
+        self.plasma_state = y.plasma_state
 
     def _compute_y_in_collrad(self):
         """
@@ -159,8 +233,7 @@ class RateEquationsSolution(object):
         equilibrum.
         """
         eq = CollRadEquilibrium(self.atomic_data)
-        y_collrad = eq.ionisation_stage_distribution(self.temperature,
-                self.density)
+        y_collrad = eq.ionisation_stage_distribution(self.plasma_state)
 
         self.y_collrad = y_collrad
 
@@ -231,7 +304,7 @@ class RateEquationsSolution(object):
         new_concentrations = []
         for y in concentrations:
             f = FractionalAbundance(self.atomic_data, y, self.temperature,
-                    self.density)
+                    self.density, plasma_state=self.plasma_state)
             new_concentrations.append(f)
         return self.__class__(times, new_concentrations)
 
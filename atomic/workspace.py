@@ -0,0 +1,58 @@
+"""
+Scratch arrays that are kept between calls.
+
+A code that evaluates the same kind of quantities over and over, like a
+transport code once per cell and time step, can give a Workspace to
+RateCoefficient.evaluate_all, CollRadEquilibrium.ionisation_stage_distribution,
+Radiation._compute_power and RateEquations.derivs.  Their temporary arrays
+are then allocated on the first call and reused on later calls with the
+same shapes:
+
+    >>> state = PlasmaState(Te, ne)                              # doctest: +SKIP
+    >>> workspace = Workspace()                                  # doctest: +SKIP
+    >>> y = np.empty((Z + 1,) + Te.shape)                        # doctest: +SKIP
+    >>> for step in steps:
+    ...     eq.ionisation_stage_distribution(state, out=y,
+    ...             workspace=workspace)                         # doctest: +SKIP
+
+Arrays returned from a call with a workspace may be overwritten by the next
+call with the same workspace, unless out= arrays were given for them.
+A workspace must not be shared between threads.
+"""
+import numpy as np
+
+
+class Workspace(object):
+    """Named scratch arrays of float64.
+
+    There is one array per name and shape, so asking for different shapes
+    under one name (e.g. for profiles of different length) keeps them all.
+    clear() frees them.
+    """
+    def __init__(self):
+        self._arrays = {}
+
+    def array(self, name, shape):
+        """The array called name, of the given shape, with uninitialised
+        contents.  It is only allocated on the first call.
+        """
+        key = name, tuple(shape)
+        a = self._arrays.get(key)
+        if a is None:
+            a = np.empty(shape)
+            self._arrays[key] = a
+        return a
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in self._arrays.values())
+
+    def clear(self):
+        self._arrays.clear()
+
+
+def scratch(workspace, name, shape):
+    """workspace.array(name, shape), or a new array without a workspace."""
+    if workspace is None:
+        return np.empty(shape)
+    return workspace.array(name, shape)
@@ -0,0 +1,98 @@
+"""
+Memory allocated by one call, with and without out= arrays and a Workspace.
+
+This is what a transport code pays per cell and time step.  The peak of
+the memory traced by tracemalloc during the call is shown, after a first
+call that sets up the PlasmaState and the Workspace.
+
+What is left with buffers is numpy's own iteration buffer (64 kB) for
+multiplying (Z, N) arrays by (N,) arrays when N is small; it does not grow
+with the number of points.
+
+CollRadEquilibrium.reduced never makes (Z, N) arrays.  Given arrays it
+takes the points in blocks, each with a PlasmaState of its own, so that the
+basis weights (32 numbers per point, see plasma_state.py) go with the
+block; given a PlasmaState it uses the weights the state already keeps.
+Either way about 6 numbers per point are left in the result.
+
+    $ python benchmarks/allocations.py
+"""
+import time
+import tracemalloc
+
+import numpy as np
+import atomic
+from atomic.workspace import Workspace
+
+element = 'argon'
+npoints = 1000
+repeat = 20
+
+
+def measure(f):
+    """Peak bytes allocated during f(), and its time per call."""
+    f()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    f()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for i in range(repeat):
+        f()
+    return peak, (time.perf_counter() - t0) / repeat
+
+
+ad = atomic.element(element)
+Z = ad.nuclear_charge
+temperature = np.logspace(0, 3, npoints)
+density = 1e19 * np.ones(npoints)
+
+state = atomic.PlasmaState(temperature, density)
+workspace = Workspace()
+rc = ad.coeffs['ionisation']
+eq = atomic.CollRadEquilibrium(ad)
+y = eq.ionisation_stage_distribution(state)
+rad = atomic.Radiation(y)
+rt = atomic.RateEquations(ad)
+rt._set_temperature_and_density_grid(temperature, 1e19)
+rt._set_initial_conditions()
+
+c1 = np.empty(npoints)
+cZ = np.empty((Z, npoints))
+yZ = np.empty((Z + 1, npoints))
+power = {}
+dydt = np.empty(rt.y.size)
+
+cases = [
+    ('RateCoefficient.__call__',
+        lambda: rc(3, temperature, density),
+        lambda: rc(3, state, out=c1, workspace=workspace)),
+    ('RateCoefficient.evaluate_all',
+        lambda: rc.evaluate_all(temperature, density),
+        lambda: rc.evaluate_all(state, out=cZ, workspace=workspace)),
+    ('ionisation_stage_distribution',
+        lambda: eq.ionisation_stage_distribution(temperature, density),
+        lambda: eq.ionisation_stage_distribution(state, out=yZ,
+            workspace=workspace)),
+    ('CollRadEquilibrium.reduced',
+        lambda: eq.reduced(temperature, density),
+        lambda: eq.reduced(state, workspace=workspace)),
+    ('Radiation._compute_power',
+        lambda: rad._compute_power(),
+        lambda: rad._compute_power(out=power, workspace=workspace)),
+    ('RateEquations.derivs',
+        lambda: rt.derivs(rt.y, 0.),
+        lambda: rt.derivs(rt.y, 0., out=dydt)),
+]
+
+print('%s, %d points; peak bytes allocated per call, time per call'
+        % (element, npoints))
+print('%-32s %22s %22s' % ('', 'plain', 'out= and workspace'))
+for name, plain, buffered in cases:
+    p0, t0 = measure(plain)
+    p1, t1 = measure(buffered)
+    print('%-32s %10d B %7.3f ms %10d B %7.3f ms'
+            % (name, p0, 1e3 * t0, p1, 1e3 * t1))
@@ -0,0 +1,40 @@
+"""
+Lookups of <Z> and Lz in an EquilibriumTable against solving the
+equilibrium at every call, and the error of the table.
+
+    $ python benchmarks/equilibrium_table.py
+"""
+import time
+
+import numpy as np
+import atomic
+from atomic.plasma_state import PlasmaState
+
+npoints = 100000
+rng = np.random.RandomState(0)
+temperature = 10**rng.uniform(0.5, 3.8, npoints)
+density = 10**rng.uniform(17.5, 20.5, npoints)
+
+for element in ['carbon', 'argon', 'tungsten']:
+    ad = atomic.element(element)
+    eq = atomic.CollRadEquilibrium(ad)
+    start = time.time()
+    y = eq.ionisation_stage_distribution(temperature, density)
+    mean_charge = y.mean_charge()
+    Lz = atomic.Radiation(y).specific_power['total']
+    solved = time.time() - start
+
+    for interpolation in ['linear', 'cubic']:
+        table = atomic.EquilibriumTable.build(ad, np.logspace(0, 4, 400),
+                np.logspace(17, 21, 41), interpolation=interpolation)
+        start = time.time()
+        state = PlasmaState(temperature, density)
+        table_mean_charge = table.mean_charge(state)
+        table_Lz = table.radiative_loss(state)
+        looked_up = time.time() - start
+
+        print('%-10s %-6s %7.1f ms solved, %6.1f ms looked up (%5.1f MB): '
+            'error %.1e in <Z>, %.1e in Lz' % (element, interpolation,
+                1e3 * solved, 1e3 * looked_up, table.nbytes / 1e6,
+                np.abs(table_mean_charge - mean_charge).max(),
+                np.abs(table_Lz / Lz - 1).max()))
@@ -0,0 +1,37 @@
+"""
+Time to evaluate all charge states of a rate coefficient, per interpolation.
+
+RateCoefficient.evaluate_all at many points, from arrays (which includes
+locating the points on the grid) and from a PlasmaState that has done so
+already.
+
+    $ python benchmarks/interpolation.py
+"""
+import timeit
+
+import numpy as np
+import atomic
+
+npoints = 100000
+interpolations = ['spline', 'patches', 'linear', 'chebyshev']
+
+temperature = np.logspace(0, 4, npoints)
+density = np.logspace(17, 21, npoints)
+state = atomic.PlasmaState(temperature, density)
+
+
+def best(f):
+    f()
+    return min(timeit.repeat(f, number=3, repeat=3)) / 3
+
+print('%d points; time per evaluate_all from arrays / from a PlasmaState'
+        % npoints)
+for element in ['carbon', 'argon', 'tungsten']:
+    times = []
+    for interpolation in interpolations:
+        ad = atomic.element(element, interpolation=interpolation)
+        rc = ad.coeffs['ionisation']
+        times.append('%-8s %7.1f ms %7.1f ms' % (interpolation,
+            1e3 * best(lambda: rc.evaluate_all(temperature, density)),
+            1e3 * best(lambda: rc.evaluate_all(state))))
+    print('%-10s %s' % (element, '   '.join(times)))
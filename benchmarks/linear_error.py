@@ -0,0 +1,48 @@
+"""
+How far interpolation='linear' is from the cubic splines, for every element
+in adas_data.
+
+The coefficients of all charge states are compared at the centres of the
+grid cells, where bilinear interpolation is furthest from the table values,
+and at random points inside the grid.  The errors are relative errors of
+the coefficients themselves, |c_linear / c_spline - 1|, over all charge
+states; points where the spline is below 1e-60 (the empty parts of the
+tables) are left out.
+
+    $ python benchmarks/linear_error.py
+"""
+import numpy as np
+import atomic
+from atomic.atomic_data import _element_index
+
+npoints = 20000
+rng = np.random.RandomState(0)
+
+
+def points(rc):
+    """The cell centres and random points inside the grid of rc."""
+    x, y = rc.log_temperature, rc.log_density
+    xc = (x[:-1] + x[1:]) / 2
+    yc = (y[:-1] + y[1:]) / 2
+    X, Y = np.meshgrid(xc, yc, indexing='ij')
+    X = np.concatenate([X.ravel(), rng.uniform(x[0], x[-1], npoints)])
+    Y = np.concatenate([Y.ravel(), rng.uniform(y[0], y[-1], npoints)])
+    return atomic.PlasmaState(10**X, 10**Y)
+
+
+print('%-4s %-20s %12s %12s %12s' % ('', '', 'max', 'median',
+    '99th pct'))
+for element in _element_index().elements():
+    spline = atomic.element(element)
+    linear = atomic.element(element, interpolation='linear')
+    for key in sorted(spline.coeffs):
+        state = points(spline.coeffs[key])
+        log_spline = spline.coeffs[key].log10_all(state)
+        log_linear = linear.coeffs[key].log10_all(state)
+
+        error = np.abs(10**(log_linear - log_spline) - 1)[log_spline > -60]
+        if error.size == 0:
+            continue
+        print('%-4s %-20s %11.3g%% %11.3g%% %11.3g%%' % (element, key,
+            100 * error.max(), 100 * np.median(error),
+            100 * np.percentile(error, 99)))
@@ -0,0 +1,41 @@
+"""
+How much memoization saves when one profile goes through CollRadEquilibrium,
+Radiation, ElectronCooling and RateEquations, each of which evaluates some
+of the same rate coefficients again.
+
+    $ python benchmarks/memo.py
+"""
+import time
+
+import numpy as np
+import atomic
+
+npoints = 20000
+temperature = np.logspace(0, 4, npoints)
+density = np.full(npoints, 1e19)
+
+
+def pipeline(ad):
+    y = atomic.CollRadEquilibrium(ad).ionisation_stage_distribution(
+            temperature, density)
+    atomic.Radiation(y).power
+    atomic.ElectronCooling(y).power
+    rt = atomic.RateEquations(ad)
+    rt._set_temperature_and_density_grid(temperature, density)
+    rt._set_initial_conditions()
+
+
+for element in ['carbon', 'argon', 'tungsten']:
+    ad = atomic.element(element)
+    pipeline(ad) # read the files and fit the splines
+
+    start = time.time()
+    pipeline(ad)
+    plain = time.time() - start
+
+    memo = ad.memoize()
+    start = time.time()
+    pipeline(ad)
+    memoized = time.time() - start
+    print('%-10s %7.1f ms without a memo, %7.1f ms with one: %s' % (element,
+        1e3 * plain, 1e3 * memoized, memo))
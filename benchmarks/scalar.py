@@ -0,0 +1,26 @@
+"""
+Time to evaluate a rate coefficient at a single point.
+
+Compares RateCoefficient.__call__ with python floats to the patch based
+RateCoefficient.scalar_evaluator().
+
+    $ python benchmarks/scalar.py
+"""
+import timeit
+
+import atomic
+
+number = 20000
+
+for element in ['carbon', 'argon', 'tungsten']:
+    rc = atomic.element(element).coeffs['ionisation']
+    f = rc.scalar_evaluator()
+    k = rc.nuclear_charge // 2
+
+    call = min(timeit.repeat(lambda: rc(k, 50., 1e19), number=number,
+        repeat=3)) / number
+    scalar = min(timeit.repeat(lambda: f(k, 50., 1e19), number=number,
+        repeat=3)) / number
+
+    print('%-10s __call__ %6.2f us  scalar_evaluator %6.2f us  (x%.0f)'
+            % (element, 1e6 * call, 1e6 * scalar, call / scalar))
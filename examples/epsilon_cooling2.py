@@ -41,7 +41,7 @@ def netauplot(netau):
         density = densities[i]
         tau = taus[i]
         for e in elementColors: 
-            plotEps(atomic.element(e['el']), density, tau, e['c'], lw=linewidth[i])
+            plotEps(atomic.registry.get(e['el']), density, tau, e['c'], lw=linewidth[i])
 
     # make the titles and set boundaries
     netaustring = num2str(netau)
@@ -56,7 +56,7 @@ def netauplot(netau):
     lh = []
     for e in elementColors: 
         lh.append(mlines.Line2D([],[],
-                color=e['c'], label=atomic.element(e['el']).element))
+                color=e['c'], label=atomic.registry.get(e['el']).element))
 
     elements_legend = plt.legend(handles=lh, loc=2)
     ax = plt.gca().add_artist(elements_legend)
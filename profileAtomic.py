@@ -1,7 +1,9 @@
 """
-Profiling the ionisation rate equation solver.
+Profiling the ionisation rate equation solver, and comparing it with the
+analytic Jacobian and with a Jacobian by finite differences.
 """
 import cProfile, pstats
+import time
 
 import numpy as np
 import atomic
@@ -18,3 +20,15 @@ cProfile.runctx("rt.solve(times, temperature, density)", globals(),
 
 s = pstats.Stats("profile.prof")
 s.strip_dirs().sort_stats("time").print_stats()
+
+# the finite differences take (Z + 1) * ntemperatures calls to derivs() per
+# Jacobian: for tungsten this takes minutes.
+for element in ['carbon', 'argon', 'tungsten']:
+    rt = atomic.RateEquations(atomic.element(element))
+    for jacobian in [True, False]:
+        start = time.time()
+        rt.solve(times, temperature, density, jacobian=jacobian)
+        elapsed = time.time() - start
+        print('%-10s %-18s %8.2f s, %7d derivs() calls, %4d Jacobians' % (
+            element, 'analytic Jacobian' if jacobian else 'finite differences',
+            elapsed, rt.info['nfe'][-1], rt.info['nje'][-1]))
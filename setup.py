@@ -1,13 +1,8 @@
 import os
 
+# adf11 files are read in pure python (atomic/adf11.py); only the adf15
+# reader needs a compiled extension.
 extension_modules = {}
-directory = 'src/xxdata_11'
-sources = ['xxdata_11.for', 'xxrptn.for', 'i4unit.for',
-    'i4fctn.for', 'xxword.for', 'xxcase.for', 'xfelem.for', 'xxslen.for',
-     '../xxdata_11.pyf', '../helper_functions.for']
-extension_modules['_xxdata_11'] = dict(sources=sources, directory=directory)
-
-
 directory = 'src/xxdata_15'
 sources = ['xxdata_15.for', 'xxrptn.for', 'xxmkrp.for', 'i4unit.for',
     'i4fctn.for', 'r8fctn.for', 'xxhkey.for', 'xxword.for', 'xxcase.for',